@@ -0,0 +1,354 @@
+# this script requires python 3.10 or later, and the packages runConvert.py needs.
+#
+# batchConvert.py converts many workbooks in one invocation.  The workbooks are those
+# in a directory, or those listed in a manifest file, one per line as
+#     <xlsx file> [<name>]
+# with paths relative to the manifest's directory, and the name defaulting to the
+# file's base name.  Each workbook gets its own output namespace, <outDir>/<name>,
+# holding the working, csvDir, yamlDir, templateDir and descDir directories of its
+# conversion, the log of what the conversion printed and, given -bundleDir, the
+# bundles of its experiments.
+#
+# Each workbook is converted by runConvert.py's main() in a driver process, several
+# workbooks at a time, the largest first.  The converter runs of every conversion, those
+# validating the experiments, the final conversion and those making bundles, are not
+# made by a pool of the conversion's own but by one pool of worker processes shared by
+# all of them, so that the runs of different workbooks interleave and keep every worker
+# busy even when a few large workbooks are all that is left.  A worker keeps the state
+# of the conversions it has made runs for (the sheets, templates and directories), as
+# well as the compiled converters, so moving from the runs of one workbook to those of
+# another costs it little.  Options not recognized here are passed to every runConvert.py
+# conversion.
+#
+import concurrent.futures
+import multiprocessing
+import collections
+import contextlib
+import itertools
+import threading
+import traceback
+import argparse
+import tempfile
+import pickle
+import shutil
+import time
+import sys
+import os
+
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+
+# directories of each workbook's namespace, given to runConvert.py by these options
+namespaceDirs = {'workingDir': 'working', 'csvDir': 'csvDir', 'yamlDir': 'yamlDir',
+        'templateDir': 'templateDir', 'descDir': 'descDir'}
+
+def print_err(*a):
+    print(*a, file=sys.stderr)
+
+def readManifest(manifest_file):
+    """Returns the (name, xlsx file) pairs listed in the manifest"""
+    baseDir = os.path.dirname(os.path.abspath(manifest_file))
+    workbooks = []
+    with open(manifest_file, 'r') as rf:
+        for line in rf:
+            line = line.strip()
+            if len(line) == 0 or line.startswith('#'):
+                continue
+            pieces = line.split()
+            xlsx_file = os.path.join(baseDir, pieces[0])
+            if len(pieces) > 1:
+                name = pieces[1]
+            else:
+                name = os.path.splitext(os.path.basename(pieces[0]))[0]
+            workbooks.append((name, xlsx_file))
+    return workbooks
+
+def findWorkbooks(batch):
+    """Returns the (name, xlsx file) pairs of the workbooks in the directory or manifest batch,
+    and a list of the problems found with them"""
+    if os.path.isdir(batch):
+        workbooks = []
+        for fileName in sorted(os.listdir(batch)):
+            if fileName.endswith('.xlsx') and not fileName.startswith('~$'):
+                workbooks.append((fileName[:-len('.xlsx')], os.path.join(batch, fileName)))
+    else:
+        workbooks = readManifest(batch)
+
+    msgs = []
+    seen = set()
+    for name, xlsx_file in workbooks:
+        if name in seen:
+            msgs.append('more than one workbook is named {}'.format(name))
+        seen.add(name)
+        if not os.path.isfile(xlsx_file):
+            msgs.append('workbook {} not found'.format(xlsx_file))
+    return workbooks, msgs
+
+# the states of the conversions a shared worker keeps, the least recently used being
+# dropped beyond this many
+keptStates = 8
+
+def poolWorker(tasks, replyQueues):
+    """Makes the converter runs put on tasks, by the drivers of any of the conversions,
+    sending each result to the reply queue of the driver that put the run.  A task is
+    (driver slot, job id, path of the pickled conversion state, function, arguments)."""
+    import runConvert
+
+    states = collections.OrderedDict()
+    current = None
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        slot, jobId, statePath, fn, args = task
+        try:
+            if statePath != current:
+                if statePath not in states:
+                    with open(statePath, 'rb') as rf:
+                        states[statePath] = pickle.load(rf)
+                    if len(states) > keptStates:
+                        states.popitem(last=False)
+                states.move_to_end(statePath)
+                runConvert.timings.context.clear()
+                runConvert.initWorker(*states[statePath])
+                current = statePath
+            reply = (jobId, True, fn(*args))
+        except BaseException as err:
+            reply = (jobId, False, err)
+        try:
+            replyQueues[slot].put(reply)
+        except Exception as err:
+            # e.g. a result that does not pickle
+            replyQueues[slot].put((jobId, False, RuntimeError(repr(err))))
+
+class SharedPool:
+    """What a driver process needs to put its runs on the shared pool: the queue of
+    tasks, its slot and reply queue, the futures of its runs waiting for a reply, and
+    the directory its conversion states are written to"""
+    def __init__(self, tasks, replies, slot, stateDir):
+        self.tasks = tasks
+        self.replies = replies
+        self.slot = slot
+        self.stateDir = stateDir
+        self.jobIds = itertools.count()
+        self.pending = {}
+        self.lock = threading.Lock()
+
+        dispatcher = threading.Thread(target=self.dispatch, daemon=True)
+        dispatcher.start()
+
+    def dispatch(self):
+        """Sets the results of the runs as their replies come in"""
+        while True:
+            jobId, ok, result = self.replies.get()
+            with self.lock:
+                future = self.pending.pop(jobId, None)
+            if future is None:
+                continue
+            try:
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(result)
+            except concurrent.futures.InvalidStateError:
+                # cancelled while it waited
+                pass
+
+    def submit(self, statePath, fn, args):
+        future = concurrent.futures.Future()
+        jobId = next(self.jobIds)
+        with self.lock:
+            self.pending[jobId] = future
+        self.tasks.put((self.slot, jobId, statePath, fn, args))
+        return future
+
+class SharedExecutor(concurrent.futures.Executor):
+    """The executor runConvert.py spreads a pool of runs across (see runConvert.makeExecutor),
+    putting them on the shared pool with the state the workers are to be set up with"""
+    def __init__(self, pool, state):
+        self.pool = pool
+        fd, self.statePath = tempfile.mkstemp(prefix='state-', dir=pool.stateDir)
+        with os.fdopen(fd, 'wb') as wf:
+            pickle.dump(state, wf)
+        self.futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = self.pool.submit(self.statePath, fn, args)
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        if cancel_futures:
+            for future in self.futures:
+                future.cancel()
+        if wait:
+            concurrent.futures.wait(self.futures)
+        try:
+            os.remove(self.statePath)
+        except OSError:
+            pass
+
+# the shared pool of a driver process, set when it starts
+sharedPool = None
+
+def initDriver(tasks, replyQueues, slots, stateDir):
+    """Sets up a driver process to put the runs of its conversions on the shared pool"""
+    global sharedPool
+    import runConvert
+
+    with slots.get_lock():
+        slot = slots.value
+        slots.value += 1
+    sharedPool = SharedPool(tasks, replyQueues[slot], slot, stateDir)
+    runConvert.makeExecutor = lambda workers, state: SharedExecutor(sharedPool, state)
+
+def convertWorkbook(name, xlsx_file, outDir, extraArgs, workers):
+    """Converts the workbook into the namespace outDir/name in a driver process, its runs
+    spread across the workers of the shared pool, returning its status ('ok', 'invalid'
+    if an experiment failed validation, or 'failed'), how long the conversion took, and
+    the path of its log"""
+    import runConvert
+
+    namespace = os.path.join(outDir, name)
+    cmdline = ['-name', name, '-xlsx', xlsx_file, '-convertDir', os.path.join(scriptDir, 'convert')]
+    for option, dirName in namespaceDirs.items():
+        path = os.path.join(namespace, dirName)
+        os.makedirs(path, exist_ok=True)
+        cmdline.extend(['-'+option, path])
+
+    # bundles are written within the namespace, or if an absolute directory is given,
+    # to a subdirectory of it named for the workbook
+    extraArgs = list(extraArgs)
+    for idx in range(len(extraArgs)-1):
+        if extraArgs[idx] == '-bundleDir':
+            if os.path.isabs(extraArgs[idx+1]):
+                extraArgs[idx+1] = os.path.join(extraArgs[idx+1], name)
+            else:
+                extraArgs[idx+1] = os.path.join(namespace, extraArgs[idx+1])
+
+    cmdline.extend(extraArgs)
+    cmdline.extend(['-workers', str(workers)])
+
+    status = 'ok'
+    logPath = os.path.join(namespace, 'convert.log')
+    wall = time.perf_counter()
+    with open(logPath, 'w') as wf, contextlib.redirect_stdout(wf), contextlib.redirect_stderr(wf):
+        try:
+            status = runConvert.main(cmdline)
+        except SystemExit as err:
+            if err.code not in (None, 0):
+                status = 'failed'
+        except Exception:
+            traceback.print_exc()
+            status = 'failed'
+    wall = time.perf_counter() - wall
+
+    return status, wall, logPath
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(u'-batch', metavar = u'directory of workbooks, or manifest file listing them', dest=u'batch',
+            required=True)
+    parser.add_argument(u'-outDir', metavar = u'directory holding the output namespace of each workbook',
+            dest=u'outDir', required=True)
+    parser.add_argument(u'-workers', metavar = u'number of processes making the converter runs of all workbooks',
+            dest=u'workers', type=int, required=False)
+    parser.add_argument(u'-drivers', metavar = u'number of workbooks converted at a time', dest=u'drivers',
+            type=int, required=False)
+
+    cmdline = sys.argv[1:]
+    if len(sys.argv) == 3 and sys.argv[1] == "-is":
+        cmdline = []
+        with open(sys.argv[2],"r") as rf:
+            for line in rf:
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                cmdline.extend(line.split())
+
+    args, extraArgs = parser.parse_known_args(cmdline)
+    if '-watch' in extraArgs:
+        print_err('-watch cannot be used in a batch conversion')
+        exit(1)
+
+    workbooks, msgs = findWorkbooks(args.batch)
+    if len(workbooks) == 0:
+        msgs.append('no workbooks found in {}'.format(args.batch))
+    if len(msgs) > 0:
+        for msg in msgs:
+            print_err(msg)
+        exit(1)
+
+    outDir = os.path.abspath(args.outDir)
+    os.makedirs(outDir, exist_ok=True)
+
+    workers = args.workers
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, workers)
+
+    # the drivers mostly wait for their runs, but read the workbooks and plan the runs
+    # themselves, so there are as many as workers unless asked for otherwise
+    drivers = args.drivers
+    if drivers is None:
+        drivers = workers
+    drivers = max(1, min(drivers, len(workbooks)))
+
+    # largest first, so that the longest conversions are not left until last
+    order = sorted(workbooks, key=lambda workbook: os.path.getsize(workbook[1]), reverse=True)
+
+    context = multiprocessing.get_context()
+    tasks = context.Queue()
+    replyQueues = [context.Queue() for idx in range(drivers)]
+    slots = context.Value('i', 0)
+    stateDir = tempfile.mkdtemp(prefix='pcesbld-batch-')
+
+    pool = []
+    for idx in range(workers):
+        worker = context.Process(target=poolWorker, args=(tasks, replyQueues), daemon=True)
+        worker.start()
+        pool.append(worker)
+
+    results = {}
+    wall = time.perf_counter()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=drivers, mp_context=context,
+                initializer=initDriver, initargs=(tasks, replyQueues, slots, stateDir)) as executor:
+            running = {}
+            for name, xlsx_file in order:
+                future = executor.submit(convertWorkbook, name, os.path.abspath(xlsx_file), outDir, extraArgs, workers)
+                running[future] = name
+
+            for future in concurrent.futures.as_completed(running):
+                name = running[future]
+                try:
+                    results[name] = future.result()
+                except Exception as err:
+                    results[name] = ('failed', 0.0, 'driver process failed: {}'.format(err))
+                print('{} {} in {:.2f} s'.format(name, results[name][0], results[name][1]))
+                sys.stdout.flush()
+    finally:
+        for worker in pool:
+            tasks.put(None)
+        for worker in pool:
+            worker.join()
+        shutil.rmtree(stateDir, ignore_errors=True)
+    wall = time.perf_counter() - wall
+
+    width = max([len(name) for name, xlsx_file in workbooks] + [8])
+    print()
+    print('{:<{}} {:>8} {:>9}  {}'.format('workbook', width, 'status', 'seconds', 'log'))
+    for name, xlsx_file in workbooks:
+        status, seconds, logPath = results[name]
+        print('{:<{}} {:>8} {:>9.2f}  {}'.format(name, width, status, seconds, logPath))
+
+    counts = {}
+    for status, seconds, logPath in results.values():
+        counts[status] = counts.get(status, 0) + 1
+    print('{} workbooks converted in {:.2f} s by {} drivers and {} workers: {}'.format(len(workbooks), wall, drivers, workers,
+        ', '.join(['{} {}'.format(counts[status], status) for status in ('ok', 'invalid', 'failed') if status in counts])))
+
+    if 'failed' in counts:
+        exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+# this script requires python 3.10 or later, and the packages runConvert.py needs.
+#
+# benchConvert.py measures the conversion of the example workbooks, and of workbooks
+# made by genWorkbook.py at several sizes, so that changes that slow it down are caught.
+# For each workbook it
+#   - runs runConvert.py end to end in its own process, validating every experiment,
+#   - then runs each converter once more in a process of its own, on the csv files of
+#     the final (unvalidated) conversion, with the description files that left behind,
+# recording for each run its wall clock and CPU time, its memory and the bytes of the
+# files it wrote.  The memory of runConvert.py is its peak resident set size; that of
+# a converter is the peak of the memory the conversion allocated, traced in a second
+# run of it so that the tracing does not slow the timed one, as the resident set of a
+# converter's process is mostly the interpreter and the modules it loads.  The
+# measurements are compared with those of a stored baseline, and any that exceed the
+# baseline by more than the tolerance fail the run.
+# Over the generated workbooks, whose sizes double, the growth of each converter's
+# time is fitted as size**exponent, and converters with a superlinear exponent are
+# flagged.
+#
+# runConvert.py exits with status 0 even when a converter of the final conversion fails,
+# so a run of it is also counted as failed when that part of its output holds a
+# traceback or a conversion skipped for it.
+#
+import concurrent.futures
+import contextlib
+import importlib.util
+import multiprocessing
+import tracemalloc
+import subprocess
+import argparse
+import shutil
+import math
+import time
+import json
+import sys
+import io
+import os
+import genWorkbook
+
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+
+# the converters, in an order in which each finds the description files it reads
+converterSheets = ('experiments', 'exec', 'topo', 'ipmap', 'netparams', 'cp', 'mapping')
+
+# the genWorkbook.py parameters of the generated workbook of size 1.  A workbook of
+# size s has s times the networks, patterns, extra connections and experiments
+genBase = {'networks': 1, 'endpoints': 8, 'switches': 2, 'patterns': 5, 'funcs': 6,
+        'extraConnections': 5, 'experiments': 4, 'seed': 1}
+
+# differences in time smaller than this (seconds) are not counted as regressions,
+# whatever the tolerance
+timeFloor = 0.02
+
+# what runConvert.py prints as it starts the final conversion, and what it prints after
+# that when a converter fails
+finalMarker = 'Transform csv files with symbols to yaml files with symbols'
+failureMarkers = ('Traceback (most recent call last)', 'skipped because conversion of')
+
+def print_err(*a):
+    print(*a, file=sys.stderr)
+
+def genArgs(size):
+    """Returns the genWorkbook.py arguments of the generated workbook of the given size"""
+    args = argparse.Namespace(**genBase)
+    args.networks *= size
+    args.patterns *= size
+    args.experiments *= size
+    args.routers = args.networks-1
+    args.connections = args.patterns*(args.funcs-1) + genBase['extraConnections']*size
+    del args.extraConnections
+    return args
+
+def dirBytes(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def caseDirs(caseDir):
+    return {name: os.path.join(caseDir, name) for name in ('working', 'csvDir', 'yamlDir', 'templateDir', 'descDir')}
+
+def timeRunConvert(caseName, caseDir, xlsx_file, workers):
+    """Runs runConvert.py on the workbook in a fresh workspace in caseDir, returning its
+    measurements"""
+    shutil.rmtree(caseDir, ignore_errors=True)
+    dirs = caseDirs(caseDir)
+    for path in dirs.values():
+        os.makedirs(path)
+
+    argsFile = os.path.join(caseDir, 'args-xlsx')
+    with open(argsFile, 'w') as wf:
+        print('-name {}'.format(caseName), file=wf)
+        print('-xlsx {}'.format(os.path.abspath(xlsx_file)), file=wf)
+        print('-convertDir {}'.format(os.path.join(scriptDir, 'convert')), file=wf)
+        for name, path in dirs.items():
+            print('-{} {}'.format(name, path), file=wf)
+        print('-workers {}'.format(workers), file=wf)
+        print('-noCache', file=wf)
+        print('-writeCsv', file=wf)
+
+    outputFile = os.path.join(caseDir, 'stdout.txt')
+    with open(outputFile, 'w') as wf:
+        wall = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, os.path.join(scriptDir, 'runConvert.py'), '-is', argsFile],
+                cwd=caseDir, stdout=wf, stderr=subprocess.STDOUT)
+        # wait4 gives the resource usage of runConvert.py and the workers it waited for
+        _, waitStatus, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - wall
+    proc.returncode = os.waitstatus_to_exitcode(waitStatus)
+
+    with open(outputFile, 'r') as rf:
+        output = rf.read()
+
+    # tracebacks printed while validating belong to experiments that failed validation,
+    # those printed after are of the final conversion
+    final = output[output.find(finalMarker):] if output.find(finalMarker) > -1 else ''
+
+    status = 'ok'
+    if proc.returncode != 0 or any(final.find(marker) > -1 for marker in failureMarkers):
+        status = 'failed'
+    elif output.find('experiments that failed validation') > -1:
+        status = 'invalid'
+
+    return {'status': status, 'wall': wall, 'cpu': usage.ru_utime + usage.ru_stime,
+        'memory': usage.ru_maxrss/1024.0, 'bytes': dirBytes(dirs['yamlDir']) + dirBytes(dirs['descDir'])}
+
+def loadScript(scriptPath):
+    """Returns the converter script loaded as a module of its own"""
+    spec = importlib.util.spec_from_file_location('converter', scriptPath)
+    converter = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(converter)
+    return converter
+
+def timeConverter(scriptPath, cmdline):
+    """Runs the converter script on cmdline, in a process of its own, returning its
+    measurements.  Only the conversion itself is timed, not the starting of python.
+    The script is then loaded afresh (its tables being module globals) and run again
+    with the allocations traced, for the peak memory of the conversion.  A converter
+    that exits or raises an exception is measured as failed, and not run again."""
+    converter = loadScript(scriptPath)
+    args = converter.parseArgs(cmdline)
+
+    status = 'ok'
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        try:
+            converter.convert(args)
+        except (SystemExit, Exception):
+            status = 'failed'
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+
+    memory = 0
+    if status == 'ok':
+        converter = loadScript(scriptPath)
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            converter.convert(converter.parseArgs(cmdline))
+        memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    paths = [os.path.join(args.yamlDir, getattr(args, name, name)) for name in converter.yamlOutputs]
+    paths.extend([os.path.join(args.descDir, getattr(args, name, name)) for name in converter.descOutputs])
+    written = sum([os.path.getsize(path) for path in paths if os.path.isfile(path)])
+
+    return {'status': status, 'wall': wall, 'cpu': cpu,
+        'memory': memory/(1024.0*1024.0), 'bytes': written}
+
+def converterCmdline(caseDir, sheet):
+    """Returns the command line of the final conversion of sheet in the workspace caseDir,
+    from the argument file runConvert.py left there, or None if the workbook has no such sheet
+    or runConvert.py stopped before converting it"""
+    argsFile = os.path.join(caseDir, 'working', 'args-'+sheet)
+    if not os.path.isfile(argsFile):
+        return None
+
+    cmdline = []
+    with open(argsFile, 'r') as rf:
+        for line in rf:
+            line = line.strip()
+            if len(line) == 0 or line.startswith('#'):
+                continue
+            cmdline.extend(line.split())
+
+    cmdline = [arg for arg in cmdline if arg != '-validate']
+    csvIn = cmdline[cmdline.index('-csvIn')+1]
+    if not os.path.isfile(os.path.join(caseDir, 'csvDir', csvIn)):
+        return None
+    return cmdline
+
+def repeated(measure, repeat, *args):
+    """Returns the measurements of the best of repeat calls to measure(*args): the least
+    time, memory and bytes, and the status of the last call"""
+    best = None
+    for idx in range(repeat):
+        result = measure(*args)
+        if best is None:
+            best = result
+            continue
+        for metric in ('wall', 'cpu', 'memory', 'bytes'):
+            best[metric] = min(best[metric], result[metric])
+        best['status'] = result['status']
+    return best
+
+def isolated(scriptPath, cmdline):
+    """timeConverter in a newly started python process, so that no converter measured
+    before has left anything behind in it"""
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1,
+            mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(timeConverter, scriptPath, cmdline).result()
+
+def benchCase(caseName, xlsx_file, args, measurements):
+    """Measures runConvert.py and each converter on the workbook, adding the results to
+    measurements under caseName/runConvert and caseName/<sheet>"""
+    caseDir = os.path.join(args.benchDir, caseName)
+    result = repeated(timeRunConvert, args.repeat, caseName, caseDir, xlsx_file, args.workers)
+    measurements[caseName+'/runConvert'] = result
+    printMeasurement(caseName+'/runConvert', result)
+
+    for sheet in converterSheets:
+        scriptPath = os.path.join(scriptDir, 'convert', 'convert-'+sheet+'.py')
+        cmdline = converterCmdline(caseDir, sheet)
+        if cmdline is None:
+            continue
+        result = repeated(isolated, args.repeat, scriptPath, cmdline)
+        measurements[caseName+'/'+sheet] = result
+        printMeasurement(caseName+'/'+sheet, result)
+
+def printMeasurement(name, result):
+    print('{:<28} {:>8} {:>9.3f} {:>9.3f} {:>9.2f} {:>11}'.format(name, result['status'],
+        result['wall'], result['cpu'], result['memory'], result['bytes']))
+    sys.stdout.flush()
+
+def scalingExponent(points):
+    """Returns the slope of the least squares fit of log(time) against log(size) for the
+    (size, time) points, None if there are fewer than two"""
+    logs = [(math.log(size), math.log(t)) for size, t in points if t > 0]
+    if len(logs) < 2:
+        return None
+    mx = sum([x for x, y in logs])/len(logs)
+    my = sum([y for x, y in logs])/len(logs)
+    sxx = sum([(x-mx)**2 for x, y in logs])
+    if sxx == 0:
+        return None
+    return sum([(x-mx)*(y-my) for x, y in logs])/sxx
+
+def scaling(measurements, sizes):
+    """Returns the scaling exponent of runConvert.py and of each converter over the
+    generated workbooks"""
+    exponents = {}
+    for name in ('runConvert',) + converterSheets:
+        points = []
+        for size in sizes:
+            result = measurements.get('gen-x{}/{}'.format(size, name))
+            if result is not None and result['status'] != 'failed':
+                points.append((size, result['wall']))
+        exponent = scalingExponent(points)
+        if exponent is not None:
+            exponents[name] = exponent
+    return exponents
+
+def regressions(results, baseline, tolerance):
+    """Returns descriptions of the measurements in results that are worse than those of
+    the baseline by more than the tolerance"""
+    msgs = []
+    for name, base in baseline['measurements'].items():
+        if name not in results['measurements']:
+            continue
+        current = results['measurements'][name]
+        if current['status'] != base['status']:
+            msgs.append('{}: status {}, baseline {}'.format(name, current['status'], base['status']))
+            continue
+
+        for metric in ('wall', 'cpu', 'memory', 'bytes'):
+            if metric not in base or current[metric] <= base[metric]*(1+tolerance):
+                continue
+            if metric in ('wall', 'cpu') and current[metric]-base[metric] < timeFloor:
+                continue
+            msgs.append('{}: {} {:.6g}, baseline {:.6g}'.format(name, metric, current[metric], base[metric]))
+    return msgs
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(u'-benchDir', metavar = u'directory where the workbooks are converted', dest=u'benchDir',
+            default='bench', required=False)
+    parser.add_argument(u'-sizes', metavar = u'comma separated sizes of the generated workbooks', dest=u'sizes',
+            default='1,2,4,8', required=False)
+    parser.add_argument(u'-noExamples', action='store_true', required=False)
+    parser.add_argument(u'-noGenerated', action='store_true', required=False)
+    parser.add_argument(u'-repeat', metavar = u'number of times each run is measured, the best kept', dest=u'repeat',
+            type=int, default=1, required=False)
+    parser.add_argument(u'-workers', metavar = u'number of processes runConvert.py validates experiments with',
+            dest=u'workers', type=int, default=1, required=False)
+    parser.add_argument(u'-baseline', metavar = u'file of baseline measurements', dest=u'baseline', required=False)
+    parser.add_argument(u'-saveBaseline', action='store_true', required=False)
+    parser.add_argument(u'-tolerance', metavar = u'fraction by which a measurement may exceed its baseline',
+            dest=u'tolerance', type=float, default=0.25, required=False)
+    parser.add_argument(u'-superlinear', metavar = u'scaling exponent above which a converter is flagged',
+            dest=u'superlinear', type=float, default=1.2, required=False)
+
+    cmdline = sys.argv[1:]
+    if len(sys.argv) == 3 and sys.argv[1] == "-is":
+        cmdline = []
+        with open(sys.argv[2],"r") as rf:
+            for line in rf:
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                cmdline.extend(line.split())
+
+    args = parser.parse_args(cmdline)
+    args.benchDir = os.path.abspath(args.benchDir)
+    os.makedirs(args.benchDir, exist_ok=True)
+
+    sizes = []
+    if not args.noGenerated:
+        sizes = [int(size) for size in args.sizes.split(',') if len(size) > 0]
+
+    cases = []
+    if not args.noExamples:
+        examplesDir = os.path.join(scriptDir, 'examples')
+        for name in sorted(os.listdir(examplesDir)):
+            if name.endswith('.xlsx'):
+                cases.append((name[:-len('.xlsx')], os.path.join(examplesDir, name)))
+
+    for size in sizes:
+        xlsx_file = os.path.join(args.benchDir, 'gen-x{}.xlsx'.format(size))
+        genWorkbook.writeWorkbook(genWorkbook.Model(genArgs(size)).sheets(), xlsx_file)
+        cases.append(('gen-x{}'.format(size), xlsx_file))
+
+    print('{:<28} {:>8} {:>9} {:>9} {:>9} {:>11}'.format('run', 'status', 'wall s', 'cpu s', 'mem MB', 'bytes'))
+    measurements = {}
+    for caseName, xlsx_file in cases:
+        benchCase(caseName, xlsx_file, args, measurements)
+
+    results = {'measurements': measurements, 'scaling': scaling(measurements, sizes)}
+    if len(results['scaling']) > 0:
+        print('scaling exponents (time ~ size**exponent) over sizes {}'.format(', '.join([str(size) for size in sizes])))
+        for name, exponent in results['scaling'].items():
+            flag = '  superlinear' if exponent > args.superlinear else ''
+            print('    {:<12} {:6.2f}{}'.format(name, exponent, flag))
+
+    resultsFile = os.path.join(args.benchDir, 'results.json')
+    with open(resultsFile, 'w') as wf:
+        json.dump(results, wf, indent=1)
+    print('measurements written to {}'.format(resultsFile))
+
+    if args.baseline is None:
+        return
+
+    if args.saveBaseline:
+        with open(args.baseline, 'w') as wf:
+            json.dump(results, wf, indent=1)
+        print('baseline written to {}'.format(args.baseline))
+        return
+
+    if not os.path.isfile(args.baseline):
+        print_err('baseline {} not found'.format(args.baseline))
+        exit(1)
+
+    with open(args.baseline, 'r') as rf:
+        baseline = json.load(rf)
+
+    msgs = regressions(results, baseline, args.tolerance)
+    if len(msgs) > 0:
+        print('measurements exceeding the baseline by more than {:.0%}:'.format(args.tolerance))
+        for msg in msgs:
+            print('    '+msg)
+        exit(1)
+    print('no measurement exceeds the baseline by more than {:.0%}'.format(args.tolerance))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# persistent cache of converter results, used by runConvert.py.
+#
+# An entry is keyed on a hash of everything a converter's output depends on: the
+# converter script, its command line, its csv input and the descDir files it reads.
+# The entry holds the yamlDir and descDir files the converter wrote and whatever it
+# printed, so that a later run with the same inputs can restore them rather than
+# running the converter.  The total size of the entries is capped, entries being
+# evicted least recently used first.  The cache is only scanned for its size when the
+# entries stored since the last scan may have taken it over the cap, and eviction takes
+# it down to lowWater of the cap, so that a run storing many entries scans it seldom.
+#
+import hashlib
+import tempfile
+import shutil
+import os
+
+# the fraction of its cap eviction takes the cache down to
+lowWater = 0.9
+
+class BuildCache:
+    def __init__(self, cacheDir, maxBytes):
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        os.makedirs(cacheDir, exist_ok=True)
+
+        # the size of the entries as of the last scan, plus those stored since, None
+        # before the first scan
+        self.total = None
+
+    def key(self, parts):
+        """Returns the hex digest of parts, a list whose members are strings, bytes,
+        or None (e.g. for an input file that does not exist)"""
+        h = hashlib.sha256()
+        for part in parts:
+            if part is None:
+                h.update(b'\x00none')
+            else:
+                if isinstance(part, str):
+                    part = part.encode()
+                h.update(len(part).to_bytes(8, 'little'))
+                h.update(part)
+        return h.hexdigest()
+
+    def fileKey(self, path):
+        """Returns the contents of the file at path for use in a key, None if there is no file"""
+        try:
+            with open(path, 'rb') as rf:
+                return rf.read()
+        except OSError:
+            return None
+
+    def restore(self, key, dirs):
+        """Copies the files of the entry for key into dirs, a dictionary mapping
+        'yamlDir' and 'descDir' to directories.  Returns what the converter printed
+        when the entry was made, or None if there is no entry for key."""
+        entryDir = os.path.join(self.cacheDir, key)
+        try:
+            for dirName, outDir in dirs.items():
+                srcDir = os.path.join(entryDir, dirName)
+                if not os.path.isdir(srcDir):
+                    continue
+                for fileName in os.listdir(srcDir):
+                    shutil.copyfile(os.path.join(srcDir, fileName), os.path.join(outDir, fileName))
+
+            with open(os.path.join(entryDir, 'output.txt'), 'r') as rf:
+                output = rf.read()
+
+            # the modification time of the entry records when it was last used
+            os.utime(entryDir)
+        except OSError:
+            # no entry, or it was evicted while we were reading it
+            return None
+
+        return output
+
+    def store(self, key, files, output):
+        """Makes the entry for key.  files maps 'yamlDir' and 'descDir' to lists
+        of paths of the files the converter wrote there, output is what it printed."""
+        entryDir = os.path.join(self.cacheDir, key)
+        if os.path.isdir(entryDir):
+            return
+
+        # build the entry under a temporary name and rename it, so that processes
+        # sharing the cache never see a partial entry
+        tmpDir = tempfile.mkdtemp(prefix='.tmp-', dir=self.cacheDir)
+        size = 0
+        try:
+            for dirName, paths in files.items():
+                os.mkdir(os.path.join(tmpDir, dirName))
+                for path in paths:
+                    shutil.copyfile(path, os.path.join(tmpDir, dirName, os.path.basename(path)))
+                    size += os.path.getsize(path)
+
+            with open(os.path.join(tmpDir, 'output.txt'), 'w') as wf:
+                wf.write(output)
+            size += len(output)
+
+            os.rename(tmpDir, entryDir)
+        except OSError:
+            # another process made the entry first, or an output is missing
+            shutil.rmtree(tmpDir, ignore_errors=True)
+            return
+
+        if self.total is not None:
+            self.total += size
+        if self.total is None or self.total > self.maxBytes:
+            self.evict()
+
+    def evict(self):
+        """Scans the cache for its size and, if it is over its size cap, removes least
+        recently used entries until it is down to lowWater of the cap.  Entries stored
+        by other processes sharing the cache are found by the scan."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cacheDir):
+            if entry.name.startswith('.') or not entry.is_dir():
+                continue
+            size = 0
+            for dirPath, _, fileNames in os.walk(entry.path):
+                for fileName in fileNames:
+                    try:
+                        size += os.path.getsize(os.path.join(dirPath, fileName))
+                    except OSError:
+                        pass
+            try:
+                used = entry.stat().st_mtime
+            except OSError:
+                continue
+            entries.append((used, size, entry.path))
+            total += size
+
+        if total > self.maxBytes:
+            entries.sort()
+            for used, size, path in entries:
+                if total <= self.maxBytes*lowWater:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+        self.total = total
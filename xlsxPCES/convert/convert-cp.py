@@ -9,6 +9,16 @@ import os
 import argparse
 import ipaddress
 
+# descDir files read and written, and yamlDir files written, given by
+# argument dest or by fixed file name
+descInputs = ('cpuOpsDesc_input', 'feedDesc_input')
+descOutputs = ('funcsDesc_output', 'tcDesc_output')
+yamlOutputs = ('cmpptn_output', 'cpInit_output')
+
+# rows of the csv input, set by runConvert.py when it passes the sheet in memory
+# rather than as a file in csvDir
+csvRows = None
+
 # Globals
 funcInstByName = {}
 cmpPtnInstDict = {}
@@ -1406,9 +1416,15 @@ def cleanRow(row):
 
     return rtn
 
-def main():
-    global mcodes, validateFlag, initClassDict
+def readCsvInput(csv_input_file):
+    """Returns the rows of the csv input, those in csvRows if runConvert.py set it"""
+    if csvRows is not None:
+        return csvRows
 
+    with open(csv_input_file, newline='') as rf:
+        return list(csv.reader(rf))
+
+def parseArgs(cmdline):
     parser = argparse.ArgumentParser()
     parser.add_argument(u'-name', metavar = u'name of system', dest=u'name', required=True)
     parser.add_argument(u'-validate', action='store_true', required=False)
@@ -1446,17 +1462,10 @@ def main():
     parser.add_argument(u'-tcDescOut', metavar = u'file name to write description of comp pattern functions that have timing tables',
         dest=u'tcDesc_output', required=True) 
 
-    cmdline = sys.argv[1:]
-    if len(sys.argv) == 3 and sys.argv[1] == "-is":
-        cmdline = []
-        with open(sys.argv[2],"r") as rf:
-            for line in rf:
-                line = line.strip()
-                if len(line) == 0 or line.startswith('#'):
-                    continue
-                cmdline.extend(line.split()) 
+    return parser.parse_args(cmdline)
 
-    args = parser.parse_args(cmdline)
+def convert(args):
+    global mcodes, validateFlag, initClassDict
 
     csvDir = args.csvDir
     yamlDir = args.yamlDir
@@ -1484,7 +1493,6 @@ def main():
 
     csv_input_file = os.path.join(csvDir, args.csv_input)
     #mc_input_file = os.path.join(descDir, args.mc_input)
-    exprmnt_input_file = os.path.join(descDir, 'exprmnt.json')
     cpuOpsDesc_input_file = os.path.join(descDir, args.cpuOpsDesc_input)
     feedDesc_input_file = os.path.join(descDir, args.feedDesc_input)
 
@@ -1498,7 +1506,10 @@ def main():
 
     errs = 0
     #input_files = (csv_input_file, mc_input_file, cpuOpsDesc_input_file, exprmnt_input_file)
-    input_files = (csv_input_file, cpuOpsDesc_input_file, feedDesc_input_file, exprmnt_input_file)
+    input_files = (csv_input_file, cpuOpsDesc_input_file, feedDesc_input_file)
+    if csvRows is not None:
+        # runConvert.py passed the csv input in memory
+        input_files = (cpuOpsDesc_input_file, feedDesc_input_file)
     for input_file in input_files:
         if not os.path.isfile(input_file):
             print_err('unable to open input file "{}"'.format(input_file))
@@ -1562,9 +1573,6 @@ def main():
     with open(feedDesc_input_file,'r') as rf:
         feedDesc = json.load(rf)
 
-    with open(exprmnt_input_file, 'r') as rf:
-        exprmnts = json.load(rf)
-
     # gather up the unique operation names
     for _, opList in cpuOps.items():
         for op in opList:
@@ -1572,230 +1580,229 @@ def main():
                 allOps.append(op)
 
     msgs = []
-    with open(csv_input_file, newline='') as rf:
-        csvrdr = csv.reader(rf)
-        lineNum = 0
-        for raw in csvrdr:
-            row = []
-            for v in raw:
-                row.append(v.strip())
-
-            if row[0].find('###') > -1:
-                if initializations:
-                    pieces = row[0].split()
-                    className = pieces[1] 
-                continue
+    csvrdr = readCsvInput(csv_input_file)
+    lineNum = 0
+    for raw in csvrdr:
+        row = []
+        for v in raw:
+            row.append(v.strip())
+
+        if row[0].find('###') > -1:
+            if initializations:
+                pieces = row[0].split()
+                className = pieces[1] 
+            continue
 
-            row = cleanRow(row)
+        row = cleanRow(row)
 
-            if row[0].find('#') > -1:
-                continue
+        if row[0].find('#') > -1:
+            continue
 
-            if empty(row):
-                continue
+        if empty(row):
+            continue
             
-            if unnamed(row):
-                continue
+        if unnamed(row):
+            continue
 
-            lineNum += 1
-
-            if row[0].find("Patterns") > -1:
-                patterns = True
-                maxCols = 6 
-                cmpPtnLabel = ''
-                cmpPtnName = ''
-                cmpPtnType = ''
-                funcClass = ''
-                funcLabel = ''
-                srvOp = ''
-                srvFunc = ''
-                continue
+        lineNum += 1
+
+        if row[0].find("Patterns") > -1:
+            patterns = True
+            maxCols = 6 
+            cmpPtnLabel = ''
+            cmpPtnName = ''
+            cmpPtnType = ''
+            funcClass = ''
+            funcLabel = ''
+            srvOp = ''
+            srvFunc = ''
+            continue
             
-            if row[0].find("Connections") > -1:
-                # validate these now so that when reading connections we're assured of
-                # binding between cmpPtn and labels
-                valid, msg = validateCmpPtns()
-                if not valid:
-                    print_err(msg)
-                    exit(1)
-                maxCols = 5
-
-                # validate the cmpPtns
-                patterns = False
-                connections = True
-                srcCP = ''
-                dstCP = ''
-                srcLabel = ''
-                dstLabel = ''
-                msgType = ''
-                continue
+        if row[0].find("Connections") > -1:
+            # validate these now so that when reading connections we're assured of
+            # binding between cmpPtn and labels
+            valid, msg = validateCmpPtns()
+            if not valid:
+                print_err(msg)
+                exit(1)
+            maxCols = 5
+
+            # validate the cmpPtns
+            patterns = False
+            connections = True
+            srcCP = ''
+            dstCP = ''
+            srcLabel = ''
+            dstLabel = ''
+            msgType = ''
+            continue
 
-            if row[0].find("Initializations") > -1:
-                initializations = True
-                maxCols = len(strmSrcIdx)
-                patterns = False
-                connections = False
-                className = ''
-                continue
+        if row[0].find("Initializations") > -1:
+            initializations = True
+            maxCols = len(strmSrcIdx)
+            patterns = False
+            connections = False
+            className = ''
+            continue
 
-            row = row[:maxCols]
+        row = row[:maxCols]
             
-            if patterns:
-                if len(row[ptnNameIdx]) > 0:
-                    cmpPtnName = row[ptnNameIdx]
+        if patterns:
+            if len(row[ptnNameIdx]) > 0:
+                cmpPtnName = row[ptnNameIdx]
 
-                if len(row[ptnTypeIdx]) > 0:
-                    cmpPtnType = row[ptnTypeIdx]
+            if len(row[ptnTypeIdx]) > 0:
+                cmpPtnType = row[ptnTypeIdx]
 
-                funcClass = row[funcClassIdx].strip()
-                funcLabel = row[funcLabelIdx].strip()
-                srvOp = row[srvOpIdx].strip()
-                srvFunc = row[srvFuncIdx].strip()
+            funcClass = row[funcClassIdx].strip()
+            funcLabel = row[funcLabelIdx].strip()
+            srvOp = row[srvOpIdx].strip()
+            srvFunc = row[srvFuncIdx].strip()
 
-                # cmpPtn may have a list of functions, we build the class instance only the first time
-                if cmpPtnName not in cmpPtnInstDict:
-                    cpi = CmpPtnInst(cmpPtnName,cmpPtnType)
-                    cmpPtnInstDict[cmpPtnName] = cpi
+            # cmpPtn may have a list of functions, we build the class instance only the first time
+            if cmpPtnName not in cmpPtnInstDict:
+                cpi = CmpPtnInst(cmpPtnName,cmpPtnType)
+                cmpPtnInstDict[cmpPtnName] = cpi
 
-                # add the function described in the row
-                if len(funcLabel) > 0:
-                    cmpPtnInstDict[cmpPtnName].addFunc( FuncInst(cmpPtnName, funcClass, funcLabel) )
-                if len(srvOp) > 0:
-                    cmpPtnInstDict[cmpPtnName].addService(srvOp, srvFunc)
+            # add the function described in the row
+            if len(funcLabel) > 0:
+                cmpPtnInstDict[cmpPtnName].addFunc( FuncInst(cmpPtnName, funcClass, funcLabel) )
+            if len(srvOp) > 0:
+                cmpPtnInstDict[cmpPtnName].addService(srvOp, srvFunc)
 
-                continue
+            continue
     
-            if connections:
-                if len(row[srcCPIdx]) > 0:
-                    srcCP = row[srcCPIdx]
+        if connections:
+            if len(row[srcCPIdx]) > 0:
+                srcCP = row[srcCPIdx]
 
-                if len(row[dstCPIdx]) > 0:
-                    dstCP = row[dstCPIdx]
+            if len(row[dstCPIdx]) > 0:
+                dstCP = row[dstCPIdx]
 
-                if len(row[srcLabelIdx]) > 0:
-                    srcLabel = row[srcLabelIdx]
-                else:
-                    srcLabel = ""
+            if len(row[srcLabelIdx]) > 0:
+                srcLabel = row[srcLabelIdx]
+            else:
+                srcLabel = ""
 
-                if len(row[dstLabelIdx]) > 0:
-                    dstLabel = row[dstLabelIdx]
-                else:
-                    dstLabel = ""
+            if len(row[dstLabelIdx]) > 0:
+                dstLabel = row[dstLabelIdx]
+            else:
+                dstLabel = ""
 
-                if len(row[msgTypeIdx]) > 0:
-                    msgType = row[msgTypeIdx]
-                else:
-                    msgType = ""
+            if len(row[msgTypeIdx]) > 0:
+                msgType = row[msgTypeIdx]
+            else:
+                msgType = ""
 
-                connectionList.append(Connection(srcCP, dstCP, srcLabel, dstLabel, msgType))
-                continue
+            connectionList.append(Connection(srcCP, dstCP, srcLabel, dstLabel, msgType))
+            continue
 
 
-            if initializations:
-                if len(row[0]) > 0 and className != row[0]:
-                    # new class. N.B. we otherwise 'coast' maintaining the previous one
-                    className = row[0].strip()
+        if initializations:
+            if len(row[0]) > 0 and className != row[0]:
+                # new class. N.B. we otherwise 'coast' maintaining the previous one
+                className = row[0].strip()
               
-                row = row[:initRowLen[className]]    
-
-                # notice that an empty cell means that cmpPtnName will be the previous non-empty 
-                # entry 
-                if len(row[1]) > 0:
-                    cmpPtnName = row[1]
-                if len(row[2]) > 0:
-                    funcLabel = row[2]
-
-                if className == 'srvReq':
-                        # save the initialization block in a way we can find it given the 
-                        # cmpPtnInst name and the function label
-                        if cmpPtnName not in initClassDict:
-                           initClassDict[cmpPtnName] = {}
-
-                        if len(row[1]) > 0:
-                            # first time creates the class
-                            initClassDict[cmpPtnName][funcLabel] = SrvReq(row)
+            row = row[:initRowLen[className]]    
+
+            # notice that an empty cell means that cmpPtnName will be the previous non-empty 
+            # entry 
+            if len(row[1]) > 0:
+                cmpPtnName = row[1]
+            if len(row[2]) > 0:
+                funcLabel = row[2]
+
+            if className == 'srvReq':
+                    # save the initialization block in a way we can find it given the 
+                    # cmpPtnInst name and the function label
+                    if cmpPtnName not in initClassDict:
+                       initClassDict[cmpPtnName] = {}
+
+                    if len(row[1]) > 0:
+                        # first time creates the class
+                        initClassDict[cmpPtnName][funcLabel] = SrvReq(row)
                             
-                elif className == 'srvRsp': 
-                        if cmpPtnName not in initClassDict:
-                           initClassDict[cmpPtnName] = {}
-
-                        # srvRsp carries a map so we treat its initialization differently
-                        if len(row[1]) > 0:
-                            # first time creates the class
-                            initClassDict[cmpPtnName][funcLabel] = SrvRsp(row)
-
-                        if len(row[srvRspTCIdx]) > 0:    
-                            tcIdx = srvRspTCIdx
-                            # after the first row we'll still have srvRspVar from the previous row 
-                            initClassDict[cmpPtnName][funcLabel].addTimingCode(row[tcIdx], row[tcIdx+1])
+            elif className == 'srvRsp': 
+                    if cmpPtnName not in initClassDict:
+                       initClassDict[cmpPtnName] = {}
+
+                    # srvRsp carries a map so we treat its initialization differently
+                    if len(row[1]) > 0:
+                        # first time creates the class
+                        initClassDict[cmpPtnName][funcLabel] = SrvRsp(row)
+
+                    if len(row[srvRspTCIdx]) > 0:    
+                        tcIdx = srvRspTCIdx
+                        # after the first row we'll still have srvRspVar from the previous row 
+                        initClassDict[cmpPtnName][funcLabel].addTimingCode(row[tcIdx], row[tcIdx+1])
                       
-                        if len(row[srvRspDirectIdx]) > 0: 
-                            dpIdx = srvRspDirectIdx
-                            initClassDict[cmpPtnName][funcLabel].addDirectPrefix(row[dpIdx])
+                    if len(row[srvRspDirectIdx]) > 0: 
+                        dpIdx = srvRspDirectIdx
+                        initClassDict[cmpPtnName][funcLabel].addDirectPrefix(row[dpIdx])
 
-                elif className == 'processPckt': 
-                        if cmpPtnName not in initClassDict:
-                           initClassDict[cmpPtnName] = {}
+            elif className == 'processPckt': 
+                    if cmpPtnName not in initClassDict:
+                       initClassDict[cmpPtnName] = {}
 
-                        if len(row[1]) > 0:
-                            initClassDict[cmpPtnName][funcLabel] = ProcessPckt(row)
+                    if len(row[1]) > 0:
+                        initClassDict[cmpPtnName][funcLabel] = ProcessPckt(row)
 
-                        if len(row[3]) > 0:
-                            initClassDict[cmpPtnName][funcLabel].addTimingCode(row[3], row[4])
+                    if len(row[3]) > 0:
+                        initClassDict[cmpPtnName][funcLabel].addTimingCode(row[3], row[4])
 
-                elif className == 'transfer': 
-                        if cmpPtnName not in initClassDict:
-                           initClassDict[cmpPtnName] = {}
+            elif className == 'transfer': 
+                    if cmpPtnName not in initClassDict:
+                       initClassDict[cmpPtnName] = {}
 
-                        if len(row[1]) > 0:
-                            initClassDict[cmpPtnName][funcLabel] = Transfer(row)
+                    if len(row[1]) > 0:
+                        initClassDict[cmpPtnName][funcLabel] = Transfer(row)
                     
-                elif className == 'measure': 
-                        if cmpPtnName not in initClassDict:
-                           initClassDict[cmpPtnName] = {}
+            elif className == 'measure': 
+                    if cmpPtnName not in initClassDict:
+                       initClassDict[cmpPtnName] = {}
 
-                        initClassDict[cmpPtnName][funcLabel] = Measure(row)
+                    initClassDict[cmpPtnName][funcLabel] = Measure(row)
                     
-                elif className == 'start': 
-                        if cmpPtnName not in initClassDict:
-                           initClassDict[cmpPtnName] = {}
-                        initClassDict[cmpPtnName][funcLabel] = Start(row)
-
-                elif className == 'feed': 
-                        if cmpPtnName not in initClassDict:
-                           initClassDict[cmpPtnName] = {}
-                        initClassDict[cmpPtnName][funcLabel] = Feed(row)
-
-                elif className == 'finish': 
-                        if cmpPtnName not in initClassDict:
-                           initClassDict[cmpPtnName] = {}
-                        initClassDict[cmpPtnName][funcLabel] = Finish(row)
-
-                elif className == 'streamsrc':
-                        if cmpPtnName not in initClassDict:
-                           initClassDict[cmpPtnName] = {}
-                        initClassDict[cmpPtnName][funcLabel] = StreamSrc(row)
-
-                elif className == 'streamdst':
-                        if cmpPtnName not in initClassDict:
-                           initClassDict[cmpPtnName] = {}
-                        initClassDict[cmpPtnName][funcLabel] = StreamDst(row)
-
-                if className in Msg2MCIdx:
-                    ridx = Msg2MCIdx[className]      
-                    if len(row[ridx]) > 0:
-                        initClassDict[cmpPtnName][funcLabel].addMsg2MC(row[ridx], row[ridx+1])
-
-                if className in Msg2MsgIdx:
-                    ridx = Msg2MsgIdx[className]
-                    if len(row[ridx]) > 0:
-                        initClassDict[cmpPtnName][funcLabel].addMsg2Msg(row[ridx], row[ridx+1])
-
-                if className in GroupsIdx:
-                    ridx = GroupsIdx[className]
-                    if ridx <= len(row)-1 and len(row[ridx]) > 0: 
-                        initClassDict[cmpPtnName][funcLabel].addGroup(row[ridx])
-                continue
+            elif className == 'start': 
+                    if cmpPtnName not in initClassDict:
+                       initClassDict[cmpPtnName] = {}
+                    initClassDict[cmpPtnName][funcLabel] = Start(row)
+
+            elif className == 'feed': 
+                    if cmpPtnName not in initClassDict:
+                       initClassDict[cmpPtnName] = {}
+                    initClassDict[cmpPtnName][funcLabel] = Feed(row)
+
+            elif className == 'finish': 
+                    if cmpPtnName not in initClassDict:
+                       initClassDict[cmpPtnName] = {}
+                    initClassDict[cmpPtnName][funcLabel] = Finish(row)
+
+            elif className == 'streamsrc':
+                    if cmpPtnName not in initClassDict:
+                       initClassDict[cmpPtnName] = {}
+                    initClassDict[cmpPtnName][funcLabel] = StreamSrc(row)
+
+            elif className == 'streamdst':
+                    if cmpPtnName not in initClassDict:
+                       initClassDict[cmpPtnName] = {}
+                    initClassDict[cmpPtnName][funcLabel] = StreamDst(row)
+
+            if className in Msg2MCIdx:
+                ridx = Msg2MCIdx[className]      
+                if len(row[ridx]) > 0:
+                    initClassDict[cmpPtnName][funcLabel].addMsg2MC(row[ridx], row[ridx+1])
+
+            if className in Msg2MsgIdx:
+                ridx = Msg2MsgIdx[className]
+                if len(row[ridx]) > 0:
+                    initClassDict[cmpPtnName][funcLabel].addMsg2Msg(row[ridx], row[ridx+1])
+
+            if className in GroupsIdx:
+                ridx = GroupsIdx[className]
+                if ridx <= len(row)-1 and len(row[ridx]) > 0: 
+                    initClassDict[cmpPtnName][funcLabel].addGroup(row[ridx])
+            continue
 
     valid, msg = validateConnections()
     if not valid:
@@ -1865,6 +1872,19 @@ def main():
     with open(tcDesc_output_file, 'w') as wf:
         json.dump(timingCodeList, wf)
 
+def main():
+    cmdline = sys.argv[1:]
+    if len(sys.argv) == 3 and sys.argv[1] == "-is":
+        cmdline = []
+        with open(sys.argv[2],"r") as rf:
+            for line in rf:
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                cmdline.extend(line.split()) 
+
+    convert(parseArgs(cmdline))
+
 if __name__ == '__main__':
     main()
 
@@ -6,6 +6,16 @@ import yaml
 import json
 import argparse
 
+# descDir files read and written, and yamlDir files written, given by
+# argument dest or by fixed file name
+descInputs = ()
+descOutputs = ('cpuOpsDesc_output', 'modelDesc_output')
+yamlOutputs = ('funcExec_output', 'devExec_output')
+
+# rows of the csv input, set by runConvert.py when it passes the sheet in memory
+# rather than as a file in csvDir
+csvRows = None
+
 # globals
 cryptoOps = ('encrypt', 'decrypt', 'hash', 'sign')
 cryptoAlgs = ('aes', 'rc6')
@@ -217,9 +227,15 @@ def directoryAccessible(path):
     else:   
         return True
 
-def main():
-    global validateFlag
+def readCsvInput(csv_input_file):
+    """Returns the rows of the csv input, those in csvRows if runConvert.py set it"""
+    if csvRows is not None:
+        return csvRows
 
+    with open(csv_input_file, newline='') as rf:
+        return list(csv.reader(rf))
+
+def parseArgs(cmdline):
     parser = argparse.ArgumentParser()
     parser.add_argument(u'-name', metavar = u'name of system', dest=u'name', required=True)
     parser.add_argument(u'-validate', action='store_true', required=False)
@@ -243,17 +259,10 @@ def main():
     # output in the format of cp.yaml
     parser.add_argument(u'-devExecOut', metavar = u'output devExec name', dest=u'devExec_output', required=True)
 
-    cmdline = sys.argv[1:]
-    if len(sys.argv) == 3 and sys.argv[1] == "-is":
-        cmdline = []
-        with open(sys.argv[2],"r") as rf:
-            for line in rf:
-                line = line.strip()
-                if len(line) == 0 or line.startswith('#'):
-                    continue
-                cmdline.extend(line.split()) 
+    return parser.parse_args(cmdline)
 
-    args = parser.parse_args(cmdline)
+def convert(args):
+    global validateFlag
 
     csvDir = args.csvDir
     yamlDir = args.yamlDir
@@ -289,79 +298,78 @@ def main():
 
     sysname = args.name
 
-    if not os.path.isfile(csv_input_file):
+    if csvRows is None and not os.path.isfile(csv_input_file):
         print("unable to open csv input file", csv_input_file)
         exit(0)
 
     msgs = []
-    with open(csv_input_file, newline='') as rf:
-        csvrdr = csv.reader(rf)
-        for raw in csvrdr:
-            row = []
-            for v in raw:
-                #row.append(''.join(v.split()))
-                row.append(v.strip())
-
-            if comment(row[0]):
-                continue
-
-            if empty(row):
-                continue
-
-            if unnamed(row):
-                continue
-
-            row = cleanRow(row)
-
-            if row[0].find("CPU") > -1 and row[0].find('Entries') > 0:
-                cpuEntries = True
-                maxCols = 4
-                accelEntries = False
-                routerEntries = False
-                switchEntries = False
-                continue
+    csvrdr = readCsvInput(csv_input_file)
+    for raw in csvrdr:
+        row = []
+        for v in raw:
+            #row.append(''.join(v.split()))
+            row.append(v.strip())
+
+        if comment(row[0]):
+            continue
+
+        if empty(row):
+            continue
+
+        if unnamed(row):
+            continue
+
+        row = cleanRow(row)
+
+        if row[0].find("CPU") > -1 and row[0].find('Entries') > 0:
+            cpuEntries = True
+            maxCols = 4
+            accelEntries = False
+            routerEntries = False
+            switchEntries = False
+            continue
                
-            if row[0].find("Accel") > -1 and row[0].find('Entries') > 0:
-                cpuEntries = False
-                accelEntries = True
-                maxCols = 4
-                routerEntries = False
-                switchEntries = False
-                continue
+        if row[0].find("Accel") > -1 and row[0].find('Entries') > 0:
+            cpuEntries = False
+            accelEntries = True
+            maxCols = 4
+            routerEntries = False
+            switchEntries = False
+            continue
                
-            if row[0].find("Router") > -1 and row[0].find('Entries') > 0:
-                cpuEntries = False
-                accelEntries = False
-                routerEntries = True
-                maxCols = 5
-                switchEntries = False
-                continue
+        if row[0].find("Router") > -1 and row[0].find('Entries') > 0:
+            cpuEntries = False
+            accelEntries = False
+            routerEntries = True
+            maxCols = 5
+            switchEntries = False
+            continue
                
-            if row[0].find("Switch") > -1 and row[0].find('Entries') > 0:
-                cpuEntries = False
-                accelEntries = False
-                routerEntries = False
-                switchEntries = True
-                maxCols = 5
-                continue
+        if row[0].find("Switch") > -1 and row[0].find('Entries') > 0:
+            cpuEntries = False
+            accelEntries = False
+            routerEntries = False
+            switchEntries = True
+            maxCols = 5
+            continue
 
-            row = row[:maxCols]
+        row = row[:maxCols]
 
-            if cpuEntries: 
-                execTimeList.append(ExecTimeEntry('CPU', row))
-                continue
+        if cpuEntries: 
+            execTimeList.append(ExecTimeEntry('CPU', row))
+            continue
 
-            if accelEntries: 
-                execTimeList.append(ExecTimeEntry('Accelerator', row))
-                continue
+        if accelEntries: 
+            execTimeList.append(ExecTimeEntry('Accelerator', row))
+            continue
 
-            if routerEntries:
-                devOpTimeList.append(DevOpTimeEntry('Router', row))
-                continue
+        if routerEntries:
+            devOpTimeList.append(DevOpTimeEntry('Router', row))
+            continue
 
-            if switchEntries:
-                devOpTimeList.append(DevOpTimeEntry('Switch', row))
-                continue
+        if switchEntries:
+            devOpTimeList.append(DevOpTimeEntry('Switch', row))
+            continue
 
     for entry in execTimeList:
         valid, msg = entry.validate()
@@ -445,6 +453,19 @@ def main():
         json.dump(modelDict, wf)
 
 
+def main():
+    cmdline = sys.argv[1:]
+    if len(sys.argv) == 3 and sys.argv[1] == "-is":
+        cmdline = []
+        with open(sys.argv[2],"r") as rf:
+            for line in rf:
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                cmdline.extend(line.split()) 
+
+    convert(parseArgs(cmdline))
+
 if __name__ == "__main__":
 	main()
 
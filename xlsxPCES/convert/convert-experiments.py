@@ -5,6 +5,21 @@ import pdb
 import yaml
 import json
 import argparse
+import hashlib
+import itertools
+import random
+import ast
+import re
+
+# descDir files read and written, and yamlDir files written, given by
+# argument dest or by fixed file name
+descInputs = ()
+descOutputs = ('exprmnt.json',)
+yamlOutputs = ('experiments',)
+
+# rows of the csv input, set by runConvert.py when it passes the sheet in memory
+# rather than as a file in csvDir
+csvRows = None
 
 # globals
 cryptoOps = ('encrypt', 'decrypt', 'hash', 'sign')
@@ -15,8 +30,32 @@ cryptoAEModes = ('CCM', 'GCM', 'CWC', 'EAX', 'IAPM', 'OCB')
 expNameIdx = 0
 variableName = []
 
+# the derived variables, by variable, in the order they are to be worked out
+derivedVariables = {}
+
 sheetNames = ('topo', 'cp', 'exec', 'mapping', 'netParams', 'ipmap')
 
+# experiments are written to the yaml file this many at a time, by libyaml if it is there
+dumpBatch = 1000
+Dumper = getattr(yaml, 'CDumper', yaml.Dumper)
+
+# the name cell of a row describing a sweep of experiments rather than a single one,
+# sweep(<name prefix>) or lhs(<name prefix>, <samples>, <seed>)
+sweepNamePattern = re.compile(r'^(sweep|lhs)\((.*)\)$')
+
+# a cell of a sweep row giving the values of a dimension, optionally labelled with the
+# group of cells whose values are zipped together rather than combined
+sweepCellPattern = re.compile(r'^(?:(\w+):)?(range|list|uniform)\((.*)\)$')
+numberPattern = re.compile(r'^[-+]?(\d+\.?\d*|\.\d+)$')
+
+# a symbol within the expression of a derived variable
+symbolPattern = re.compile(r'[$@](\w+)')
+
+# the functions the expression of a derived variable may call, by name, as the names of
+# the numpy functions that apply them to all the experiments' values at once
+derivedFuncs = {'exp': 'exp', 'log': 'log', 'log10': 'log10', 'sqrt': 'sqrt', 'abs': 'abs',
+    'floor': 'floor', 'ceil': 'ceil', 'round': 'round', 'min': 'minimum', 'max': 'maximum'}
+
 def cnvrtBool(v):
     if isinstance(v,int) and (v==0 or v==1):
         return v
@@ -33,11 +72,22 @@ class ExperimentEntry:
     def __init__(self, row):
         self.name = row[expNameIdx]
         self.variableDict = {}
+
+        # cells of derived variables the row gives values to
+        self.overridden = []
         for idx in range(1,len(variableName)+1):
-            self.variableDict[ variableName[idx-1] ] = cnvrtBool("".join(row[idx].split()))
+            value = cnvrtBool("".join(row[idx].split()))
+            if variableName[idx-1] in derivedVariables:
+                if len(row[idx].strip()) > 0:
+                    self.overridden.append(variableName[idx-1])
+                value = None
+            self.variableDict[ variableName[idx-1] ] = value
 
     def validate(self):
         msgs = []
+        for variable in self.overridden:
+            msgs.append('experiment {} gives a value to derived variable {}'.format(self.name, variable))
+
         # ensure that every sheet referenced is recognized
         for variable in self.variableDict:
             if not isinstance(variable, str):
@@ -54,22 +104,11 @@ class ExperimentEntry:
             return False, '\n'.join(msgs)
         return True, ""
 
-    def equals(self, ee):
-    
-        for key, value in self.variableDict.items(): 
-            if key not in ee.variableDict:
-                return False
-            if value != ee.variableDict[key]:
-                return False
-
-        for key, value in ee.variableDict.items(): 
-            if key not in self.variableDict:
-                return False
-            if value != self.variableDict[key]:
-                return False
-
-        return True
-
+    def digest(self):
+        """Returns a hash of the experiment's variables and their values, the same for
+        experiments that are identical"""
+        items = sorted((key, type(value).__name__, value) for key, value in self.variableDict.items())
+        return hashlib.blake2b(repr(items).encode(), digest_size=16).digest()
 
     def repDict(self):
         rd = {'name': self.name}
@@ -78,6 +117,341 @@ class ExperimentEntry:
 
         return rd
 
+class ValueColumn:
+    """The values a variable of the experiments sheet takes, in the order of the experiments.
+    Each distinct value is kept once, in the order first given, and the experiments' values
+    as runs [start, step, count] of indices into them, start, start+step, ... for count
+    experiments.  A variable held at one value, or stepped through new values, from one
+    experiment to the next is then described in little space."""
+    def __init__(self, variable):
+        self.variable = variable
+        keylist = variable.split(',')
+        self.symbol = keylist[0]
+        if len(keylist) > 1:
+            self.sheets = keylist[1:]
+        else:
+            self.sheets = list(sheetNames)
+
+        self.values = []
+        self.valueIdx = {}
+        self.runs = []
+
+    def add(self, value):
+        key = (type(value).__name__, value)
+        if key not in self.valueIdx:
+            self.valueIdx[key] = len(self.values)
+            self.values.append(value)
+        idx = self.valueIdx[key]
+
+        if len(self.runs) > 0:
+            run = self.runs[-1]
+            if run[2] == 1:
+                run[1] = idx - run[0]
+            if idx == run[0] + run[1]*run[2]:
+                run[2] += 1
+                return
+        self.runs.append([idx, 0, 1])
+
+    def repDict(self):
+        return {'variable': self.variable, 'symbol': self.symbol, 'sheets': self.sheets, 
+            'values': self.values, 'runs': self.runs}
+
+
+class Derived:
+    """A variable of the experiments sheet whose values are worked out from those of other
+    variables, its heading cell being <variable>=<expression>, e.g. $svcTime,cp=1/$Lambda*0.8.
+    The expression is made of numbers, the symbols of other variables, the operators
+    + - * / // % **, parentheses and calls of the functions in derivedFuncs.  It is
+    evaluated for many experiments at once, on numpy arrays of the values they give the 
+    variables it uses."""
+    def __init__(self, variable, text):
+        self.variable = variable
+        self.symbol = variable.split(',')[0]
+        self.text = text
+        self.msgs = []
+
+        # the symbols the expression uses, by the name they are given in it
+        self.names = {}
+        def rename(match):
+            name = '_' + match.group(1)
+            self.names[name] = match.group(0)
+            return name
+
+        self.tree = None
+        try:
+            self.tree = ast.parse(symbolPattern.sub(rename, text), mode='eval').body
+        except SyntaxError:
+            self.msgs.append('derived variable {} has expression "{}" which is not well formed'.format(variable, text))
+            return
+
+        for node in ast.walk(self.tree):
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in derivedFuncs or len(node.keywords) > 0:
+                    self.msgs.append('derived variable {} calls a function other than {}'.format(variable, 
+                        ', '.join(derivedFuncs)))
+                    break
+            elif isinstance(node, ast.Name):
+                if node.id not in self.names and node.id not in derivedFuncs:
+                    self.msgs.append('derived variable {} uses "{}" which is not a variable'.format(variable, node.id))
+                    break
+            elif isinstance(node, ast.Constant):
+                if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+                    self.msgs.append('derived variable {} uses "{}" which is not a number'.format(variable, node.value))
+                    break
+            elif not isinstance(node, (ast.BinOp, ast.UnaryOp, ast.Load, ast.Add, ast.Sub, ast.Mult, ast.Div,
+                    ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd)):
+                self.msgs.append('derived variable {} has expression "{}" with something other than numbers, variables, arithmetic and {}'.format(
+                    variable, text, ', '.join(derivedFuncs)))
+                break
+
+    def symbols(self):
+        return list(dict.fromkeys(self.names.values()))
+
+    def evaluate(self, np, arrays):
+        """Returns the values of the variable, given arrays mapping the symbols it uses
+        to arrays of their values"""
+        return self.evalNode(np, self.tree, arrays)
+
+    def evalNode(self, np, node, arrays):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            return arrays[self.names[node.id]]
+        if isinstance(node, ast.UnaryOp):
+            operand = self.evalNode(np, node.operand, arrays)
+            return -operand if isinstance(node.op, ast.USub) else operand
+        if isinstance(node, ast.Call):
+            args = [self.evalNode(np, arg, arrays) for arg in node.args]
+            return getattr(np, derivedFuncs[node.func.id])(*args)
+
+        left = self.evalNode(np, node.left, arrays)
+        right = self.evalNode(np, node.right, arrays)
+        if isinstance(node.op, ast.Add):
+            return left + right
+        if isinstance(node.op, ast.Sub):
+            return left - right
+        if isinstance(node.op, ast.Mult):
+            return left * right
+        if isinstance(node.op, ast.Div):
+            return np.true_divide(left, right)
+        if isinstance(node.op, ast.FloorDiv):
+            return np.floor_divide(left, right)
+        if isinstance(node.op, ast.Mod):
+            return np.mod(left, right)
+        return np.power(left, right)
+
+def orderDerived(derived):
+    """Returns the derived variables in an order in which each follows the derived variables
+    it uses, and a list of problems with them: symbols that name no variable, and cycles"""
+    msgs = []
+    bySymbol = {}
+    for variable in variableName:
+        bySymbol[variable.split(',')[0]] = variable
+
+    for entry in derived.values():
+        msgs.extend(entry.msgs)
+        for symbol in entry.symbols():
+            if symbol not in bySymbol:
+                msgs.append('derived variable {} uses {} which is not a variable of the sheet'.format(entry.variable, symbol))
+    if len(msgs) > 0:
+        return [], msgs
+
+    order = []
+    state = {}
+    def visit(entry, path):
+        if state.get(entry.variable) == 'done':
+            return True
+        if state.get(entry.variable) == 'visiting':
+            msgs.append('derived variables {} depend on each other'.format(', '.join(path + [entry.variable])))
+            return False
+        state[entry.variable] = 'visiting'
+        for symbol in entry.symbols():
+            used = derived.get(bySymbol[symbol])
+            if used is not None and not visit(used, path + [entry.variable]):
+                return False
+        state[entry.variable] = 'done'
+        order.append(entry)
+        return True
+
+    for entry in derived.values():
+        if not visit(entry, []):
+            break
+    return order, msgs
+
+def deriveValues(batch, msgs):
+    """Works out the values of the derived variables for a batch of experiments, setting
+    them in the experiments' variableDicts as the text of the numbers.  Problems, such as
+    a variable used having a value that is not a number, are added to msgs."""
+    if len(derivedVariables) == 0:
+        return
+
+    try:
+        import numpy as np
+    except ImportError:
+        msgs.append('derived variables need the numpy package')
+        return
+
+    bySymbol = {}
+    for variable in variableName:
+        bySymbol[variable.split(',')[0]] = variable
+
+    arrays = {}
+    with np.errstate(all='ignore'):
+        for entry in derivedVariables.values():
+            for symbol in entry.symbols():
+                if symbol in arrays:
+                    continue
+                values = [exprmnt.variableDict[bySymbol[symbol]] for exprmnt in batch]
+                try:
+                    arrays[symbol] = np.array(values, dtype=float)
+                except ValueError:
+                    for exprmnt, value in zip(batch, values):
+                        try:
+                            float(value)
+                        except ValueError:
+                            msgs.append('experiment {} gives {} value "{}", which derived variable {} needs to be a number'.format(
+                                exprmnt.name, symbol, value, entry.variable))
+                    return
+
+            values = np.broadcast_to(np.asarray(entry.evaluate(np, arrays), dtype=float), (len(batch),))
+            arrays[entry.symbol] = values
+            bad = np.flatnonzero(~np.isfinite(values))
+            for idx in bad:
+                msgs.append('derived variable {} has no finite value in experiment {}'.format(entry.variable, batch[idx].name))
+            if len(bad) > 0:
+                return
+
+            texts = np.char.mod('%.12g', values)
+            for exprmnt, text in zip(batch, texts.tolist()):
+                exprmnt.variableDict[entry.variable] = text
+
+class Sweep:
+    """A row of the experiments sheet describing many experiments at once.  The name cell
+    is sweep(<prefix>), for every combination of the values of the row's dimensions, or 
+    lhs(<prefix>, <samples>, <seed>), for a Latin hypercube sample of them.  The other
+    cells hold a value every experiment is given, or the values of a dimension, 
+        range(<start>, <stop>, <step>)   start, start+step, ... up to and including stop
+        list(<value>, <value>, ...)      the values listed
+        uniform(<low>, <high>)           values drawn from between low and high (lhs only)
+    and cells labelled with the same group, as in a:range(1,4,1) and a:list(x,y,z), are
+    zipped, taking their values in step with each other.  The experiments are named by
+    the prefix followed by their number in the sweep, counting from 1."""
+    def __init__(self, row):
+        self.row = row
+        self.msgs = []
+
+        match = sweepNamePattern.match("".join(row[expNameIdx].split()))
+        self.kind = match.group(1)
+        params = match.group(2).split(',')
+        self.prefix = params[0]
+        self.samples = 0
+        self.seed = None
+        if self.kind == 'sweep' and len(params) != 1:
+            self.msgs.append('sweep "{}" needs just a name prefix'.format(row[expNameIdx]))
+        elif self.kind == 'lhs':
+            if len(params) != 3 or not params[1].isdigit() or int(params[1]) == 0 or not re.match(r'^-?\d+$', params[2]):
+                self.msgs.append('sweep "{}" needs a name prefix, a number of samples and an integer seed'.format(
+                    row[expNameIdx]))
+            else:
+                self.samples = int(params[1])
+                self.seed = int(params[2])
+
+        # the dimensions, each a list of the indices of the cells it gives values to and
+        # a list of the values of each of those cells
+        self.dims = []
+        groups = {}
+        for idx in range(1, len(row)):
+            cell = "".join(row[idx].split())
+            match = sweepCellPattern.match(cell)
+            if match is None:
+                continue
+            group, func, args = match.groups()
+            values = self.cellValues(cell, func, args.split(','))
+            if values is None:
+                continue
+
+            if group is None or group not in groups:
+                dim = ([], [])
+                self.dims.append(dim)
+                if group is not None:
+                    groups[group] = dim
+            else:
+                dim = groups[group]
+                if len(values) != len(dim[1][0]):
+                    self.msgs.append('cell "{}" of sweep "{}" has {} values where the others of group {} have {}'.format(
+                        cell, row[expNameIdx], len(values), group, len(dim[1][0])))
+                    continue
+            dim[0].append(idx)
+            dim[1].append(values)
+
+    def cellValues(self, cell, func, args):
+        """Returns the values of a dimension cell, a list of strings, or a (low, high) pair
+        for uniform().  Returns None if the cell is not well formed."""
+        if func == 'list':
+            if len(args) == 0 or any(len(arg) == 0 for arg in args):
+                self.msgs.append('cell "{}" of sweep "{}" lists an empty value'.format(cell, self.row[expNameIdx]))
+                return None
+            return args
+
+        if not all(numberPattern.match(arg) for arg in args):
+            self.msgs.append('cell "{}" of sweep "{}" needs numbers'.format(cell, self.row[expNameIdx]))
+            return None
+
+        if func == 'uniform':
+            if len(args) != 2 or self.kind != 'lhs':
+                self.msgs.append('cell "{}" of sweep "{}" needs to be uniform(<low>,<high>) in an lhs sweep'.format(
+                    cell, self.row[expNameIdx]))
+                return None
+            return (float(args[0]), float(args[1]))
+
+        if len(args) != 3 or float(args[2]) == 0:
+            self.msgs.append('cell "{}" of sweep "{}" needs to be range(<start>,<stop>,<step>) with a non-zero step'.format(
+                cell, self.row[expNameIdx]))
+            return None
+        return rangeValues(*args)
+
+    def rows(self):
+        """Generator giving the rows of the experiments of the sweep, one at a time"""
+        if self.kind == 'sweep':
+            combos = itertools.product(*[range(len(dim[1][0])) for dim in self.dims])
+        else:
+            combos = self.hypercube()
+
+        for num, combo in enumerate(combos):
+            row = list(self.row)
+            row[expNameIdx] = self.prefix + str(num+1)
+            for (cells, cellValues), pick in zip(self.dims, combo):
+                for idx, values in zip(cells, cellValues):
+                    if isinstance(values, tuple):
+                        row[idx] = '{:.6g}'.format(values[0] + pick*(values[1]-values[0]))
+                    elif isinstance(pick, float):
+                        row[idx] = values[min(int(pick*len(values)), len(values)-1)]
+                    else:
+                        row[idx] = values[pick]
+            yield row
+
+    def hypercube(self):
+        """Generator giving, for each sample, the position of each dimension within its
+        values as a fraction, each dimension's range cut into as many strata as there
+        are samples and each stratum sampled exactly once"""
+        rng = random.Random(self.seed)
+        strata = []
+        for dim in self.dims:
+            order = list(range(self.samples))
+            rng.shuffle(order)
+            strata.append(order)
+
+        for sample in range(self.samples):
+            yield tuple((order[sample] + rng.random())/self.samples for order in strata)
+
+def rangeValues(start, stop, step):
+    """Returns the texts of the values of range(start, stop, step), stop included, 
+    integers if start and step are and otherwise with as many decimals as they have"""
+    decimals = max([len(arg.split('.')[1]) if '.' in arg else 0 for arg in (start, step)])
+    begin, end, delta = float(start), float(stop), float(step)
+    count = int((end - begin)/delta + 1e-9) + 1 if (end - begin)*delta >= 0 else 0
+    return ['{:.{}f}'.format(begin + k*delta, decimals) for k in range(count)]
+
 def isCrypto(code):
     if code.find('-') == -1:
         return False
@@ -112,16 +486,13 @@ def unnamed(row):
 def print_err(*a):
     print(*a, file=sys.stderr)
 
-# make sure no two experiments are identical
-def validateUniqueness(exprmntList):
-    msgs = []
-    for idx in range(0, len(exprmntList)-1):
-        for jdx in range(idx+1, len(exprmntList)):
-            if exprmntList[idx].equals(exprmntList[jdx]):
-                msg = 'Duplicated experiment {}'.format(exprmntList[idx].name)
-                msgs.append(msg)
-    if len(msgs) > 0:
-        return False, '\n'.join(msgs)
+# make sure no two experiments are identical.  seen maps the digest of each experiment
+# already checked to its name
+def validateUniqueness(exprmnt, seen):
+    digest = exprmnt.digest()
+    if digest in seen:
+        return False, 'Duplicated experiment "{}" is the same as experiment "{}"'.format(exprmnt.name, seen[digest])
+    seen[digest] = exprmnt.name
     return True, ""
         
 
@@ -142,8 +513,15 @@ def directoryAccessible(path):
     else:   
         return True
 
-def main():
-    global variableName
+def readCsvInput(csv_input_file):
+    """Returns the rows of the csv input, those in csvRows if runConvert.py set it"""
+    if csvRows is not None:
+        return csvRows
+
+    with open(csv_input_file, newline='') as rf:
+        return list(csv.reader(rf))
+
+def parseArgs(cmdline):
     parser = argparse.ArgumentParser()
     parser.add_argument(u'-name', metavar = u'name of system', dest=u'name', required=True)
     parser.add_argument(u'-validate', action='store_true', required=False)
@@ -157,17 +535,10 @@ def main():
     parser.add_argument(u'-experiments', metavar = u'output file with list of experiment descriptions ', 
             dest=u'experiments', required=True)
 
-    cmdline = sys.argv[1:]
-    if len(sys.argv) == 3 and sys.argv[1] == "-is":
-        cmdline = []
-        with open(sys.argv[2],"r") as rf:
-            for line in rf:
-                line = line.strip()
-                if len(line) == 0 or line.startswith('#'):
-                    continue
-                cmdline.extend(line.split()) 
+    return parser.parse_args(cmdline)
 
-    args = parser.parse_args(cmdline)
+def convert(args):
+    global variableName
 
     csvDir = args.csvDir
     yamlDir = args.yamlDir
@@ -194,103 +565,145 @@ def main():
 
     sysname = args.name
 
-    if not os.path.isfile(csv_input_file):
+    if csvRows is None and not os.path.isfile(csv_input_file):
         print("unable to open csv input file", csv_input_file)
         exit(0)
 
-    experiments = []
-
-    with open(csv_input_file, newline='') as rf:
-        csvrdr = csv.reader(rf)
-        for raw in csvrdr:
-            row = []
-            for v in raw:
-                row.append(v.strip())
+    # the experiments are validated and written as they are read, so that a sweep of
+    # many experiments is never held in memory all at once
+    msgs = []
+    duplicates = []
+    seen = {}
+    columns = {}
+    names = []
+    batch = []
+    partial_output_file = experiment_output_file+'.partial'
+    with open(partial_output_file, 'w') as wf:
+        for exprmnt in readExperiments(readCsvInput(csv_input_file), msgs):
+            valid, msg = exprmnt.validate()
+            if not valid:
+                msgs.append(msg)
+                continue
 
-            if empty(row):
+            valid, msg = validateUniqueness(exprmnt, seen)
+            if not valid:
+                duplicates.append(msg)
                 continue
 
-            if unnamed(row):
+            if len(msgs) > 0 or len(duplicates) > 0:
                 continue
 
-            row = cleanRow(row)
-            if row[0].startswith('###') and row[0].find('END') > -1: 
-                break
+            batch.append(exprmnt)
+            if len(batch) == dumpBatch:
+                writeBatch(batch, columns, names, wf, msgs)
+                batch = []
 
-            if row[0] == 'Experiments':
-                continue 
+        if len(batch) > 0 and len(msgs) == 0 and len(duplicates) == 0:
+            writeBatch(batch, columns, names, wf, msgs)
+        if len(names) == 0:
+            yaml.dump([], wf, default_flow_style=False)
 
-            variablesRow = (row[0].find('###') > -1) or (row[0].find('name') > -1)
+    if len(msgs) > 0 or len(duplicates) > 0:
+        os.remove(partial_output_file)
+        for msg in (msgs if len(msgs) > 0 else duplicates):
+            print(msg)
+        exit(0)
 
-            if variablesRow:
-                for idx in range(1, len(row)):
-                    if len(row[idx]) > 0:
-                        variableName.append("".join(row[idx].split()))
-                    else:
-                        break
+    # the description gives the experiments' names and, column by column, the values
+    # they give the variables
+    exprmntDesc = {'experiments': len(names), 'names': names, 
+        'columns': [column.repDict() for column in columns.values()]}
+    with open(symbol_desc_output_file, 'w') as wf:
+        json.dump(exprmntDesc, wf) 
 
-                maxCols = len(variableName)+1
+    os.replace(partial_output_file, experiment_output_file)
 
-                continue
+def writeBatch(batch, columns, names, wf, msgs):
+    """Works out the derived variables of a batch of experiments and writes the experiments,
+    adding the values they give the variables to the columns, a dictionary mapping each
+    variable to its ValueColumn, and their names to names.  Nothing is written if
+    a problem is added to msgs."""
+    deriveValues(batch, msgs)
+    if len(msgs) > 0:
+        return
+
+    # make a description of the values each variable is given, column by column
+    for exprmnt in batch:
+        for variable, value in exprmnt.variableDict.items():
+            if variable not in columns:
+                columns[variable] = ValueColumn(variable)
+            columns[variable].add(value)
+        names.append(exprmnt.name)
+
+    yaml.dump([exprmnt.repDict() for exprmnt in batch], wf, default_flow_style=False, Dumper=Dumper)
+
+def readExperiments(csvrdr, msgs):
+    """Generator giving an ExperimentEntry for each experiment row of the sheet, in order,
+    setting variableName from the row naming the variables.  The experiments of a sweep
+    (see Sweep) are made as they are reached.  Problems with the sweeps are added to msgs."""
+    maxCols = 0
+    for raw in csvrdr:
+        row = []
+        for v in raw:
+            row.append(v.strip())
+
+        if empty(row):
+            continue
 
-            if comment(row[0]):
-                continue
-  
-            if maxCols > 0:
-                row = row[:maxCols]            
+        if unnamed(row):
+            continue
+
+        row = cleanRow(row)
+        if row[0].startswith('###') and row[0].find('END') > -1: 
+            break
+
+        if row[0] == 'Experiments':
+            continue 
+
+        isSweep = sweepNamePattern.match("".join(row[expNameIdx].split())) is not None
+        variablesRow = not isSweep and ((row[0].find('###') > -1) or (row[0].find('name') > -1))
+
+        if variablesRow:
+            derived = {}
+            for idx in range(1, len(row)):
+                if len(row[idx]) > 0:
+                    heading = "".join(row[idx].split())
+                    if heading.find('=') > -1:
+                        # a derived variable, <variable>=<expression>
+                        variable, text = heading.split('=', 1)
+                        derived[variable] = Derived(variable, text)
+                        heading = variable
+                    variableName.append(heading)
+                else:
+                    break
+
+            maxCols = len(variableName)+1
+
+            order, problems = orderDerived(derived)
+            if len(problems) > 0:
+                msgs.extend(problems)
+                return
+            for entry in order:
+                derivedVariables[entry.variable] = entry
 
-            experiments.append(ExperimentEntry(row))
             continue
 
-        msgs = []
-        for exprmnt in experiments:
-            valid, msg = exprmnt.validate()
-            if not valid:
-                msgs.append(msg)
-       
-        if len(msgs) > 0:
-            for msg in msgs:
-                print(msg)
-            exit(0)
-
-        valid, msgs = validateUniqueness(experiments)
-        if not valid:
-            msgList = msgs.split('\n')
-            for msg in msgList:
-                print(msg)
-            exit(0) 
-
-        expList = []
-        for exprmnt in experiments:
-            expList.append(exprmnt.repDict())
-
-    # make a description file of a dictionary indexed by sheet name,
-    # with value of dictionary being a dictionary whose keys are the symbols,
-    # with a list of values those symbols are assigned
-    sheetDict = {}
-    for exprmnt in experiments:
-        for symbolKey, value in exprmnt.variableDict.items():
-            keylist = symbolKey.split(',')
-            if len(keylist) > 1:
-                symbol = keylist[0]
-                sheets = keylist[1:]
-            else:
-                symbol = symbolKey
-                sheets = sheetNames
+        if comment(row[0]):
+            continue
+  
+        if maxCols > 0:
+            row = row[:maxCols]            
 
-            for sheet in sheets:
-                if not sheet in sheetDict:
-                    sheetDict[sheet] = {}
-                if symbol not in sheetDict[sheet]:
-                    sheetDict[sheet][symbol] = []
+        if isSweep:
+            sweep = Sweep(row)
+            if len(sweep.msgs) > 0:
+                msgs.extend(sweep.msgs)
+                continue
+            for sweepRow in sweep.rows():
+                yield ExperimentEntry(sweepRow)
+            continue
 
-                sheetDict[sheet][symbol].append(value)
-            
-    with open(symbol_desc_output_file, 'w') as wf:
-        json.dump(sheetDict, wf) 
- 
-    with open(experiment_output_file, 'w') as wf:
-        yaml.dump(expList, wf, default_flow_style=False)
+        yield ExperimentEntry(row)
 
 def cleanRow(row):
     rtn = []
@@ -303,6 +716,19 @@ def cleanRow(row):
 
     return rtn
 
+def main():
+    cmdline = sys.argv[1:]
+    if len(sys.argv) == 3 and sys.argv[1] == "-is":
+        cmdline = []
+        with open(sys.argv[2],"r") as rf:
+            for line in rf:
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                cmdline.extend(line.split()) 
+
+    convert(parseArgs(cmdline))
+
 if __name__ == "__main__":
 	main()
 
@@ -7,6 +7,16 @@ import os
 import argparse
 import ipaddress
 
+# descDir files read and written, and yamlDir files written, given by
+# argument dest or by fixed file name
+descInputs = ('attrbDesc_input',)
+descOutputs = ('feedDescOut',)
+yamlOutputs = ('ip_output',)
+
+# rows of the csv input, set by runConvert.py when it passes the sheet in memory
+# rather than as a file in csvDir
+csvRows = None
+
 # Globals
 validateFlag = False
 
@@ -352,9 +362,15 @@ def directoryAccessible(path):
         return True
  
 
-def main():
-    global validateFlag
+def readCsvInput(csv_input_file):
+    """Returns the rows of the csv input, those in csvRows if runConvert.py set it"""
+    if csvRows is not None:
+        return csvRows
+
+    with open(csv_input_file, newline='') as rf:
+        return list(csv.reader(rf))
 
+def parseArgs(cmdline):
     parser = argparse.ArgumentParser()
     parser.add_argument(u'-name', metavar = u'name of system', dest=u'name', required=True)
     parser.add_argument(u'-validate', action='store_true', required=False)
@@ -378,17 +394,10 @@ def main():
     # output file of mapping table
     parser.add_argument(u'-ip', metavar = u'output file of ip mapping output', dest=u'ip_output', required=True)
 
-    cmdline = sys.argv[1:]
-    if len(sys.argv) == 3 and sys.argv[1] == "-is":
-        cmdline = []
-        with open(sys.argv[2],"r") as rf:
-            for line in rf:
-                line = line.strip()
-                if len(line) == 0 or line.startswith('#'):
-                    continue
-                cmdline.extend(line.split()) 
+    return parser.parse_args(cmdline)
 
-    args = parser.parse_args(cmdline)
+def convert(args):
+    global validateFlag
 
 
     csvDir = args.csvDir
@@ -421,6 +430,9 @@ def main():
     ip_output_file           = os.path.join(yamlDir, args.ip_output)
 
     input_files = (csv_input_file, attrbDescIn_file)
+    if csvRows is not None:
+        # runConvert.py passed the csv input in memory
+        input_files = (attrbDescIn_file,)
 
     errs = 0
     for file_name in input_files:
@@ -460,78 +472,77 @@ def main():
     feedCode    = False
     noneCode    = True
     
-    with open(csv_input_file, newline='') as rf:
-        csvrdr = csv.reader(rf)
-        for raw in csvrdr:
-            row = []
-            for v in raw:
-                row.append(v.strip())
+    csvrdr = readCsvInput(csv_input_file)
+    for raw in csvrdr:
+        row = []
+        for v in raw:
+            row.append(v.strip())
+
+        if noneCode or deviceCode:
+            row = row[:devExtIPIdx+1]
+        elif networkCode: 
+            row = row[:netExtCIDRIdx+1]
+        else:
+            row = row[:feedStartIdx+1]
 
-            if noneCode or deviceCode:
-                row = row[:devExtIPIdx+1]
-            elif networkCode: 
-                row = row[:netExtCIDRIdx+1]
-            else:
-                row = row[:feedStartIdx+1]
+        if row[0].find('#') > -1:
+            continue
 
-            if row[0].find('#') > -1:
-                continue
+        if empty(row):
+            continue
 
-            if empty(row):
-                continue
+        if unnamed(row):
+            continue
 
-            if unnamed(row):
-                continue
+        row = cleanRow(row)
+
+        rowTypes = ["Device", "Network", "Feed"]
+        typeSeen = {"Device": False, "Network": False, "Feed": False}
+
+        codeTransition = False
+        for rowtype in rowTypes:
+            if not typeSeen[rowtype] and rowtype == "Device" and row[0] == rowtype: 
+                deviceCode = True
+                networkCode = False
+                feedCode   = False
+                noneCode = False
+                codeTransition = True
+                typeSeen[rowtype] = True
+                break
+
+            if not typeSeen[rowtype] and rowtype == "Network" and row[0] == rowtype:
+                networkCode = True
+                deviceCode = False
+                feedCode   = False
+                noneCode = False
+                codeTransition = True
+                typeSeen[rowtype] = True
+                break
+
+            if not typeSeen[rowtype] and rowtype == "Feed" and row[0] == rowtype:
+                networkCode = False
+                deviceCode = False
+                feedCode   = True
+                noneCode = False
+                codeTransition = True
+                typeSeen[rowtype] = True
+                break
+
+        if codeTransition:
+            codeTransition = False
+            continue
 
-            row = cleanRow(row)
+        if deviceCode:
+            deviceList.append(DeviceIP(row))
+            continue
 
-            rowTypes = ["Device", "Network", "Feed"]
-            typeSeen = {"Device": False, "Network": False, "Feed": False}
+        if networkCode:
+            netList.append(NetCIDR(row))
+            continue
 
-            codeTransition = False
-            for rowtype in rowTypes:
-                if not typeSeen[rowtype] and rowtype == "Device" and row[0] == rowtype: 
-                    deviceCode = True
-                    networkCode = False
-                    feedCode   = False
-                    noneCode = False
-                    codeTransition = True
-                    typeSeen[rowtype] = True
-                    break
-
-                if not typeSeen[rowtype] and rowtype == "Network" and row[0] == rowtype:
-                    networkCode = True
-                    deviceCode = False
-                    feedCode   = False
-                    noneCode = False
-                    codeTransition = True
-                    typeSeen[rowtype] = True
-                    break
-
-                if not typeSeen[rowtype] and rowtype == "Feed" and row[0] == rowtype:
-                    networkCode = False
-                    deviceCode = False
-                    feedCode   = True
-                    noneCode = False
-                    codeTransition = True
-                    typeSeen[rowtype] = True
-                    break
-
-            if codeTransition:
-                codeTransition = False
-                continue
-
-            if deviceCode:
-                deviceList.append(DeviceIP(row))
-                continue
-
-            if networkCode:
-                netList.append(NetCIDR(row))
-                continue
-
-            if feedCode:
-                feedList.append(Feed(row))
-                continue
+        if feedCode:
+            feedList.append(Feed(row))
+            continue
         
     msgs = []
     for net in netList:
@@ -605,5 +616,18 @@ def cleanRow(row):
 
     return rtn
 
+def main():
+    cmdline = sys.argv[1:]
+    if len(sys.argv) == 3 and sys.argv[1] == "-is":
+        cmdline = []
+        with open(sys.argv[2],"r") as rf:
+            for line in rf:
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                cmdline.extend(line.split()) 
+
+    convert(parseArgs(cmdline))
+
 if __name__ == '__main__':
     main()
@@ -7,6 +7,16 @@ import os
 import argparse
 
 
+# descDir files read and written, and yamlDir files written, given by
+# argument dest or by fixed file name
+descInputs = ('funcsDesc_input', 'cpuDesc_input', 'cpuOpsDesc_input', 'tcDesc_input')
+descOutputs = ()
+yamlOutputs = ('map_output',)
+
+# rows of the csv input, set by runConvert.py when it passes the sheet in memory
+# rather than as a file in csvDir
+csvRows = None
+
 # Globals
 cpusDict = {}
 mappingList = []
@@ -222,9 +232,15 @@ def directoryAccessible(path):
         return True
  
 
-def main():
-    global cpuDescList, funcDescDict, endpts2models, cmpptnFuncPairs, cpuOps, cmpptnNames, validateFlag
+def readCsvInput(csv_input_file):
+    """Returns the rows of the csv input, those in csvRows if runConvert.py set it"""
+    if csvRows is not None:
+        return csvRows
 
+    with open(csv_input_file, newline='') as rf:
+        return list(csv.reader(rf))
+
+def parseArgs(cmdline):
     parser = argparse.ArgumentParser()
     parser.add_argument(u'-name', metavar = u'name of system', dest=u'name', required=True)
     parser.add_argument(u'-validate', action='store_true', required=False)
@@ -255,17 +271,10 @@ def main():
     # output file of mapping table
     parser.add_argument(u'-map', metavar = u'output file of mapping output', dest=u'map_output', required=True)
 
-    cmdline = sys.argv[1:]
-    if len(sys.argv) == 3 and sys.argv[1] == "-is":
-        cmdline = []
-        with open(sys.argv[2],"r") as rf:
-            for line in rf:
-                line = line.strip()
-                if len(line) == 0 or line.startswith('#'):
-                    continue
-                cmdline.extend(line.split()) 
+    return parser.parse_args(cmdline)
 
-    args = parser.parse_args(cmdline)
+def convert(args):
+    global cpuDescList, funcDescDict, endpts2models, cmpptnFuncPairs, cpuOps, cmpptnNames, validateFlag
 
 
     csvDir = args.csvDir
@@ -301,6 +310,9 @@ def main():
     map_output_file          = os.path.join(yamlDir, args.map_output)
 
     input_files = (csv_input_file, funcsDesc_input_file, cpuDesc_input_file, tcDesc_input_file)
+    if csvRows is not None:
+        # runConvert.py passed the csv input in memory
+        input_files = (funcsDesc_input_file, cpuDesc_input_file, tcDesc_input_file)
 
     errs = 0
     for file_name in input_files:
@@ -339,42 +351,41 @@ def main():
                 cmpptnFuncPairs[(tc['cmpptn'], tc['label'])] = fcList
 
     msgs = []
-    with open(csv_input_file, newline='') as rf:
-        csvrdr = csv.reader(rf)
-        for raw in csvrdr:
-            row = []
-            for v in raw:
-                row.append(v.strip())
+    csvrdr = readCsvInput(csv_input_file)
+    for raw in csvrdr:
+        row = []
+        for v in raw:
+            row.append(v.strip())
 
-            if row[0].find('#') > -1:
-                continue
+        if row[0].find('#') > -1:
+            continue
 
-            if empty(row):
-                continue
+        if empty(row):
+            continue
 
-            if unnamed(row):
-                continue
+        if unnamed(row):
+            continue
 
 
-            row = row[:4]
+        row = row[:4]
 
-            row = cleanRow(row)
+        row = cleanRow(row)
 
-            matchCode = "None"
-            rowTypes = ["Mapping"]
-            for rowtype in rowTypes:
-                if row[0].find(rowtype) > -1:
-                    matchCode = rowtype 
-                    break
+        matchCode = "None"
+        rowTypes = ["Mapping"]
+        for rowtype in rowTypes:
+            if row[0].find(rowtype) > -1:
+                matchCode = rowtype 
+                break
 
-            if matchCode == "Mapping":
-                    mapping = True
-                    continue
-
-            if mapping:
-                mappingList.append(Mapping(row))
+        if matchCode == "Mapping":
+                mapping = True
                 continue
 
+        if mapping:
+            mappingList.append(Mapping(row))
+            continue
+
     # validate that the mappings declared are unique
     valid, msg = validateUniqueness()
     if not valid:
@@ -432,5 +443,18 @@ def cleanRow(row):
 
     return rtn
 
+def main():
+    cmdline = sys.argv[1:]
+    if len(sys.argv) == 3 and sys.argv[1] == "-is":
+        cmdline = []
+        with open(sys.argv[2],"r") as rf:
+            for line in rf:
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                cmdline.extend(line.split()) 
+
+    convert(parseArgs(cmdline))
+
 if __name__ == '__main__':
     main()
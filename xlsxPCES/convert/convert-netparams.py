@@ -7,6 +7,16 @@ import os
 import argparse
 
 
+# descDir files read and written, and yamlDir files written, given by
+# argument dest or by fixed file name
+descInputs = ('attrbDesc_input',)
+descOutputs = ()
+yamlOutputs = ('exp_output',)
+
+# rows of the csv input, set by runConvert.py when it passes the sheet in memory
+# rather than as a file in csvDir
+csvRows = None
+
 # Globals
 networkList = []
 switchList  = []
@@ -1139,11 +1149,15 @@ def directoryAccessible(path):
         return True
  
 
-def main():
-    global attrbDesc, validateFlag
+def readCsvInput(csv_input_file):
+    """Returns the rows of the csv input, those in csvRows if runConvert.py set it"""
+    if csvRows is not None:
+        return csvRows
 
-    global endptList, networkList, switchList, routerList, intrfcList, flowList
+    with open(csv_input_file, newline='') as rf:
+        return list(csv.reader(rf))
 
+def parseArgs(cmdline):
     parser = argparse.ArgumentParser()
     parser.add_argument(u'-name', metavar = u'name of system', dest=u'name', required=True)
     parser.add_argument(u'-validate', action='store_true', required=False)
@@ -1161,17 +1175,13 @@ def main():
     # output file in the format of exp.yaml
     parser.add_argument(u'-exp', metavar = u'network parameter file name', dest=u'exp_output', required=True)
 
-    cmdline = sys.argv[1:]
-    if len(sys.argv) == 3 and sys.argv[1] == "-is":
-        cmdline = []
-        with open(sys.argv[2],"r") as rf:
-            for line in rf:
-                line = line.strip()
-                if len(line) == 0 or line.startswith('#'):
-                    continue
-                cmdline.extend(line.split()) 
+    return parser.parse_args(cmdline)
+
+def convert(args):
+    global attrbDesc, validateFlag
+
+    global endptList, networkList, switchList, routerList, intrfcList, flowList
 
-    args = parser.parse_args(cmdline)
 
     csvDir = args.csvDir
     yamlDir = args.yamlDir
@@ -1205,6 +1215,9 @@ def main():
 
     errs = 0
     input_files = (csv_input_file, attrbDescIn_file)
+    if csvRows is not None:
+        # runConvert.py passed the csv input in memory
+        input_files = (attrbDescIn_file,)
     for input_file in input_files:
         if not os.path.isfile(input_file):
             print_err('unable to open input file "{}"'.format(input_file))
@@ -1229,119 +1242,118 @@ def main():
     interface = False 
     
     msgs = []
-    with open(csv_input_file, newline='') as rf:
-        csvrdr = csv.reader(rf)
-        for raw in csvrdr:
-            row = []
-            for v in raw:
-                row.append(v.strip())
+    csvrdr = readCsvInput(csv_input_file)
+    for raw in csvrdr:
+        row = []
+        for v in raw:
+            row.append(v.strip())
 
-            if row[0].find('#') > -1:
-                continue
+        if row[0].find('#') > -1:
+            continue
 
-            if empty(row):
-                continue
+        if empty(row):
+            continue
 
-            if unnamed(row):
-                continue
+        if unnamed(row):
+            continue
 
-            row = cleanRow(row)
+        row = cleanRow(row)
 
-            matchCode = "None"
-            rowTypes = ('Network', 'Switch', 'Router', 'Endpoint', 'Interface', 'Flows') 
-            for rowtype in rowTypes:
-                if row[0].find(rowtype) > -1:
-                    matchCode = rowtype 
+        matchCode = "None"
+        rowTypes = ('Network', 'Switch', 'Router', 'Endpoint', 'Interface', 'Flows') 
+        for rowtype in rowTypes:
+            if row[0].find(rowtype) > -1:
+                matchCode = rowtype 
            
-            if matchCode == "Network": 
-                    network = True
-                    maxCols = 9
-                    switch = False
-                    router  = False
-                    endpoint = False
-                    interface = False 
-                    flows = False
-                    continue
+        if matchCode == "Network": 
+                network = True
+                maxCols = 9
+                switch = False
+                router  = False
+                endpoint = False
+                interface = False 
+                flows = False
+                continue
 
-            elif matchCode == "Switch": 
-                    network = False
-                    switch = True
-                    maxCols = 7
-                    router  = False
-                    endpoint = False
-                    interface = False 
-                    flows = False
-                    continue
+        elif matchCode == "Switch": 
+                network = False
+                switch = True
+                maxCols = 7
+                router  = False
+                endpoint = False
+                interface = False 
+                flows = False
+                continue
 
-            elif matchCode == "Router": 
-                    network = False
-                    switch = False
-                    router  = True
-                    maxCols = 7
-                    endpoint = False
-                    interface = False 
-                    flows = False
-                    continue
+        elif matchCode == "Router": 
+                network = False
+                switch = False
+                router  = True
+                maxCols = 7
+                endpoint = False
+                interface = False 
+                flows = False
+                continue
 
-            elif matchCode == "Endpoint": 
-                    network = False
-                    switch = False
-                    router  = False
-                    endpoint = True
-                    maxCols = 7
-                    interface = False 
-                    flows = False
-                    continue
+        elif matchCode == "Endpoint": 
+                network = False
+                switch = False
+                router  = False
+                endpoint = True
+                maxCols = 7
+                interface = False 
+                flows = False
+                continue
 
-            elif matchCode == "Interface": 
-                    network = False
-                    switch = False
-                    router  = False
-                    endpoint = False
-                    interface = True
-                    maxCols = 12
-                    flows = False
-                    continue
+        elif matchCode == "Interface": 
+                network = False
+                switch = False
+                router  = False
+                endpoint = False
+                interface = True
+                maxCols = 12
+                flows = False
+                continue
 
-            elif matchCode == "Flows": 
-                    network = False
-                    switch = False
-                    router  = False
-                    endpoint = False
-                    interface = False
-                    flows = True
-                    maxCols = 8
-                    continue
+        elif matchCode == "Flows": 
+                network = False
+                switch = False
+                router  = False
+                endpoint = False
+                interface = False
+                flows = True
+                maxCols = 8
+                continue
 
 
-            row = row[:maxCols]
+        row = row[:maxCols]
 
-            if network:
-                networkList.append(Network(row))
-                continue
+        if network:
+            networkList.append(Network(row))
+            continue
 
-            if switch:
-                switchList.append(Switch(row))
-                continue
+        if switch:
+            switchList.append(Switch(row))
+            continue
 
 
-            if router:
-                routerList.append(Router(row))
-                continue
+        if router:
+            routerList.append(Router(row))
+            continue
 
 
-            if endpoint:
-                endptList.append(Endpoint(row))
-                continue
+        if endpoint:
+            endptList.append(Endpoint(row))
+            continue
 
 
-            if interface:
-                intrfcList.append(Interface(row))
-                continue
+        if interface:
+            intrfcList.append(Interface(row))
+            continue
 
-            if flows:
-                flowList.append(Flow(row))
-                continue
+        if flows:
+            flowList.append(Flow(row))
+            continue
 
     msgs = []
     statements = []
@@ -1424,6 +1436,19 @@ def isNumeric(v):
 
 
 
+def main():
+    cmdline = sys.argv[1:]
+    if len(sys.argv) == 3 and sys.argv[1] == "-is":
+        cmdline = []
+        with open(sys.argv[2],"r") as rf:
+            for line in rf:
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                cmdline.extend(line.split()) 
+
+    convert(parseArgs(cmdline))
+
 if __name__ == '__main__':
     main()
 
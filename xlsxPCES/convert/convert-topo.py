@@ -7,6 +7,16 @@ import os
 import argparse
 
 
+# descDir files read and written, and yamlDir files written, given by
+# argument dest or by fixed file name
+descInputs = ('modelDescIn',)
+descOutputs = ('cpuDescOut', 'attrbDescOut')
+yamlOutputs = ('topo_results',)
+
+# rows of the csv input, set by runConvert.py when it passes the sheet in memory
+# rather than as a file in csvDir
+csvRows = None
+
 # Globals
 networkList = []
 switchList  = []
@@ -1165,9 +1175,15 @@ def wiredoryAccessible(path):
         return True
  
  
-def main():
-    global endptList, networkList, switchList, routerList, wiredConnList, flowList, validateFlag, modelDict 
+def readCsvInput(csv_input_file):
+    """Returns the rows of the csv input, those in csvRows if runConvert.py set it"""
+    if csvRows is not None:
+        return csvRows
 
+    with open(csv_input_file, newline='') as rf:
+        return list(csv.reader(rf))
+
+def parseArgs(cmdline):
     parser = argparse.ArgumentParser()
     parser.add_argument(u'-name', metavar = u'name of system', dest=u'name', required=True)
     parser.add_argument(u'-validate', action='store_true', required=False)
@@ -1193,17 +1209,10 @@ def main():
     # description file, json, of list of object names and groups
     parser.add_argument(u'-attrbDescOut', metavar = u'file of object attribue descriptions', dest=u'attrbDescOut', required=True)
 
-    cmdline = sys.argv[1:]
-    if len(sys.argv) == 3 and sys.argv[1] == "-is":
-        cmdline = []
-        with open(sys.argv[2],"r") as rf:
-            for line in rf:
-                line = line.strip()
-                if len(line) == 0 or line.startswith('#'):
-                    continue
-                cmdline.extend(line.split()) 
+    return parser.parse_args(cmdline)
 
-    args = parser.parse_args(cmdline)
+def convert(args):
+    global endptList, networkList, switchList, routerList, wiredConnList, flowList, validateFlag, modelDict 
 
     topoName  = args.name
     csvDir = args.csvDir
@@ -1235,6 +1244,9 @@ def main():
 
     # test the input files
     test_inputs = (csv_input_file, modelDescIn_file)
+    if csvRows is not None:
+        # runConvert.py passed the csv input in memory
+        test_inputs = (modelDescIn_file,)
 
     for file in test_inputs:
         if not os.path.isfile(file):
@@ -1258,274 +1270,273 @@ def main():
     flows = False
  
     msgs = []
-    with open(csv_input_file, newline='') as rf:
-        csvrdr = csv.reader(rf)
-        for raw in csvrdr:
-            row = []
-            for v in raw:
-                #row.append(''.join(v.split()))
-                row.append(v.strip())
-
-            if row[0].find('#') > -1:
-                continue
+    csvrdr = readCsvInput(csv_input_file)
+    for raw in csvrdr:
+        row = []
+        for v in raw:
+            #row.append(''.join(v.split()))
+            row.append(v.strip())
+
+        if row[0].find('#') > -1:
+            continue
 
-            if empty(row):
-                continue
+        if empty(row):
+            continue
 
-            if unnamed(row):
-                continue
+        if unnamed(row):
+            continue
 
-            row = cleanRow(row)
-
-            matchCode = "None"
-            rowTypes = ('Networks', 'Switches', 'Routers', 'Endpoints', 'Wired-Connections', 
-                'Wireless-Connections', 'Flows')
-
-            for rowtype in rowTypes:
-                if row[0].find(rowtype) > -1:
-                    matchCode = rowtype 
-
-            if matchCode == "Networks": 
-                    networks = True
-                    maxCols = 7
-                    switches = False
-                    routers  = False
-                    endpoints = False
-                    wiredConn = False
-                    wirelessConn = False
-                    flows = False
-                    continue
+        row = cleanRow(row)
+
+        matchCode = "None"
+        rowTypes = ('Networks', 'Switches', 'Routers', 'Endpoints', 'Wired-Connections', 
+            'Wireless-Connections', 'Flows')
+
+        for rowtype in rowTypes:
+            if row[0].find(rowtype) > -1:
+                matchCode = rowtype 
+
+        if matchCode == "Networks": 
+                networks = True
+                maxCols = 7
+                switches = False
+                routers  = False
+                endpoints = False
+                wiredConn = False
+                wirelessConn = False
+                flows = False
+                continue
 
-            elif matchCode == "Switches": 
-                    networks = False
-                    switches = True
-                    maxCols = 7
-                    routers  = False
-                    endpoints = False
-                    wiredConn = False
-                    wirelessConn = False
-                    flows = False
-                    continue
+        elif matchCode == "Switches": 
+                networks = False
+                switches = True
+                maxCols = 7
+                routers  = False
+                endpoints = False
+                wiredConn = False
+                wirelessConn = False
+                flows = False
+                continue
 
-            elif matchCode == "Routers": 
-                    networks = False
-                    switches = False
-                    routers  = True
-                    maxCols = 7
-                    endpoints = False
-                    wiredConn = False
-                    wirelessConn = False
-                    flows = False
-                    continue
+        elif matchCode == "Routers": 
+                networks = False
+                switches = False
+                routers  = True
+                maxCols = 7
+                endpoints = False
+                wiredConn = False
+                wirelessConn = False
+                flows = False
+                continue
 
-            elif matchCode == "Endpoints": 
-                    networks = False
-                    switches = False
-                    routers  = False
-                    endpoints = True
-                    maxCols = 8
-                    wiredConn = False
-                    wirelessConn = False
-                    flows = False
-                    continue
+        elif matchCode == "Endpoints": 
+                networks = False
+                switches = False
+                routers  = False
+                endpoints = True
+                maxCols = 8
+                wiredConn = False
+                wirelessConn = False
+                flows = False
+                continue
 
-            elif matchCode == "Wired-Connections": 
-                    networks = False
-                    switches = False
-                    routers  = False
-                    endpoints = False
-                    wiredConn = True
-                    maxCols = 3
-                    wirelessConn = False
-                    flows = False
-                    continue
+        elif matchCode == "Wired-Connections": 
+                networks = False
+                switches = False
+                routers  = False
+                endpoints = False
+                wiredConn = True
+                maxCols = 3
+                wirelessConn = False
+                flows = False
+                continue
 
-            elif matchCode == "Wireless-Connections": 
-                    networks = False
-                    switches = False
-                    routers  = False
-                    endpoints = False
-                    wiredConn = False
-                    flows = False
-                    wirelessConn = True
-                    maxCols = 3
-                    continue
+        elif matchCode == "Wireless-Connections": 
+                networks = False
+                switches = False
+                routers  = False
+                endpoints = False
+                wiredConn = False
+                flows = False
+                wirelessConn = True
+                maxCols = 3
+                continue
 
-            elif matchCode == "Flows": 
-                    networks = False
-                    switches = False
-                    routers  = False
-                    endpoints = False
-                    wiredConn = False
-                    wirelessConn = False
-                    flows = True 
-                    maxCols = 8
-                    continue
+        elif matchCode == "Flows": 
+                networks = False
+                switches = False
+                routers  = False
+                endpoints = False
+                wiredConn = False
+                wirelessConn = False
+                flows = True 
+                maxCols = 8
+                continue
 
-            row = row[:maxCols]
+        row = row[:maxCols]
 
-            if networks:
-                if len(row[netSwitchIdx]) > 0:
-                    swtch = row[netSwitchIdx]
+        if networks:
+            if len(row[netSwitchIdx]) > 0:
+                swtch = row[netSwitchIdx]
 
-                if len(row[netEndptIdx]) > 0:
-                    endpt = row[netEndptIdx]
+            if len(row[netEndptIdx]) > 0:
+                endpt = row[netEndptIdx]
 
-                if len(row[netRouterIdx]) > 0:
-                    router = row[netRouterIdx]
+            if len(row[netRouterIdx]) > 0:
+                router = row[netRouterIdx]
 
-                if len(row[netGroupIdx]) > 0:
-                    group = row[netGroupIdx]
+            if len(row[netGroupIdx]) > 0:
+                group = row[netGroupIdx]
 
-                # if the first line of the network create
-                # an instance of the network class
-                if len(row[netNameIdx]) > 0:
-                    networkList.append(Network(row))
+            # if the first line of the network create
+            # an instance of the network class
+            if len(row[netNameIdx]) > 0:
+                networkList.append(Network(row))
 
-                if len(row[netSwitchIdx]) > 0:
-                    networkList[-1].addSwitch(swtch)
-                    swtch = ''
+            if len(row[netSwitchIdx]) > 0:
+                networkList[-1].addSwitch(swtch)
+                swtch = ''
 
-                if len(row[netRouterIdx]) > 0:
-                    networkList[-1].addRouter(router)
-                    router = '' 
+            if len(row[netRouterIdx]) > 0:
+                networkList[-1].addRouter(router)
+                router = '' 
 
-                if len(row[netEndptIdx]) > 0:
-                    networkList[-1].addEndpt(endpt)
-                    endpt = ''
+            if len(row[netEndptIdx]) > 0:
+                networkList[-1].addEndpt(endpt)
+                endpt = ''
 
-                if len(row[netGroupIdx]) > 0:
-                    networkList[-1].addGroup(group)
-                    group = ''
+            if len(row[netGroupIdx]) > 0:
+                networkList[-1].addGroup(group)
+                group = ''
 
-                if len(row[netGroupIdx]) > 0:
-                    networkList[-1].addGroup(group)
-                    group = ''
+            if len(row[netGroupIdx]) > 0:
+                networkList[-1].addGroup(group)
+                group = ''
 
-                continue
+            continue
 
-            if switches:
-                if len(row[devGroupIdx]) > 0:
-                    group = row[devGroupIdx]
+        if switches:
+            if len(row[devGroupIdx]) > 0:
+                group = row[devGroupIdx]
                 
-                if len(row[devPeerIdx]) > 0:
-                    peer = row[devPeerIdx]
+            if len(row[devPeerIdx]) > 0:
+                peer = row[devPeerIdx]
                 
-                if len(row[devFacesIdx]) > 0:
-                    net = row[devFacesIdx]
+            if len(row[devFacesIdx]) > 0:
+                net = row[devFacesIdx]
                
-                if len(row[devOpIdx]) > 0:
-                    opSrc = row[devOpSrcIdx]
-                    op    = row[devOpIdx]
+            if len(row[devOpIdx]) > 0:
+                opSrc = row[devOpSrcIdx]
+                op    = row[devOpIdx]
  
-                if len(row[devNameIdx]) > 0:
-                    switchList.append(Switch(row))
+            if len(row[devNameIdx]) > 0:
+                switchList.append(Switch(row))
             
-                if len(row[devGroupIdx]) > 0:
-                    switchList[-1].addGroup(group)
-                    group = ''
+            if len(row[devGroupIdx]) > 0:
+                switchList[-1].addGroup(group)
+                group = ''
 
-                if len(row[devPeerIdx]) > 0:
-                    switchList[-1].addPeer(peer)
-                    peer = ''
+            if len(row[devPeerIdx]) > 0:
+                switchList[-1].addPeer(peer)
+                peer = ''
 
-                if len(row[devFacesIdx]) > 0:
-                    switchList[-1].addNetwork(net)
-                    group = ''
+            if len(row[devFacesIdx]) > 0:
+                switchList[-1].addNetwork(net)
+                group = ''
 
-                if len(row[devOpIdx]) > 0 or len(row[devOpSrcIdx]):
-                    switchList[-1].addOp(opSrc, op)
-                    opSrc = ''
-                    op = ''
+            if len(row[devOpIdx]) > 0 or len(row[devOpSrcIdx]):
+                switchList[-1].addOp(opSrc, op)
+                opSrc = ''
+                op = ''
 
-                continue
+            continue
 
-            if routers:
-                if len(row[devGroupIdx]) > 0:
-                    group = row[devGroupIdx]
+        if routers:
+            if len(row[devGroupIdx]) > 0:
+                group = row[devGroupIdx]
                
-                if len(row[devPeerIdx]) > 0:
-                    peer = row[devPeerIdx]
+            if len(row[devPeerIdx]) > 0:
+                peer = row[devPeerIdx]
                 
-                if len(row[devFacesIdx]) > 0:
-                    net = row[devFacesIdx]
+            if len(row[devFacesIdx]) > 0:
+                net = row[devFacesIdx]
                 
-                if len(row[devOpIdx]) > 0:
-                    opSrc = row[devOpSrcIdx]
-                    op    = row[devOpIdx]
+            if len(row[devOpIdx]) > 0:
+                opSrc = row[devOpSrcIdx]
+                op    = row[devOpIdx]
  
-                if len(row[devNameIdx]) > 0:
-                    routerList.append(Router(row))
+            if len(row[devNameIdx]) > 0:
+                routerList.append(Router(row))
 
-                if len(row[devGroupIdx]) > 0:
-                    routerList[-1].addGroup(group)
-                    group = ''
+            if len(row[devGroupIdx]) > 0:
+                routerList[-1].addGroup(group)
+                group = ''
 
-                if len(row[devPeerIdx]) > 0:
-                    routerList[-1].addPeer(peer)
-                    peer = ''
+            if len(row[devPeerIdx]) > 0:
+                routerList[-1].addPeer(peer)
+                peer = ''
 
-                if len(row[devFacesIdx]) > 0:
-                    routerList[-1].addNetwork(net)
-                    net = ''
+            if len(row[devFacesIdx]) > 0:
+                routerList[-1].addNetwork(net)
+                net = ''
 
-                if len(row[devOpIdx]) > 0 or len(row[devOpSrcIdx]):
-                    switchList[-1].addOp(opSrc, op)
-                    opSrc = ''
-                    op = ''
+            if len(row[devOpIdx]) > 0 or len(row[devOpSrcIdx]):
+                switchList[-1].addOp(opSrc, op)
+                opSrc = ''
+                op = ''
 
-                continue
+            continue
 
-            if endpoints:
-                if len(row[endptGroupIdx]) > 0:
-                    group = row[endptGroupIdx]
+        if endpoints:
+            if len(row[endptGroupIdx]) > 0:
+                group = row[endptGroupIdx]
                 
-                if len(row[endptPeerIdx]) > 0:
-                    peer = row[endptPeerIdx]
+            if len(row[endptPeerIdx]) > 0:
+                peer = row[endptPeerIdx]
                 
-                if len(row[endptNetworkIdx]) > 0:
-                    net = row[endptNetworkIdx]
+            if len(row[endptNetworkIdx]) > 0:
+                net = row[endptNetworkIdx]
                 
-                if len(row[endptAccelNameIdx]) > 0:
-                    accelname = row[endptAccelNameIdx]
+            if len(row[endptAccelNameIdx]) > 0:
+                accelname = row[endptAccelNameIdx]
                 
-                if len(row[endptAccelModelIdx]) > 0:
-                    accelmodel = row[endptAccelModelIdx]
+            if len(row[endptAccelModelIdx]) > 0:
+                accelmodel = row[endptAccelModelIdx]
                 
-                if len(row[endptNameIdx]) > 0:
-                    endptList.append(Endpt(row))
+            if len(row[endptNameIdx]) > 0:
+                endptList.append(Endpt(row))
 
-                if len(row[endptGroupIdx]) > 0:
-                    endptList[-1].addGroup(group)
-                    group = ''
+            if len(row[endptGroupIdx]) > 0:
+                endptList[-1].addGroup(group)
+                group = ''
 
-                if len(row[endptPeerIdx]) > 0:
-                    endptList[-1].addPeer(peer)
-                    peer = ''
+            if len(row[endptPeerIdx]) > 0:
+                endptList[-1].addPeer(peer)
+                peer = ''
 
-                if len(row[endptNetworkIdx]) > 0:
-                    endptList[-1].addNetwork(net)
-                    net = ''
+            if len(row[endptNetworkIdx]) > 0:
+                endptList[-1].addNetwork(net)
+                net = ''
 
-                if len(row[endptAccelNameIdx]) > 0:
-                    endptList[-1].addAccel(accelname, accelmodel)
-                    accel = ''
+            if len(row[endptAccelNameIdx]) > 0:
+                endptList[-1].addAccel(accelname, accelmodel)
+                accel = ''
 
-                continue
+            continue
 
-            if wiredConn:
-                wiredConnList.append(WiredConnection(row))
+        if wiredConn:
+            wiredConnList.append(WiredConnection(row))
 
-            if wirelessConn:
-                wirelessConnList.append(WirelessConnection(row))
+        if wirelessConn:
+            wirelessConnList.append(WirelessConnection(row))
 
-            if flows:
-                if len(row[0]) > 0:
-                    flowList.append(Flow(row))
-                elif len(row[flowGroupIdx]) > 0:
-                    flowList[-1].addGroup(row[flowGroupIdx])
+        if flows:
+            if len(row[0]) > 0:
+                flowList.append(Flow(row))
+            elif len(row[flowGroupIdx]) > 0:
+                flowList[-1].addGroup(row[flowGroupIdx])
 
-            continue
+        continue
 
     msgs = []
     valid, msg = validateNetworks()
@@ -1665,6 +1676,19 @@ def cleanRow(row):
 
     return rtn
 
+def main():
+    cmdline = sys.argv[1:]
+    if len(sys.argv) == 3 and sys.argv[1] == "-is":
+        cmdline = []
+        with open(sys.argv[2],"r") as rf:
+            for line in rf:
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                cmdline.extend(line.split()) 
+
+    convert(parseArgs(cmdline))
+
 if __name__ == '__main__':
     main()
 
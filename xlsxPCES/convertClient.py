@@ -0,0 +1,60 @@
+# convertClient.py has a conversion server (convertServer.py) convert a workbook.  It
+# takes the same arguments as runConvert.py, including '-is <args file>', and prints
+# what the conversion prints, exiting with its status.  It only loads what it needs to
+# talk to the server, so it starts quickly.  '-socket' names the server's socket if it
+# is not the default, and '-stop' shuts the server down.
+#
+import socket
+import json
+import sys
+import os
+
+def defaultSocket():
+    runDir = os.environ.get('XDG_RUNTIME_DIR', '/tmp')
+    return os.path.join(runDir, 'pcesbld-{}.sock'.format(os.getuid()))
+
+def main():
+    cmdline = sys.argv[1:]
+
+    socketPath = defaultSocket()
+    if len(cmdline) > 1 and cmdline[0] == '-socket':
+        socketPath = cmdline[1]
+        cmdline = cmdline[2:]
+
+    if cmdline == ['-stop']:
+        request = {'stop': True}
+    else:
+        if len(cmdline) == 2 and cmdline[0] == "-is":
+            argsFile = cmdline[1]
+            cmdline = []
+            with open(argsFile,"r") as rf:
+                for line in rf:
+                    line = line.strip()
+                    if len(line) == 0 or line.startswith('#'):
+                        continue
+                    cmdline.extend(line.split())
+        request = {'cwd': os.getcwd(), 'cmdline': cmdline}
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socketPath)
+    except OSError:
+        print('no conversion server is listening on {}, start one with python convertServer.py'.format(socketPath),
+            file=sys.stderr)
+        exit(1)
+
+    status = 1
+    with conn, conn.makefile('rwb') as stream:
+        stream.write((json.dumps(request)+'\n').encode())
+        stream.flush()
+        for line in stream:
+            reply = json.loads(line)
+            if 'output' in reply:
+                sys.stdout.write(reply['output'])
+                sys.stdout.flush()
+            if 'exit' in reply:
+                status = reply['exit']
+    exit(status)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# this script requires python 3.10 or later, and the packages runConvert.py needs.
+#
+# convertServer.py is a long running conversion server.  It listens on a Unix socket
+# and converts workbooks for convertClient.py, each request carrying a runConvert.py
+# command line and the directory it is to be run from.  The server has python, yaml
+# and openpyxl loaded and the converter scripts compiled before the first request comes
+# in, keeps the sheets of the workbooks it has read until they change, and uses the
+# build cache as runConvert.py does, so that a request pays for none of those again.
+#
+# Requests are served one at a time, in the order they arrive.  A request is a line of
+# JSON,
+#     {"cwd": <directory>, "cmdline": [<runConvert.py arguments>]}
+# or {"stop": true} to shut the server down.  The reply is a stream of JSON lines,
+# {"output": <text>} for what the conversion printed, as it prints it, and last of all
+# {"exit": <status>}.
+#
+import socketserver
+import traceback
+import contextlib
+import importlib
+import argparse
+import socket
+import json
+import sys
+import os
+import runConvert
+
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+
+def defaultSocket():
+    """Returns the path of the socket used when none is given, one per user"""
+    runDir = os.environ.get('XDG_RUNTIME_DIR', '/tmp')
+    return os.path.join(runDir, 'pcesbld-{}.sock'.format(os.getuid()))
+
+def print_err(*a):
+    print(*a, file=sys.stderr)
+
+class ReplyStream:
+    """Stands in for stdout and stderr while a request is served, sending what is
+    written to the client"""
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.closed = False
+
+    def send(self, message):
+        if self.closed:
+            return
+        try:
+            self.wfile.write((json.dumps(message)+'\n').encode())
+            self.wfile.flush()
+        except OSError:
+            # the client went away, the conversion carries on regardless
+            self.closed = True
+
+    def write(self, text):
+        if len(text) > 0:
+            self.send({'output': text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        reply = ReplyStream(self.wfile)
+        try:
+            request = json.loads(line)
+        except ValueError:
+            reply.send({'output': 'request not understood\n'})
+            reply.send({'exit': 1})
+            return
+
+        if request.get('stop'):
+            self.server.stopping = True
+            reply.send({'exit': 0})
+            return
+
+        cmdline = request.get('cmdline', [])
+        if '-watch' in cmdline:
+            reply.send({'output': '-watch cannot be used with the conversion server\n'})
+            reply.send({'exit': 1})
+            return
+
+        status = 0
+        savedDir = os.getcwd()
+        with contextlib.redirect_stdout(reply), contextlib.redirect_stderr(reply):
+            try:
+                os.chdir(request.get('cwd', savedDir))
+                runConvert.main(cmdline)
+            except SystemExit as err:
+                if err.code not in (None, 0):
+                    status = err.code if isinstance(err.code, int) else 1
+            except Exception:
+                traceback.print_exc()
+                status = 1
+            finally:
+                os.chdir(savedDir)
+
+        reply.send({'exit': status})
+
+class ConversionServer(socketserver.UnixStreamServer):
+    stopping = False
+
+def warmUp(convertDir):
+    """Loads what every conversion needs, so that the first request does not pay for it"""
+    for moduleName in ('openpyxl', 'yaml'):
+        importlib.import_module(moduleName)
+    runConvert.convertDir = convertDir
+    for fileName in sorted(os.listdir(convertDir)):
+        if fileName.startswith('convert-') and fileName.endswith('.py') and fileName != 'convert-ip.py':
+            runConvert.loadConverter(fileName[len('convert-'):-len('.py')])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(u'-socket', metavar = u'path of the Unix socket listened on', dest=u'socket',
+            default=defaultSocket(), required=False)
+    parser.add_argument(u'-convertDir', metavar = u'directory with converter function', dest=u'convertDir',
+            default=os.path.join(scriptDir, 'convert'), required=False)
+    args = parser.parse_args()
+
+    # a socket left behind by a server that is no longer running is removed
+    if os.path.exists(args.socket):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(args.socket)
+            print_err('a conversion server is already listening on {}'.format(args.socket))
+            exit(1)
+        except OSError:
+            os.unlink(args.socket)
+        finally:
+            probe.close()
+
+    warmUp(args.convertDir)
+
+    # sheets of workbooks are kept between requests
+    runConvert.workbookCache = {}
+
+    # only this user may connect
+    savedMask = os.umask(0o177)
+    try:
+        server = ConversionServer(args.socket, RequestHandler)
+    finally:
+        os.umask(savedMask)
+
+    print('conversion server listening on {}'.format(args.socket))
+    sys.stdout.flush()
+    try:
+        while not server.stopping:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+    print('conversion server stopped')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+# this script requires python 3.10 or later and the openpyxl package.
+#
+# genWorkbook.py writes a synthetic model workbook of a given scale, for measuring how
+# runConvert.py behaves on models larger than the examples.  The workbook has all seven
+# sheets (topo, cp, execTime, mapping, netParams, ipmap, experiments), and the names
+# each sheet uses are those the other sheets define, so that it converts with -validate.
+#
+#   - there are -networks networks.  Each has -switches switches, the first of them the
+#     hub the others are wired to, and -endpoints endpoints wired to the switches in turn.
+#     There are -routers routers, each wired to the hubs of two neighbouring networks
+#     (of the one network, if there is only one).
+#   - there are -patterns computational patterns, each a chain of -funcs functions:
+#     a start function, processPckt functions, and a finish function.  Each pattern runs
+#     on one endpoint, the patterns spread over the endpoints in turn.
+#   - the chains make up patterns*(funcs-1) of the -connections connections, the rest
+#     join processPckt functions chosen at random, each with a message type of its own
+#     that the function receiving it has a timing code for.
+#   - the experiments sheet has -experiments experiments, each giving the rate of the
+#     start functions ($lambda, cp) and the bandwidth of the interfaces ($bndwdth,
+#     netParams) a value of its own.
+#
+import argparse
+import ipaddress
+import random
+import sys
+
+cpuModel = 'AMD EPYC 7763 64-Core Processor'
+switchModel = 'Aruba 3810'
+routerModel = 'Cisco 4300'
+
+# the operations the processPckt functions use, all of them in the exec table
+opNames = ['process{}'.format(idx) for idx in range(8)]
+pcktLens = (64, 512, 1500)
+
+def print_err(*a):
+    print(*a, file=sys.stderr)
+
+def netName(net):
+    return 'net{}'.format(net)
+
+def switchName(net, sw):
+    return 'sw{}_{}'.format(net, sw)
+
+def routerName(rtr):
+    return 'rtr{}'.format(rtr)
+
+def endptName(net, ep):
+    return 'ep{}_{}'.format(net, ep)
+
+def cpName(cp):
+    return 'cp{}'.format(cp)
+
+def procName(func):
+    return 'proc{}'.format(func)
+
+class Model:
+    """The devices and patterns of the generated model, from which the rows of each
+    sheet are made"""
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+
+        # networks each router faces
+        self.routerNets = []
+        for rtr in range(args.routers):
+            if args.networks == 1:
+                self.routerNets.append([0])
+            else:
+                net = rtr % (args.networks-1)
+                self.routerNets.append([net, net+1])
+
+        # routers facing each network
+        self.netRouters = [[] for net in range(args.networks)]
+        for rtr, nets in enumerate(self.routerNets):
+            for net in nets:
+                self.netRouters[net].append(rtr)
+
+        self.endpts = [endptName(net, ep) for net in range(args.networks) for ep in range(args.endpoints)]
+
+        # labels of the functions of a pattern, in chain order
+        self.funcs = ['startThread'] + [procName(func) for func in range(1, args.funcs-1)] + ['endThread']
+
+        # the connections beyond the chains, as (srcCP, dstCP, srcLabel, dstLabel, msgType)
+        self.extraConns = []
+        procs = [(cpName(cp), label) for cp in range(args.patterns) for label in self.funcs[1:-1]]
+        for idx in range(args.connections - args.patterns*(args.funcs-1)):
+            src = self.rng.choice(procs)
+            dst = self.rng.choice(procs)
+            self.extraConns.append((src[0], dst[0], src[1], dst[1], 'xfer{}'.format(idx)))
+
+        # message types of the extra connections into each processPckt function
+        self.extraMsgs = {}
+        for srcCP, dstCP, srcLabel, dstLabel, msgType in self.extraConns:
+            self.extraMsgs.setdefault((dstCP, dstLabel), []).append(msgType)
+
+    def chainMsg(self, funcIdx):
+        """Returns the message type of the chain connection into function funcIdx"""
+        if funcIdx == len(self.funcs)-1:
+            return 'finish'
+        return 'process'
+
+    def funcOp(self, cp, funcIdx):
+        return opNames[(cp*len(self.funcs) + funcIdx) % len(opNames)]
+
+    def patternEndpt(self, cp):
+        return self.endpts[cp % len(self.endpts)]
+
+    def topoRows(self):
+        args = self.args
+        rows = [[], ['Networks'], ['### name', 'netscale', 'mediatype', 'switches', 'endpoints', 'routers', 'groups']]
+        for net in range(args.networks):
+            switches = [switchName(net, sw) for sw in range(args.switches)]
+            endpts = [endptName(net, ep) for ep in range(args.endpoints)]
+            routers = [routerName(rtr) for rtr in self.netRouters[net]]
+            for idx in range(max(len(switches), len(endpts), len(routers))):
+                row = ['', '', '']
+                if idx == 0:
+                    row = [netName(net), 'LAN', 'wired']
+                for names in (switches, endpts, routers):
+                    row.append(names[idx] if idx < len(names) else '')
+                rows.append(row)
+        rows.append([])
+
+        wired = []
+        rows.extend([['Switches'], ['### switch name', 'model', 'groups', 'peers', 'faces']])
+        for net in range(args.networks):
+            hub = switchName(net, 0)
+            for sw in range(args.switches):
+                peers = [endptName(net, ep) for ep in range(args.endpoints) if ep % args.switches == sw]
+                if sw == 0:
+                    peers.extend(switchName(net, other) for other in range(1, args.switches))
+                    peers.extend(routerName(rtr) for rtr in self.netRouters[net])
+                else:
+                    peers.append(hub)
+                    wired.append([switchName(net, sw), hub, 1])
+
+                rows.append([switchName(net, sw), switchModel, '', peers[0] if peers else '', netName(net)])
+                for peer in peers[1:]:
+                    rows.append(['', '', '', peer])
+        rows.append([])
+
+        rows.extend([['Routers'], ['### router name', 'model', 'groups', 'peers', 'faces']])
+        for rtr, nets in enumerate(self.routerNets):
+            for idx, net in enumerate(nets):
+                first = [routerName(rtr), routerModel, ''] if idx == 0 else ['', '', '']
+                rows.append(first + [switchName(net, 0), netName(net)])
+                wired.append([routerName(rtr), switchName(net, 0), 1])
+        rows.append([])
+
+        rows.extend([['Endpoints'],
+            ['### endpt name', 'model', 'cores', 'groups', 'accel name', 'accel model', 'peers', 'faces']])
+        for net in range(args.networks):
+            for ep in range(args.endpoints):
+                sw = switchName(net, ep % args.switches)
+                rows.append([endptName(net, ep), cpuModel, 1, '', '', '', sw, netName(net)])
+                wired.append([endptName(net, ep), sw, 1])
+        rows.append([])
+
+        rows.extend([['Wired-Connections'], ['### device 1', 'device 2', 'cable']])
+        rows.extend(wired)
+        rows.append([])
+
+        rows.extend([['Wireless-Connections'], ['### device', 'hub', 'network'], []])
+        return rows
+
+    def cpRows(self):
+        args = self.args
+        rows = [[], ['Patterns'], ['### name', 'type', 'func class', 'func label', 'SrvOp', 'Service CP, Service Func']]
+        for cp in range(args.patterns):
+            for idx, label in enumerate(self.funcs):
+                fnclass = 'start' if idx == 0 else 'finish' if idx == len(self.funcs)-1 else 'processPckt'
+                first = [cpName(cp), 'simple'] if idx == 0 else ['', '']
+                rows.append(first + [fnclass, label])
+        rows.append([])
+
+        rows.extend([['Connections'],
+            ['### source CmpPtn name', 'dest CmpPtn name', 'source Label', 'dest Label', 'message type']])
+        for cp in range(args.patterns):
+            for idx in range(1, len(self.funcs)):
+                rows.append([cpName(cp), cpName(cp), self.funcs[idx-1], self.funcs[idx], self.chainMsg(idx)])
+        for conn in self.extraConns:
+            rows.append(list(conn))
+        rows.append([])
+
+        rows.extend([['Initializations'],
+            ['### start class', 'cmpptn', 'label', 'pcktlen', 'msglen', 'msg type', 'start time', 'data', 'trace', 'groups']])
+        for cp in range(args.patterns):
+            rows.append(['start', cpName(cp), self.funcs[0], 1000, 1500, self.chainMsg(1), 0, 'float($lambda)'])
+
+        rows.append(['### finish class', 'cmpptn', 'label', 'trace', '(msg2mc) input msg type', '(msg2mc) method code',
+            'data', 'groups'])
+        for cp in range(args.patterns):
+            rows.append(['finish', cpName(cp), self.funcs[-1]])
+
+        rows.append(['### processPckt class', 'cmpptn', 'label', '(timingcode) input msg type',
+            '(timingcode) timing table', 'trace', '(msg2mc) input msg type', '(msg2mc) method code', 'accelname',
+            '(msg2msg) input msg type', '(msg2msg) output msg type', 'groups'])
+        for cp in range(args.patterns):
+            for idx in range(1, len(self.funcs)-1):
+                op = self.funcOp(cp, idx)
+                rows.append(['processPckt', cpName(cp), self.funcs[idx], self.chainMsg(idx), op])
+                for msgType in self.extraMsgs.get((cpName(cp), self.funcs[idx]), []):
+                    rows.append(['', '', '', msgType, op])
+        rows.append([])
+        return rows
+
+    def execRows(self):
+        rows = [['CPU Entries'], ['### model', 'operation', 'pcktlen (bytes)', 'exec time (usec)']]
+        for op in opNames:
+            base = self.rng.uniform(0.5, 5.0)
+            for pcktLen in pcktLens:
+                rows.append([cpuModel, op, pcktLen, round(base*(1+pcktLen/1500.0), 4)])
+        rows.append([])
+
+        rows.extend([['Router Entries'], ['### model', 'operation', 'pcktlen', 'exec time', 'bandwidth']])
+        for pcktLen in pcktLens:
+            rows.append([routerModel, 'route', pcktLen, round(500+pcktLen/3.0, 2), 1000])
+        rows.append([])
+
+        rows.extend([['Switch Entries'], ['### model', 'operation', 'pcktlen', 'exec time', 'bandwidth']])
+        for pcktLen in pcktLens:
+            rows.append([switchModel, 'switch', pcktLen, round(20+pcktLen/50.0, 2), 1000])
+        rows.append([])
+        return rows
+
+    def mappingRows(self):
+        rows = [[], ['Mapping'], ['### CmpPtnName', 'func label', 'endpoint', 'sched priority']]
+        for cp in range(self.args.patterns):
+            for label in self.funcs:
+                rows.append([cpName(cp), label, self.patternEndpt(cp), 10])
+        rows.append([])
+        return rows
+
+    def netParamsRows(self):
+        rows = [[], ['Network'],
+            ['### name', 'csv groups', 'media', 'scale', '*', 'latency (musec)', 'bandwidth (Mbps)', 'capacity (Mbps)', 'trace']]
+        for net in range(self.args.networks):
+            rows.append([netName(net), '', '', '', '', 5, 1000, 10000, 'False'])
+        rows.append([])
+
+        rows.extend([['Switch'], ['### name', 'csv groups', 'model', '*', 'model', 'trace'], []])
+        rows.extend([['Router'], ['### name', 'csv groups', 'model', '*', 'model', 'trace'], []])
+        rows.extend([['Endpoint'], ['### name', 'csv groups', 'model', '*', 'model', 'interruptdelay (musec)', 'trace'],
+            ['', '', '', 'True', '', 0], []])
+        rows.extend([['Interface'],
+            ['### name', 'csv groups', 'devtype', 'devname', 'media', 'faces', '*', 'latency (musec)', 'bandwidth (Mbps)',
+                'MTU', 'trace'],
+            ['', '', '', '', '', '', 'True', 5, 'float($bndwdth)', '', 'False'], []])
+        return rows
+
+    def ipmapRows(self):
+        args = self.args
+
+        # a subnet for each network large enough for its endpoints, internal addresses
+        # from 10.0.0.0/8 and external ones from 100.64.0.0/10
+        prefix = 32 - max(8, (args.endpoints+1).bit_length())
+        intNets = ipaddress.ip_network('10.0.0.0/8').subnets(new_prefix=prefix)
+        extNets = ipaddress.ip_network('100.64.0.0/10').subnets(new_prefix=prefix)
+        cidrs = []
+        for net in range(args.networks):
+            cidrs.append((next(intNets), next(extNets)))
+
+        rows = [[], ['Device'], ['### name', 'network', 'internal IP', 'external IP']]
+        for net, (intNet, extNet) in enumerate(cidrs):
+            for ep in range(args.endpoints):
+                rows.append([endptName(net, ep), netName(net), str(intNet[ep+1]), str(extNet[ep+1])])
+
+        rows.extend([['Network'], ['### name', 'internal CIDR', 'external CIDR']])
+        for net, (intNet, extNet) in enumerate(cidrs):
+            rows.append([netName(net), str(intNet), str(extNet)])
+
+        rows.extend([['Feed'], ['### name', 'active', 'src type (file, unix-socket, net-socket)',
+            'src spec (file name or port number)', 'time (clock, packet)', 'dilation factor', 'first arrival (sec)']])
+        return rows
+
+    def experimentsRows(self):
+        bndwdths = (10, 100, 1000)
+        rows = [[], ['Experiments'], ['name', '$lambda,cp', '$bndwdth,netParams']]
+        for exp in range(self.args.experiments):
+            rows.append(['exp-{}'.format(exp+1), 10+exp, bndwdths[exp % len(bndwdths)]])
+        return rows
+
+    def sheets(self):
+        return [('topo', self.topoRows()), ('ipmap', self.ipmapRows()), ('cp', self.cpRows()),
+            ('execTime', self.execRows()), ('mapping', self.mappingRows()), ('netParams', self.netParamsRows()),
+            ('experiments', self.experimentsRows())]
+
+def writeWorkbook(sheets, xlsx_file):
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    for name, rows in sheets:
+        ws = wb.create_sheet(name)
+        for row in rows:
+            ws.append([None if value == '' else value for value in row])
+    wb.save(xlsx_file)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(u'-xlsx', metavar = u'output workbook file name', dest=u'xlsx', required=True)
+    parser.add_argument(u'-networks', metavar = u'number of networks', dest=u'networks', type=int, default=1, required=False)
+    parser.add_argument(u'-endpoints', metavar = u'number of endpoints on each network', dest=u'endpoints',
+            type=int, default=4, required=False)
+    parser.add_argument(u'-switches', metavar = u'number of switches on each network', dest=u'switches',
+            type=int, default=1, required=False)
+    parser.add_argument(u'-routers', metavar = u'number of routers, by default networks-1', dest=u'routers',
+            type=int, required=False)
+    parser.add_argument(u'-patterns', metavar = u'number of computational patterns', dest=u'patterns',
+            type=int, default=2, required=False)
+    parser.add_argument(u'-funcs', metavar = u'number of functions in each pattern', dest=u'funcs',
+            type=int, default=4, required=False)
+    parser.add_argument(u'-connections', metavar = u'number of connections, by default patterns*(funcs-1)',
+            dest=u'connections', type=int, required=False)
+    parser.add_argument(u'-experiments', metavar = u'number of experiments', dest=u'experiments',
+            type=int, default=4, required=False)
+    parser.add_argument(u'-seed', metavar = u'seed of the random choices', dest=u'seed', type=int, default=1, required=False)
+
+    cmdline = sys.argv[1:]
+    if len(sys.argv) == 3 and sys.argv[1] == "-is":
+        cmdline = []
+        with open(sys.argv[2],"r") as rf:
+            for line in rf:
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                cmdline.extend(line.split())
+
+    args = parser.parse_args(cmdline)
+    if args.routers is None:
+        args.routers = args.networks-1
+    if args.connections is None:
+        args.connections = args.patterns*(args.funcs-1)
+
+    errs = []
+    if args.networks < 1 or args.endpoints < 1 or args.switches < 1 or args.patterns < 1 or args.experiments < 1:
+        errs.append('there must be at least one network, endpoint, switch, pattern and experiment')
+    if args.routers < 0:
+        errs.append('the number of routers cannot be negative')
+    if args.funcs < 2:
+        errs.append('a pattern needs at least two functions, a start and a finish')
+    elif args.connections < args.patterns*(args.funcs-1):
+        errs.append('the patterns need at least {} connections'.format(args.patterns*(args.funcs-1)))
+    elif args.connections > args.patterns*(args.funcs-1) and args.funcs < 3:
+        errs.append('connections beyond the patterns\' chains need patterns of at least three functions')
+    if args.networks > 2**(32 - max(8, (args.endpoints+1).bit_length()) - 10):
+        errs.append('too many networks to give each an address range')
+
+    if len(errs) > 0:
+        for msg in errs:
+            print_err(msg)
+        exit(1)
+
+    model = Model(args)
+    writeWorkbook(model.sheets(), args.xlsx)
+    print('wrote {} with {} networks, {} endpoints, {} patterns of {} functions, {} connections and {} experiments'.format(
+        args.xlsx, args.networks, len(model.endpts), args.patterns, args.funcs, args.connections, args.experiments))
+
+if __name__ == "__main__":
+    main()
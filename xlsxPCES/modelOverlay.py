@@ -0,0 +1,235 @@
+# the models of experiments written as overlays by runConvert.py -bundleDir <dir> -overlay.
+#
+# Rather than a directory with every .yaml file of every experiment, -overlay writes the
+# model of the first experiment once, in <dir>/base, and for each experiment an overlay,
+# <dir>/overlays/<experiment>.json, holding only where its model differs from the base.
+# <dir>/overlay.json names the base experiment and lists the experiments in order.  An
+# overlay is a JSON mapping
+#     {"files": {<file name>: [<entry>, ...]}, "removed": [<file name>, ...]}
+# each entry of a file being either
+#     {"path": [<key or index>, ...], "value": <value>}
+# which sets the value at path in the loaded file (an empty path replacing the whole of
+# it), or
+#     {"path": [<key or index>, ...], "document": [<key or index>, ...], "value": <value>}
+# which sets the value at document within the JSON document held as a string at path,
+# as a 'cfg' value of cpInit.yaml is.  "removed" lists the files of the base the
+# experiment does not have, and is left out when there are none.
+#
+# An OverlayModel reads them back.  Each file of the base is loaded once, when first asked
+# for, and an experiment's file is the base file with the entries of its overlay applied,
+# only the mappings and lists on the paths to the entries being copied.  The rest is shared
+# with the base and between experiments, so what is loaded is not to be modified.
+#
+# Run as a script it writes the .yaml files of experiments out again,
+#     python modelOverlay.py -bundleDir <dir> -outDir <dir> [-experiment <name>]
+# into a directory of outDir named for each experiment, or just the one named.
+#
+import argparse
+import json
+import yaml
+import sys
+import os
+
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+Dumper = getattr(yaml, 'CDumper', yaml.Dumper)
+
+def loadFile(path):
+    """Returns the loaded .yaml file at path"""
+    with open(path, 'r') as rf:
+        return yaml.load(rf, Loader=Loader)
+
+def overlayEntries(base, tree, path=(), documents=True):
+    """Returns the entries that make tree of base, following the mappings with the same
+    keys and the lists with the same length down to the values that differ.  A value
+    shared by the two (as patching shares what it leaves alone) is not looked into."""
+    if tree is base:
+        return []
+
+    if isinstance(base, dict) and isinstance(tree, dict) and len(base) == len(tree) \
+            and all(key in base for key in tree):
+        entries = []
+        for key, value in tree.items():
+            entries.extend(overlayEntries(base[key], value, path+(key,), documents))
+        return entries
+
+    if isinstance(base, list) and isinstance(tree, list) and len(base) == len(tree):
+        entries = []
+        for idx, value in enumerate(tree):
+            entries.extend(overlayEntries(base[idx], value, path+(idx,), documents))
+        return entries
+
+    if type(base) is type(tree) and base == tree:
+        return []
+
+    if documents and isinstance(base, str) and isinstance(tree, str):
+        entries = documentEntries(base, tree, path)
+        if entries is not None:
+            return entries
+
+    return [{'path': list(path), 'value': tree}]
+
+def documentEntries(base, tree, path):
+    """Returns the entries that make the JSON document tree of the JSON document base,
+    both held at path, or None if either is not a document as json.dumps writes it"""
+    if not (base.startswith(('{', '[')) and tree.startswith(('{', '['))):
+        return None
+    try:
+        baseDocument = json.loads(base)
+        document = json.loads(tree)
+    except ValueError:
+        return None
+    if json.dumps(baseDocument) != base or json.dumps(document) != tree:
+        return None
+
+    inner = overlayEntries(baseDocument, document, documents=False)
+    if json.dumps(applyEntries(baseDocument, inner)) != tree:
+        # the keys of the document are in another order
+        return None
+    return [{'path': list(path), 'document': entry['path'], 'value': entry['value']} for entry in inner]
+
+def setValue(root, path, value, copied):
+    """Sets the value at path in root, copying the mappings and lists on the way to it
+    that are not in copied, the set of the paths already copied.  Returns root, which
+    is itself a copy."""
+    if len(path) == 0:
+        copied.clear()
+        return value
+
+    if () not in copied:
+        root = dict(root) if isinstance(root, dict) else list(root)
+        copied.add(())
+
+    node = root
+    for depth in range(len(path)-1):
+        key = path[depth]
+        prefix = path[:depth+1]
+        if prefix not in copied:
+            child = node[key]
+            node[key] = dict(child) if isinstance(child, dict) else list(child)
+            copied.add(prefix)
+        node = node[key]
+    node[path[-1]] = value
+    return root
+
+def applyEntries(tree, entries):
+    """Returns tree with the entries of an overlay applied.  Only the mappings and lists
+    on the paths to the entries are copied, the rest being shared with tree."""
+    root = tree
+    copied = set()
+    documents = {}
+    for entry in entries:
+        path = tuple(entry['path'])
+        if 'document' in entry:
+            documents.setdefault(path, []).append({'path': entry['document'], 'value': entry['value']})
+            continue
+        root = setValue(root, path, entry['value'], copied)
+
+    for path, inner in documents.items():
+        node = root
+        for key in path:
+            node = node[key]
+        root = setValue(root, path, json.dumps(applyEntries(json.loads(node), inner)), copied)
+    return root
+
+class OverlayModel:
+    """The base model and the overlays of the experiments written to bundleDir"""
+    def __init__(self, bundleDir):
+        self.bundleDir = bundleDir
+        with open(os.path.join(bundleDir, 'overlay.json'), 'r') as rf:
+            index = json.load(rf)
+        self.base = index['base']
+        self.names = index['experiments']
+        self.baseFiles = index['files']
+
+        # the loaded files of the base, as they are asked for
+        self.trees = {}
+
+    def experiments(self):
+        """Returns the names of the experiments, in order"""
+        return list(self.names)
+
+    def basePath(self, fileName):
+        return os.path.join(self.bundleDir, 'base', fileName)
+
+    def baseTree(self, fileName):
+        """Returns the loaded file of the base"""
+        if fileName not in self.trees:
+            self.trees[fileName] = loadFile(self.basePath(fileName))
+        return self.trees[fileName]
+
+    def experiment(self, name):
+        """Returns the ExperimentModel of the experiment"""
+        if name not in self.names:
+            raise KeyError('no experiment named {} in {}'.format(name, self.bundleDir))
+        with open(os.path.join(self.bundleDir, 'overlays', name+'.json'), 'r') as rf:
+            overlay = json.load(rf)
+        return ExperimentModel(self, name, overlay)
+
+class ExperimentModel:
+    """The model of one experiment, the files of the base with its overlay applied"""
+    def __init__(self, model, name, overlay):
+        self.model = model
+        self.name = name
+        self.entries = overlay.get('files', {})
+        self.removed = set(overlay.get('removed', []))
+        self.trees = {}
+
+    def files(self):
+        """Returns the names of the .yaml files of the model"""
+        names = set(self.model.baseFiles) - self.removed
+        return sorted(names.union(self.entries))
+
+    def load(self, fileName):
+        """Returns the loaded file, as its .yaml would load"""
+        if fileName not in self.trees:
+            if fileName not in self.files():
+                raise KeyError('experiment {} has no file {}'.format(self.name, fileName))
+
+            base = None
+            if fileName in self.model.baseFiles:
+                base = self.model.baseTree(fileName)
+            self.trees[fileName] = applyEntries(base, self.entries.get(fileName, []))
+        return self.trees[fileName]
+
+    def text(self, fileName):
+        """Returns the text of the file's .yaml"""
+        if len(self.entries.get(fileName, [])) == 0 and fileName not in self.removed:
+            with open(self.model.basePath(fileName), 'r') as rf:
+                return rf.read()
+        return yaml.dump(self.load(fileName), Dumper=Dumper)
+
+    def write(self, directory):
+        """Writes the .yaml files of the model to directory"""
+        os.makedirs(directory, exist_ok=True)
+        for fileName in self.files():
+            with open(os.path.join(directory, fileName), 'w') as wf:
+                wf.write(self.text(fileName))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(u'-bundleDir', metavar = u'directory the overlays were written to', dest=u'bundleDir',
+            required=True)
+    parser.add_argument(u'-outDir', metavar = u'directory where the model of each experiment is written',
+            dest=u'outDir', required=True)
+    parser.add_argument(u'-experiment', metavar = u'name of the only experiment written', dest=u'experiment',
+            required=False)
+    args = parser.parse_args()
+
+    try:
+        model = OverlayModel(args.bundleDir)
+    except (OSError, ValueError, KeyError) as err:
+        print('{} holds no overlays: {}'.format(args.bundleDir, err), file=sys.stderr)
+        exit(1)
+
+    names = model.experiments()
+    if args.experiment is not None:
+        if args.experiment not in names:
+            print('no experiment named {} in {}'.format(args.experiment, args.bundleDir), file=sys.stderr)
+            exit(1)
+        names = [args.experiment]
+
+    for name in names:
+        model.experiment(name).write(os.path.join(args.outDir, name))
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,51 @@
 
-# this script requires python 3.10 or later to be called when the command 'python3' is
-# passed through the subprocess command (for the 'match' statement).
-# It needs the pandas and openpyxl packages to be installed
+# this script requires python 3.10 or later.
+# It needs the openpyxl package to be installed, and pandas if -pandas is given
 #
-import pandas as pd
-import subprocess
+import concurrent.futures
+import importlib.util
+import contextlib
+import io
+import traceback
 import argparse
 import tempfile
 import sys
 import pdb
 import os
-import yaml
 import json
 import glob
 import shutil
+import hashlib
+import time
+import csv
+import re
+import bisect
+import buildCache
+import xlsxReader
+import symbolTemplate
+import symbolConstraints
+import symbolPaths
+import modelOverlay
+import timings
 
 converted_files = []
 
 script_present = {}
 
+# code objects of the converter scripts, keyed by the script's stamp (see scriptStamp), so
+# that a script is compiled again when it is edited or another convertDir is used
+converterCode = {}
+
+# command line tokens for each converter, read once from the args files in workingDir
+converterArgs = {}
+
+# contents of the converter scripts, part of the key of each build cache entry, keyed
+# by the script's stamp (see scriptStamp)
+converterVersion = {}
+
+# the build cache, None if it is not in use
+cache = None
+
 csvDir = ""
 yamlDir = ""
 descDir = ""
@@ -29,6 +56,65 @@ argsDir = ""
 
 sheetNames = []
 
+# rows of the csv file of each sheet, keyed by csv file name, values stripped and
+# symbols in place.  These are handed to the converters in memory
+templateRows = {}
+
+# compiled templates of the sheets, keyed by sheet name, built from templateRows
+templates = {}
+
+# write csv files to templateDir, csvDir and the experiment workspaces and have the
+# converters read them, as a debugging aid
+writeCsv = False
+
+# seconds between checks of the workbook for changes, with -watch
+watchInterval = 0.25
+
+# workbooks at least this large have their sheets read in parallel
+parallelReadBytes = 1 << 20
+
+# file in workingDir holding the rows of the sheets last read from the workbook, with
+# their digests (see xlsxReader.sheetDigests), so that sheets that have not changed
+# since need not be read again
+sheetRowsFile = 'sheetRows.json'
+
+# the sheets last read from each workbook, keyed by its path, as the dictionary
+# previousSheets returns.  Set to a dictionary by a process converting workbooks again
+# and again (see convertServer.py), which then need not read sheetRowsFile
+workbookCache = None
+
+# the name of each sheet in the workbook, keyed by the name runConvert.py uses for it
+xlsxSheetNames = {}
+
+# the names of the experiments the last build found to fail validation
+invalidExperiments = []
+
+# makes the executor the converter runs are spread across, given the number of workers
+# and the state they are set up with (see workerState).  Set by a process converting
+# many workbooks (see batchConvert.py), so that the runs of all of them share one pool
+# of processes.  None has each pool of runs made by a ProcessPoolExecutor of its own.
+makeExecutor = None
+
+# converters write their yaml files, which -check turns off
+emitYaml = True
+
+# file in workingDir holding the problems -check found, as JSON
+checkFile = 'check.json'
+
+# quoted text, and parenthesized lists, in the messages of the converters, which name
+# the cell values the messages are about
+quotedPattern = re.compile(r'"([^"]*)"|\'([^\']*)\'|\(([^()]*)\)')
+
+class SkippedDumps:
+    """Stands in for the yaml module of a converter run by -check, writing nothing"""
+    def __init__(self, module):
+        self.module = module
+
+    def __getattr__(self, name):
+        if name in ('dump', 'safe_dump'):
+            return lambda *args, **kwargs: None
+        return getattr(self.module, name)
+
 def normalizeSheetName(name):
     if name == 'execTime':
         return 'exec'
@@ -38,40 +124,134 @@ def normalizeSheetName(name):
 
     return name
 
-def convert_xlsx_to_csv(xlsx_file):
-    """Converts all sheets in an XLSX file to individual CSV files."""
+def convert_xlsx_to_csv(xlsx_file, workers=1, usePandas=False):
+    """Reads all sheets in an XLSX file into templateRows, writing each to its own
+    CSV file if writeCsv is set."""
+
+    reused = set()
+    with timings.stage('read workbook') as counts:
+        if usePandas:
+            import pandas as pd
+
+            # Read the Excel file, taking the rows from the csv text pandas makes
+            xls = pd.ExcelFile(xlsx_file)
+            sheets = []
+            for sheet_name in xls.sheet_names:
+                csvText = pd.read_excel(xls, sheet_name=sheet_name).to_csv(index=False)
+                sheets.append((sheet_name, list(csv.reader(io.StringIO(csvText)))))
+        else:
+            # sheets whose digests are those of the sheets last read from the workbook
+            # are not read again
+            digests = xlsxReader.sheetDigests(xlsx_file)
+            previous = {}
+            if digests is not None:
+                previous = previousSheets(xlsx_file)
+                reused = set(name for name, digest in digests if name in previous and previous[name][0] == digest)
+
+            # stream the rest with openpyxl, producing the same csv text as pandas
+            if os.path.getsize(xlsx_file) < parallelReadBytes:
+                workers = 1
+            read = {}
+            if digests is None or len(reused) < len(digests):
+                stale = None
+                if digests is not None:
+                    stale = [name for name, digest in digests if name not in reused]
+                read = dict(xlsxReader.readWorkbook(xlsx_file, workers, stale))
+
+            if digests is None:
+                sheets = list(read.items())
+            else:
+                sheets = [(name, previous[name][1] if name in reused else read[name]) for name, digest in digests]
+                if len(read) > 0 or set(previous) != set(name for name, digest in digests):
+                    saveSheets(xlsx_file, digests, sheets)
 
-    # Read the Excel file
-    xls = pd.ExcelFile(xlsx_file)
+        counts['reused'] = len(reused)
+        counts['sheets'] = len(sheets)
+        counts['rows'] = sum(len(rows) for _, rows in sheets)
+        counts['cells'] = sum(len(row) for _, rows in sheets for row in rows)
 
     # Iterate over each sheet
-    for sheet_name in xls.sheet_names:
-
-        # Read the sheet into a DataFrame
-        df = pd.read_excel(xlsx_file, sheet_name=sheet_name)
+    xls_sheet_names = []
+    for sheet_name, rows in sheets:
+        xls_sheet_names.append(sheet_name)
 
         sheet_name = normalizeSheetName(sheet_name)
         sheetNames.append(sheet_name) 
+        xlsxSheetNames[sheet_name] = xls_sheet_names[-1]
+
+        templateRows[sheet_name+"-sheet.csv"] = [[v.strip() for v in row] for row in rows]
 
         sheet_output_name = os.path.join(templateDir, sheet_name+"-sheet")
+        converted_files.append(sheet_output_name)
+        if not writeCsv:
+            if xls_sheet_names[-1] in reused:
+                print(f"Sheet '{sheet_name}' unchanged")
+            else:
+                print(f"Sheet '{sheet_name}' read")
+            continue
+
         # Create a CSV filename for the sheet
         csv_file = f"{sheet_output_name}.csv"
        
-        # Write the DataFrame to a CSV file
-        df.to_csv(csv_file, index=False)
+        # Write the sheet to a CSV file
+        with timings.stage('write csv', sheet=sheet_name) as counts:
+            xlsxReader.writeCsv(rows, csv_file)
+            counts['rows'] = len(rows)
 
         print(f"Sheet '{sheet_name}' converted to '{csv_file}'")
-        converted_files.append(sheet_output_name)
 
-    # if ipmap is not in xls.sheet_names we create an empty csv file for it
-    if 'ipmap' not in xls.sheet_names:
-        ipmap_name = os.path.join(templateDir, "ipmap-sheet.csv")
-        with open(ipmap_name,'w') as wf:
-            wf.write("Unnamed: 0,Unnamed: 1,Unnamed: 2,Unnamed: 3,Unnamed: 4,Unnamed: 5,Unnamed: 6")
-            wf.write(",,,,,,")
-
-def main():
-    global workingDir, csvDir, templateDir, script_present, yamlDir, descDir, convertDir, argsDir 
+    # if ipmap is not in the workbook we create an empty sheet for it, so that
+    # convert-ipmap.py still writes the (empty) feed description convert-cp.py reads
+    if 'ipmap' not in xls_sheet_names:
+        rows = [['Unnamed: {}'.format(idx) for idx in range(7)], ['']*7]
+        templateRows['ipmap-sheet.csv'] = rows
+        if writeCsv:
+            with timings.stage('write csv', sheet='ipmap') as counts:
+                xlsxReader.writeCsv(rows, os.path.join(templateDir, "ipmap-sheet.csv"))
+                counts['rows'] = len(rows)
+        sheetNames.append('ipmap')
+
+def previousSheets(xlsx_file):
+    """Returns a dictionary mapping the name of each sheet last read from the workbook
+    to its (digest, rows), from workbookCache or else from the sheetRowsFile left by the
+    last conversion in workingDir"""
+    path = os.path.abspath(xlsx_file)
+    if workbookCache is not None and path in workbookCache:
+        return workbookCache[path]
+
+    try:
+        with open(os.path.join(workingDir, sheetRowsFile), 'r') as rf:
+            saved = json.load(rf)
+    except (OSError, ValueError):
+        return {}
+
+    # the digests identify the sheets' contents, so they hold whichever workbook was read
+    return {name: (entry['digest'], entry['rows']) for name, entry in saved['sheets'].items()}
+
+def saveSheets(xlsx_file, digests, sheets):
+    """Records the sheets read from the workbook, with their digests, in workbookCache
+    if it is in use and in sheetRowsFile"""
+    path = os.path.abspath(xlsx_file)
+    latest = {}
+    for (name, digest), (_, rows) in zip(digests, sheets):
+        latest[name] = (digest, rows)
+    if workbookCache is not None:
+        workbookCache[path] = latest
+
+    saved = {'xlsx': path, 'sheets': {name: {'digest': digest, 'rows': rows} for name, (digest, rows) in latest.items()}}
+    tmpPath = os.path.join(workingDir, sheetRowsFile+'.tmp')
+    try:
+        with open(tmpPath, 'w') as wf:
+            json.dump(saved, wf)
+        os.replace(tmpPath, os.path.join(workingDir, sheetRowsFile))
+    except OSError:
+        pass
+
+def main(cmdline=None):
+    """Converts the workbook named on the command line, sys.argv unless cmdline is given.
+    Returns 'ok', or 'invalid' if some experiment failed validation; a conversion that
+    fails exits."""
+    global workingDir, csvDir, templateDir, script_present, yamlDir, descDir, convertDir, argsDir, cache, writeCsv
 
     parser = argparse.ArgumentParser()
     parser.add_argument(u'-name', metavar = u'name of system', dest=u'name', required=True)
@@ -87,18 +267,44 @@ def main():
     parser.add_argument(u'-yamlDir', metavar = u'directory where results are stored', dest=u'yamlDir', required=True)
     parser.add_argument(u'-descDir', metavar = u'directory where auxilary descriptions are stored', dest=u'descDir', required=True)
 
-    cmdline = sys.argv[1:]
-    if len(sys.argv) == 3 and sys.argv[1] == "-is":
-        cmdline = []
-        with open(sys.argv[2],"r") as rf:
-            for line in rf:
-                line = line.strip()
-                if len(line) == 0 or line.startswith('#'):
-                    continue
-                cmdline.extend(line.split()) 
+    parser.add_argument(u'-workers', metavar = u'number of processes validating experiments', 
+            dest=u'workers', type=int, required=False)
+    parser.add_argument(u'-scratchDir', metavar = u'directory where experiment workspaces are created', 
+            dest=u'scratchDir', required=False)
+    parser.add_argument(u'-failFast', action='store_true', required=False)
+
+    parser.add_argument(u'-cacheDir', metavar = u'directory holding the build cache', dest=u'cacheDir', required=False)
+    parser.add_argument(u'-cacheSize', metavar = u'size cap of the build cache in MB', dest=u'cacheSize', 
+            type=int, default=512, required=False)
+    parser.add_argument(u'-noCache', action='store_true', required=False)
+    parser.add_argument(u'-pandas', action='store_true', required=False)
+    parser.add_argument(u'-writeCsv', action='store_true', required=False)
+    parser.add_argument(u'-bundleDir', metavar = u'directory where the model of each experiment is written', 
+            dest=u'bundleDir', required=False)
+    parser.add_argument(u'-overlay', action='store_true', required=False)
+    parser.add_argument(u'-watch', action='store_true', required=False)
+    parser.add_argument(u'-timings', action='store_true', required=False)
+    parser.add_argument(u'-check', action='store_true', required=False)
+
+    if cmdline is None:
+        cmdline = sys.argv[1:]
+        if len(sys.argv) == 3 and sys.argv[1] == "-is":
+            cmdline = []
+            with open(sys.argv[2],"r") as rf:
+                for line in rf:
+                    line = line.strip()
+                    if len(line) == 0 or line.startswith('#'):
+                        continue
+                    cmdline.extend(line.split()) 
 
     args = parser.parse_args(cmdline)
 
+    # main may be called more than once in a process (see batchConvert.py), nothing
+    # from an earlier conversion is kept
+    cache = None
+    converterArgs.clear()
+    converterVersion.clear()
+
     name = args.name
     csvDir = args.csvDir
     yamlDir = args.yamlDir
@@ -143,6 +349,28 @@ def main():
     templateDir = commonDict['templateDir']
     workingDir = commonDict['workingDir']
 
+    if args.check and args.watch:
+        print(__file__, '-check and -watch cannot be used together', file=sys.stderr)
+        exit(1)
+
+    if args.overlay and args.bundleDir is None:
+        print(__file__, '-overlay needs -bundleDir', file=sys.stderr)
+        exit(1)
+
+    # -check leaves the build cache alone, as its converter runs write no yaml files
+    if not args.noCache and not args.check:
+        cacheDir = args.cacheDir
+        if cacheDir is None:
+            cacheHome = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+            cacheDir = os.path.join(cacheHome, 'pcesbld')
+        cache = buildCache.BuildCache(cacheDir, args.cacheSize*1024*1024)
+    elif args.watch:
+        # watching relies on the cache to re-run only the converters whose inputs
+        # changed, so it gets one that lasts as long as the process
+        cacheDir = tempfile.mkdtemp(prefix='pcesbld-cache-')
+        tempdirs.append(cacheDir)
+        cache = buildCache.BuildCache(cacheDir, args.cacheSize*1024*1024)
+
     fileTypes = ('cp', 'topo', 'mapping', 'ipmap', 'netparams', 'exec', 'experiments')
     optional = ('experiments','ipmap')
 
@@ -208,31 +436,457 @@ def main():
                         print(orgLine, file=wf) 
 
 
-    xlsx_file = args.xlsx  # Replace with your file path
-    convert_xlsx_to_csv(xlsx_file)
-
-    # csv files are in templateDir.  Copy them all to csvDir
-    template2csv()     
+    writeCsv = args.writeCsv
+    timings.enabled = args.timings
+    if args.check:
+        check(args, fileTypes)
+        return 'ok'
+
+    if not args.watch:
+        timedBuild(args, fileTypes)
+        if len(invalidExperiments) > 0:
+            return 'invalid'
+        return 'ok'
+
+    try:
+        watch(args, fileTypes)
+    finally:
+        for tempdir in tempdirs:
+            shutil.rmtree(tempdir, ignore_errors=True)
+
+def watch(args, fileTypes):
+    """Converts the workbook whenever it changes, until interrupted.  The process, with
+    its compiled converters, lasts from one conversion to the next, and the converters
+    whose inputs did not change have their results restored from the build cache."""
+    def fileState():
+        try:
+            st = os.stat(args.xlsx)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    state = fileState()
+    previousRows = None
+    while True:
+        try:
+            previousRows = timedBuild(args, fileTypes, previousRows)
+        except SystemExit:
+            pass
+        except Exception:
+            traceback.print_exc()
+        print('watching {} for changes'.format(args.xlsx))
+        sys.stdout.flush()
+
+        # wait for the file to change, and then to stay the same for one interval, 
+        # so that it is not read while it is being saved
+        try:
+            while True:
+                time.sleep(watchInterval)
+                newState = fileState()
+                if newState is None or newState == state:
+                    continue
+                state = newState
+                time.sleep(watchInterval)
+                if fileState() == state:
+                    break
+        except KeyboardInterrupt:
+            return
+
+def timedBuild(args, fileTypes, previousRows=None):
+    """Calls build.  With -timings, prints a summary of the time its stages took and
+    writes the full report to timings.json in workingDir, even if the build stops early"""
+    if not args.timings:
+        return build(args, fileTypes, previousRows)
+
+    timings.records.clear()
+    wall = time.perf_counter()
+    cpu = timings.cpuTime()
+    try:
+        return build(args, fileTypes, previousRows)
+    finally:
+        timings.report(os.path.join(workingDir, 'timings.json'), time.perf_counter()-wall, timings.cpuTime()-cpu)
+
+def build(args, fileTypes, previousRows=None):
+    """Converts the workbook: reads its sheets, validates every experiment and writes the
+    yaml files.  If previousRows, templateRows from an earlier conversion, is given and no
+    sheet has changed since, nothing is done.  Returns templateRows."""
+    sheetNames.clear()
+    templateRows.clear()
+    templates.clear()
+    converted_files.clear()
+    xlsxSheetNames.clear()
+    invalidExperiments.clear()
 
-    # make sure we can get to all the files we expect in template
+    xlsx_file = args.xlsx  # Replace with your file path
+    readers = args.workers
+    if readers is None:
+        readers = os.cpu_count() or 1
+    convert_xlsx_to_csv(xlsx_file, readers, args.pandas)
+
+    if previousRows is not None:
+        changed = [csvName for csvName in templateRows if templateRows[csvName] != previousRows.get(csvName)]
+        changed.extend([csvName for csvName in previousRows if csvName not in templateRows])
+        if len(changed) == 0:
+            print('no sheet of {} has changed'.format(xlsx_file))
+            return dict(templateRows)
+        print('changed sheets: {}'.format(', '.join([csvName[:-len('-sheet.csv')] for csvName in changed])))
+
+    # the converters are given the sheets in memory, unless csv files are asked for,
+    # in which case they are in templateDir.  Copy them all to csvDir
+    rows = templateRows
+    if writeCsv:
+        template2csv()     
+        rows = None
+
+    # make sure we can get to all the files we expect in template, and that every
+    # descDir file a converter reads is written by some other converter
+    sheets = [ft for ft in fileTypes if script_present[ft] and ft in sheetNames]
+    graph, msgs = converterGraph(sheets)
+    if len(msgs) > 0:
+        for msg in msgs:
+            print(msg)
+        exit(1)
 
     # convert experiments sheet to get yaml output description
-    transformations = [("convert-experiments.py", "experiments")] 
-
-    for scriptName, sheet in transformations:
-        convertSheet(scriptName, sheet, True)
+    with timings.labelled(phase='experiments'):
+        convertSheet("experiments", True, rows=rows)
 
-    # the experiment yaml is in yamlDir
-    experiment_input_file = os.path.join(yamlDir, 'experiments.yaml')
-    with open(experiment_input_file, 'r') as rf:
-        exprmnts = yaml.safe_load(rf)
+    # the experiments are described in descDir
+    exprmnts = Experiments(os.path.join(descDir, 'exprmnt.json'))
    
-    # make a map of the symbols to apply to each sheet
+    # make a map of the symbols to apply to each sheet.  A workbook without experiments
+    # has none, and is converted as it is
     sheet2symbol = {}
-    example = exprmnts[0]
-    expKeys = example.keys()
+    if len(exprmnts) > 0:
+        sheet2symbol = symbolSheets(exprmnts[0])
+
+    # find the symbol occurrences in each sheet once, rather than for every experiment
+    for sheet in sheetNames:
+        templates[sheet] = symbolTemplate.SheetTemplate(templateRows[sheet+'-sheet.csv'])
+
+    # each experiment is validated in its own scratch workspace, so the experiments
+    # can be spread across a pool of worker processes
+    scratchDir = args.scratchDir
+    if scratchDir is None and os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        scratchDir = '/dev/shm'
+
+    workers = args.workers
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(exprmnts)))
+
+    # the experiments sheet is not re-converted for each experiment, the workspaces
+    # get the descriptions it wrote from descDir
+    validationGraph = {}
+    for sheet, deps in graph.items():
+        if sheet != 'experiments':
+            validationGraph[sheet] = [dep for dep in deps if dep != 'experiments']
+
+    with timings.labelled(phase='validate'), timings.stage('validate experiments') as counts:
+        invalid = validateExperiments(exprmnts, sheet2symbol, validationGraph, scratchDir, workers, args.failFast)
+        counts['experiments'] = len(exprmnts)
+
+    invalidExperiments.extend(invalid)
+    if len(invalid) > 0:
+        print('experiments that failed validation: {}'.format(', '.join(invalid)))
+        if args.failFast:
+            exit(1)
+
+    # errors that crop up due to individual experiments have been reported, now
+    # do the transformation on the csvs that carry the symbols
+
+    # copy all the templated files into csvDir for processing
+    if writeCsv:
+        template2csv()
 
-    for code in expKeys:
+    # do 'em all, converters that don't depend on each other running concurrently
+    print("Transform csv files with symbols to yaml files with symbols")
+    with timings.labelled(phase='final'), timings.stage('final conversion') as counts:
+        runConverters(graph, False, workers=workers, rows=rows)
+        counts['sheets'] = len(graph)
+
+    # optionally, also the yaml files of each experiment with its values in place
+    if args.bundleDir is not None:
+        print("Write the model of each experiment to {}".format(args.bundleDir))
+        with timings.labelled(phase='bundle'), timings.stage('write bundles') as counts:
+            writeBundles(exprmnts, sheet2symbol, validationGraph, scratchDir, workers, args.bundleDir, args.overlay)
+            counts['experiments'] = len(exprmnts)
+
+    # the worker processes each count only the entries they stored themselves, so the
+    # cache is brought within its cap once more, with all of them counted
+    if cache is not None:
+        cache.evict()
+
+    return dict(templateRows)
+
+def check(args, fileTypes):
+    """Validates the workbook as a conversion would, every converter being run in this
+    process with validation on, but writing no yaml files and nothing to yamlDir or descDir.
+    The problems found are printed with the sheet, row and column they were found at, 
+    and written as JSON to checkFile in workingDir.  Exits with status 1 if there are errors."""
+    global descDir, emitYaml
+
+    wall = time.perf_counter()
+    sheetNames.clear()
+    templateRows.clear()
+    templates.clear()
+    converted_files.clear()
+    xlsxSheetNames.clear()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        convert_xlsx_to_csv(args.xlsx, 1, args.pandas)
+
+    problems = []
+    sheets = [ft for ft in fileTypes if script_present[ft] and ft in sheetNames]
+    graph, msgs = converterGraph(sheets)
+    for msg in msgs:
+        problems.append(checkProblem(None, 'error', msg))
+
+    scratchDir = args.scratchDir
+    if scratchDir is None and os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        scratchDir = '/dev/shm'
+    runDir = tempfile.mkdtemp(prefix='pcesbld-check-', dir=scratchDir)
+    try:
+        if len(msgs) == 0:
+            # the converter descriptions start out as those of the experiments sheet
+            dirs = {}
+            for dirName in ('csvDir', 'yamlDir', 'descDir'):
+                dirs[dirName] = os.path.join(runDir, 'experiments', dirName)
+                os.makedirs(dirs[dirName])
+            descDir = dirs['descDir']
+
+            exprmnts = []
+            completed = True
+            if 'experiments' in graph:
+                completed, output = convertSheetJob('experiments', True, dirs, templateRows)
+                problems.extend(checkProblems('experiments', completed, output, templateRows['experiments-sheet.csv']))
+                if completed:
+                    exprmnts = Experiments(os.path.join(descDir, 'exprmnt.json'))
+
+            # a workbook without experiments is checked as it is
+            if len(exprmnts) == 0:
+                exprmnts = [{'name': None}]
+
+            if completed:
+                emitYaml = False
+                try:
+                    problems.extend(checkExperiments(exprmnts, graph, runDir))
+                finally:
+                    emitYaml = True
+    finally:
+        shutil.rmtree(runDir, ignore_errors=True)
+
+    errors = len([problem for problem in problems if problem['severity'] == 'error'])
+    for problem in problems:
+        location = args.xlsx
+        if problem['sheet'] is not None:
+            location += ':' + problem['sheet']
+            if problem['row'] is not None:
+                location += '!{}{}'.format(problem['column'], problem['row'])
+        line = '{}: {}: {}'.format(location, problem['severity'], problem['message'])
+        if len(problem['experiments']) > 0:
+            line += ' (experiments {})'.format(', '.join(problem['experiments']))
+        print(line)
+
+    with open(os.path.join(workingDir, checkFile), 'w') as wf:
+        json.dump({'xlsx': args.xlsx, 'problems': problems}, wf, indent=1)
+
+    print('{} errors, {} warnings in {} ({:.2f} s)'.format(errors, len(problems)-errors, args.xlsx,
+        time.perf_counter()-wall))
+    if errors > 0:
+        exit(1)
+
+def checkExperiments(exprmnts, graph, runDir):
+    """Makes the distinct validation runs of the experiments (see planRuns) one after the
+    other, returning the problems they report, each naming the experiments it affects"""
+    sheet2symbol = symbolSheets(exprmnts[0])
+    for sheet in sheetNames:
+        templates[sheet] = symbolTemplate.SheetTemplate(templateRows[sheet+'-sheet.csv'])
+
+    validationGraph = {}
+    for sheet, deps in graph.items():
+        if sheet != 'experiments':
+            validationGraph[sheet] = [dep for dep in deps if dep != 'experiments']
+
+    constraints = symbolConstraints.SymbolConstraints(templates, 
+        [sheet for sheet in validationGraph if sheet in sheet2symbol])
+    runs, plans = planRuns(exprmnts, sheet2symbol, validationGraph, constraints)
+
+    problems = []
+    users = {}
+    found = {}
+    for pidx, (exprmntName, plan, message) in enumerate(plans):
+        if plan is not None and message is not None:
+            # values not meeting the constraints of their symbols, at the cells using them
+            for sheet, cell, msg in constraints.problems(experimentRemap(exprmnts[pidx])):
+                key = (sheet, cell, msg)
+                if key not in found:
+                    found[key] = checkProblem(sheet, 'error', msg, cell)
+                    problems.append(found[key])
+                found[key]['experiments'].append(exprmntName)
+            continue
+        if plan is None:
+            # the symbols no experiment value replaces, in the first cell holding one
+            remap = experimentRemap(exprmnts[pidx])
+            for sheet in sheetNames:
+                if sheet == 'experiments':
+                    continue
+                rows = templates[sheet].render(remap if sheet in sheet2symbol else {})
+                cells = [(rowIdx, colIdx) for rowIdx, row in enumerate(rows) for colIdx, text in enumerate(row)
+                    if symbolTemplate.hasSymbol(text)]
+                if len(cells) > 0:
+                    rowIdx, colIdx = cells[0]
+                    msg = 'undefined symbol in {}'.format(rows[rowIdx][colIdx])
+                    problems.append(checkProblem(sheet, 'error', msg, (rowIdx, colIdx),
+                        [name for name in [exprmntName] if name is not None]))
+            continue
+        for idx in plan.values():
+            users.setdefault(idx, []).append(exprmntName)
+
+    # the same problem reported by runs for different experiments is listed once
+    for idx, result in makeRuns(runs, sheet2symbol, runDir, True, 1):
+        if result is None:
+            continue
+        sheet, remap, deps, exprmntName = runs[idx]
+        rows = templates[sheet].render(remap) if sheet in sheet2symbol else templateRows[sheet+'-sheet.csv']
+        for problem in checkProblems(sheet, result[0], result[1], rows):
+            key = (problem['sheet'], problem['row'], problem['column'], problem['message'])
+            if key not in found:
+                found[key] = problem
+                problems.append(problem)
+            for name in users.get(idx, []):
+                if name is not None and name not in found[key]['experiments']:
+                    found[key]['experiments'].append(name)
+
+    # experiments are named in the order of the experiments sheet
+    order = {plan[0]: pidx for pidx, plan in enumerate(plans)}
+    for problem in problems:
+        problem['experiments'].sort(key=lambda name: order[name])
+
+    return problems
+
+def checkProblems(sheet, completed, output, rows):
+    """Returns the problems in what the converter for sheet printed, errors if it did
+    not complete and warnings if it did, each located at the cell of rows it is about"""
+    severity = 'warning' if completed else 'error'
+    lines = [line.strip() for line in output.splitlines() if len(line.strip()) > 0]
+    if not completed and any(line.startswith('Traceback') for line in lines):
+        # the converter failed rather than reporting a problem
+        return [checkProblem(sheet, severity, 'convert-{}.py failed: {}'.format(sheet, lines[-1]))]
+    return [checkProblem(sheet, severity, line, locateMessage(line, sheet, rows)) for line in lines]
+
+def checkProblem(sheet, severity, message, cell=None, experiments=None):
+    """Returns a problem found by -check, with the sheet's name in the workbook and
+    the row and column of cell, (row index, column index) in the sheet's rows"""
+    problem = {'sheet': None, 'row': None, 'column': None, 'severity': severity, 
+        'message': message, 'experiments': list(experiments or [])}
+    if sheet is not None:
+        problem['sheet'] = xlsxSheetNames.get(sheet, sheet)
+    if cell is not None:
+        rowIdx, colIdx = cell
+        column = ''
+        colIdx += 1
+        while colIdx > 0:
+            colIdx, rem = divmod(colIdx-1, 26)
+            column = chr(ord('A')+rem) + column
+        problem['row'] = rowIdx + 1
+        problem['column'] = column
+    return problem
+
+def dataRows(sheet, rows):
+    """Returns the indices of the rows of the sheet that hold data, not the header, the
+    comments or the rows that start the sections of the sheet"""
+    if sheet in symbolConstraints.sectionMarkers:
+        sections = symbolConstraints.rowSections(sheet, rows)
+        return [rowIdx for rowIdx in range(1, len(rows)) if sections[rowIdx] is not None]
+    return [rowIdx for rowIdx in range(1, len(rows)) if len(rows[rowIdx]) == 0 or rows[rowIdx][0].find('#') == -1]
+
+def locateMessage(message, sheet, rows):
+    """Returns the (row index, column index) of the cell of rows a converter's message is
+    about, the cell holding the first of the values the message quotes (or, if it quotes
+    none, of its words) in the data row of the sheet holding the most of them.  Returns
+    None if no data row holds any, or more than one holds the most, the message then
+    being placed at the sheet alone."""
+    tokens = []
+    for match in quotedPattern.finditer(message):
+        if match.group(3) is not None:
+            tokens.extend([token.strip() for token in match.group(3).split(',')])
+        else:
+            tokens.append(match.group(1) if match.group(1) is not None else match.group(2))
+    if len(tokens) == 0:
+        tokens = [word.strip('"\'(),.:;') for word in message.split()]
+    tokens = [token for token in tokens if len(token) > 0]
+
+    # a token matches a cell holding just it
+    held = {}
+    for rowIdx in dataRows(sheet, rows):
+        count = len(set(token for token in tokens if token in rows[rowIdx]))
+        if count > 0:
+            held[rowIdx] = count
+    best = [rowIdx for rowIdx, count in held.items() if count == max(held.values())]
+    if len(best) != 1:
+        return None
+
+    for token in tokens:
+        if token in rows[best[0]]:
+            return best[0], rows[best[0]].index(token)
+
+class Experiments:
+    """The experiments of the experiments sheet, from the description convert-experiments.py
+    writes of their names and, column by column, the values they give the variables.  Each
+    experiment is made, as a dictionary mapping 'name' and each variable to its value, only
+    when it is reached, so the experiments are never all held at once."""
+    def __init__(self, exprmnt_file):
+        with open(exprmnt_file, 'r') as rf:
+            desc = json.load(rf)
+        self.names = desc['names']
+        self.columns = desc['columns']
+
+        # the index of the first experiment of each run of each column, so an experiment
+        # is found by bisection rather than by walking the runs before it
+        self.runStarts = []
+        for column in self.columns:
+            starts = []
+            first = 0
+            for start, step, count in column['runs']:
+                starts.append(first)
+                first += count
+            self.runStarts.append(starts)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        columns = [self.columnValues(column) for column in self.columns]
+        for name in self.names:
+            exprmnt = {'name': name}
+            for column, values in zip(self.columns, columns):
+                exprmnt[column['variable']] = next(values)
+            yield exprmnt
+
+    def __getitem__(self, idx):
+        if idx < 0 or idx >= len(self.names):
+            raise IndexError('experiment index out of range')
+        exprmnt = {'name': self.names[idx]}
+        for column, starts in zip(self.columns, self.runStarts):
+            runIdx = bisect.bisect_right(starts, idx)-1
+            start, step, count = column['runs'][runIdx]
+            exprmnt[column['variable']] = column['values'][start+step*(idx-starts[runIdx])]
+        return exprmnt
+
+    @staticmethod
+    def columnValues(column):
+        """Generator giving the value of the column for each experiment in turn"""
+        values = column['values']
+        for start, step, count in column['runs']:
+            for idx in range(count):
+                yield values[start+step*idx]
+
+def symbolSheets(exprmnt):
+    """Returns a dictionary mapping each sheet to the list of symbols the experiment's
+    columns apply to it"""
+    sheet2symbol = {}
+    for code in exprmnt.keys():
         if code=='name' or len(code)==0:
             continue
 
@@ -243,179 +897,938 @@ def main():
             sheets = sheetNames
         
         for sheet in sheets:
-            sheet = sheet.strip()
+            sheet = normalizeSheetName(sheet.strip())
             if sheet not in sheet2symbol:
                 sheet2symbol[sheet] = []
             sheet2symbol[sheet].append(pieces[0].strip())
-        
-    # for each experiment copy the files to be modified from templateDir to csvDir and 
-    # apply the transformations
 
+    return sheet2symbol
+
+def workerState():
+    return (convertDir, workingDir, templateDir, descDir, script_present, sheetNames, cache,
+        templateRows, templates, writeCsv, timings.enabled, dict(timings.context))
+
+def initWorker(*state):
+    """Sets the module-level directories and tables in a worker process"""
+    global convertDir, workingDir, templateDir, descDir, script_present, sheetNames, cache, \
+        templateRows, templates, writeCsv
+    convertDir, workingDir, templateDir, descDir, script_present, sheetNames, cache, \
+        templateRows, templates, writeCsv, timings.enabled, labels = state
+
+    # the args files are those of the conversion the state is of, a worker shared by
+    # several conversions (see makeExecutor) having read others
+    converterArgs.clear()
+
+    # a forked worker starts out with the records of the process that made it
+    timings.records.clear()
+    timings.context.update(labels)
+
+def workerPool(workers):
+    """Returns an executor with workers processes set up with the module state, from
+    makeExecutor if it is set"""
+    if makeExecutor is not None:
+        return makeExecutor(workers, workerState())
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers, 
+        initializer=initWorker, initargs=workerState())
+
+def timedJob(job, *args):
+    """Runs job in a worker process, returning its result with the timings recorded while it ran"""
+    result = job(*args)
+    return result, timings.drain()
+
+def experimentRemap(exprmnt):
+    """Returns a dictionary mapping the experiment's symbols to their values, as strings"""
+    remap = {}
+    for code, value in exprmnt.items():
+        value = str(value)
+        if code == 'name' or len(code) == 0:
+            continue
+        pieces = code.split(',')
+        token = pieces[0].strip()
+        remap[token] = value 
+    return remap
+
+def planRuns(exprmnts, sheet2symbol, graph, constraints=None, symbolic=None):
+    """Works out the distinct converter runs converting the sheets of each experiment takes.  A run is
+    identified by its sheet, the text substituted for each symbol occurrence in the sheet
+    (which determines the sheet's substituted content), and the runs of the converters
+    it depends on, so experiments giving a sheet and the sheets upstream of it the same 
+    content share the run.  Returns the runs as a list of (sheet, remap, indices of the 
+    runs it depends on, name of the first experiment making it) tuples, ordered so that
+    a run follows those it depends on, and for each experiment a tuple of its name, a dictionary mapping sheets to the index
+    of their run, and the message to report if it leaves symbols unresolved, in which
+    case there is no dictionary and the experiments after it are left out.
+
+    Given constraints, a symbolConstraints.SymbolConstraints, the values of each experiment
+    are first checked against them.  An experiment whose values do not meet them gets no
+    runs, its plan being an empty dictionary and its message the problems found, and the
+    value symbols of a sheet are given the values of the first experiment meeting them, 
+    so that experiments differing only in those share the sheet's run.  Given symbolic, a
+    dictionary mapping sheets to sets of symbols, those symbols are left in place in the
+    sheets rather than given the experiment's values."""
+    runs = []
+    runIdx = {}
+    plans = []
     for exprmnt in exprmnts:
-    
-        exprmntName = exprmnt['name']
-        print('validating experiment {}'.format(exprmntName))
-
-        # copy the files to be modified
-        for sheet in sheet2symbol:
-            templateFile = os.path.join(templateDir, sheet+'-sheet.csv')
-            inputFile = os.path.join(csvDir, sheet+'-sheet.csv')
-            shutil.copyfile(templateFile, inputFile)
- 
-        remap = {}
-        for code, value in exprmnt.items():
-            value = str(value)
-            if code == 'name' or len(code) == 0:
-                continue
-            pieces = code.split(',')
-            token = pieces[0].strip()
-            remap[token] = value 
-
-        for sheet, symbolList in sheet2symbol.items():
-            inputFile = os.path.join(csvDir, sheet+'-sheet.csv')
-            tmpFile = os.path.join(csvDir, 'tmp-'+sheet+'-sheet.csv')
-
-            with open(inputFile, 'r') as rf:
-                with open(tmpFile, 'w') as wf:
-                    for line in rf:
-                        for symbol, value in remap.items():
-                            if line.find(symbol) > -1:
-                                strSymbol = 'str('+symbol+')'
-                                if line.find(strSymbol) > -1:
-                                    #valueStr = '"'+value+'"'
-                                    valueStr = value
-                                    line = line.replace(strSymbol, valueStr)
-                                    continue
-                                intSymbol = 'int('+symbol+')'
-                                if line.find(intSymbol) > -1:
-                                    line = line.replace(intSymbol, str(value))
-                                    continue
- 
-                                boolSymbol = 'bool('+symbol+')'
-                                if line.find(boolSymbol) > -1:
-                                    line = line.replace(boolSymbol, str(boolRep(value)))
-                                    continue
- 
-                                floatSymbol = 'float('+symbol+')'
-                                if line.find(floatSymbol) > -1:
-                                    line = line.replace(floatSymbol, str(value))
-                                    continue
- 
-                        wf.write(line)
+        remap = experimentRemap(exprmnt)
 
-            # move the copied version back
-            shutil.copyfile(tmpFile, inputFile)                 
-            os.remove(tmpFile)
-
-        # check ALL files for symbols
+        # check ALL sheets for symbols
         unresolved = {}
         for sheet in sheetNames:
             if sheet == 'experiments':
                 continue
-            inputFile = os.path.join(csvDir, sheet+'-sheet.csv')
-            with open(inputFile, 'r') as rf:
-                for line in rf:
-                    if line.find('$') > -1 or line.find('@') > -1:
-                        unresolved[sheet] = True
-                        break
+            if not templates[sheet].resolved(remap if sheet in sheet2symbol else {}):
+                unresolved[sheet] = True
 
         if len(unresolved) > 0:
             sheets = unresolved.keys()
-            print('undefined symbols in sheets {}'.format(sheets))
-            exit(0)
+            plans.append((exprmnt['name'], None, 'undefined symbols in sheets {}\n'.format(sheets)))
+            break
+
+        if constraints is not None:
+            problems = constraints.problems(remap)
+            if len(problems) > 0:
+                msgs = list(dict.fromkeys([msg for sheet, cell, msg in problems]))
+                plans.append((exprmnt['name'], {}, ''.join([msg+'\n' for msg in msgs])))
+                continue
 
-        # all the symbol replacements are done, so convert all the sheets, (again)
-        # N.B. a sheet that was modified may generate aux files that depend on the
-        # modification, which means that downstream transformations depend on it, so
-        # we broad-brush the conversions 
-        transformations = [("convert-exec.py", "exec"), ("convert-topo.py", "topo"), 
-            ("convert-ipmap.py", "ipmap"), ("convert-cp.py", "cp"),
-            ("convert-map.py", "map"), ("convert-netparams.py", "netparams")]
+        plan = {}
+        for sheet, deps in graph.items():
+            values = ()
+            sheetRemap = remap
+            if sheet in sheet2symbol:
+                if constraints is not None:
+                    sheetRemap = constraints.representative(sheet, remap)
+                if symbolic is not None and len(symbolic.get(sheet, ())) > 0:
+                    sheetRemap = {symbol: value for symbol, value in sheetRemap.items() if symbol not in symbolic[sheet]}
+                values = templates[sheet].slotValues(sheetRemap)
+            key = (sheet, values, tuple(plan[dep] for dep in deps))
+            if key not in runIdx:
+                runIdx[key] = len(runs)
+                runs.append((sheet, sheetRemap, [plan[dep] for dep in deps], exprmnt['name']))
+            plan[sheet] = runIdx[key]
+
+        plans.append((exprmnt['name'], plan, None))
+
+    return runs, plans
+
+def validateExperiments(exprmnts, sheet2symbol, graph, scratchDir, workers, failFast):
+    """Validates the experiments, each distinct converter run (see planRuns) being
+    made once, in its own scratch workspace, with a pool of worker processes if workers
+    is more than 1.  The report of each experiment is put together from the results of
+    its runs.  Experiments are reported in the order of the experiments sheet, unless 
+    failFast is set, in which case they are reported as they complete and the first to
+    fail validation stops the validation.  The values of the experiments are checked
+    against the constraints of their symbols first, so that only an experiment changing
+    what a sheet converts to has the sheet converted.  Returns the names of the experiments 
+    that failed validation."""
+    constraints = symbolConstraints.SymbolConstraints(templates, [sheet for sheet in graph if sheet in sheet2symbol])
+    with timings.stage('plan runs') as counts:
+        runs, plans = planRuns(exprmnts, sheet2symbol, graph, constraints)
+        counts['experiments'] = len(plans)
+        counts['runs'] = len(runs)
+    runDir = tempfile.mkdtemp(prefix='pcesbld-', dir=scratchDir)
+    results = {}
+    invalid = []
+    reported = set()
+
+    # reports the experiments whose runs are all done, returning False if we are to stop
+    def report():
+        for pidx, (exprmntName, plan, message) in enumerate(plans):
+            if pidx in reported:
+                continue
+            if plan is not None and not all(idx in results for idx in plan.values()):
+                if failFast:
+                    continue
+                return True
+            reported.add(pidx)
+            status, output = experimentResult(plan, message, graph, results)
+            if not reportExperiment(exprmntName, status, output, invalid) and failFast:
+                return False
+        return True
+
+    runsMade = makeRuns(runs, sheet2symbol, runDir, True, workers)
+    try:
+        for idx, result in runsMade:
+            results[idx] = result
+            if not report():
+                break
+        else:
+            report()
+    finally:
+        runsMade.close()
+        shutil.rmtree(runDir, ignore_errors=True)
+
+    return invalid
+
+def writeBundles(exprmnts, sheet2symbol, graph, scratchDir, workers, bundleDir, overlay=False):
+    """Writes the yaml files of the model of each experiment, with the experiment's values 
+    in place of the symbols, into a directory of bundleDir named for the experiment.  The
+    converter runs are planned as they are for validation (see planRuns), so a run whose
+    input is the same for several experiments is made once, and a file that comes out
+    the same for several experiments is written once, the others being hard links to it.
+
+    The value symbols of each sheet (see symbolConstraints) are left in place when the
+    sheet is converted, and the paths at which they land in its yaml files are recorded
+    (see symbolPaths), so that an experiment's files are made by setting its values at
+    those paths and writing the model out again, rather than by converting the sheet for
+    each experiment.  A sheet whose converter turns out not to carry the values through
+    unchanged, checked against a probe run with the values of the first experiment in
+    place, is converted for the values of each experiment instead.
+
+    With overlay, the model of the first experiment is written to bundleDir/base and that of
+    each experiment as an overlay of the base (see modelOverlay and Overlays).  Either way
+    a manifest of the experiments grouped by their files is written (see writeManifest)."""
+    constraints = symbolConstraints.SymbolConstraints(templates, [sheet for sheet in graph if sheet in sheet2symbol])
+    symbolic = {}
+    for sheet, symbols in constraints.valueSymbols.items():
+        if len(symbols) > 0:
+            symbolic[sheet] = symbols
+
+    runDir = tempfile.mkdtemp(prefix='pcesbld-', dir=scratchDir)
+    try:
+        while True:
+            with timings.stage('plan runs') as counts:
+                runs, plans = planRuns(exprmnts, sheet2symbol, graph, symbolic=symbolic)
+                probes = planProbes(exprmnts, runs, plans, symbolic)
+                counts['experiments'] = len(plans)
+                counts['runs'] = len(runs)
+
+            # each attempt has workspaces of its own
+            attemptDir = tempfile.mkdtemp(dir=runDir)
+            results = {}
+            probeRuns = sorted(probe for runProbes in probes.values() for probe in runProbes.values())
+            probeRuns = [probe for probeIdx, probe in probeRuns]
+            runsMade = makeRuns(runs + probeRuns, sheet2symbol, attemptDir, False, workers)
+            try:
+                for idx, result in runsMade:
+                    results[idx] = result
+            finally:
+                runsMade.close()
+
+            paths, failed = recordPaths(runs, probes, results, attemptDir, symbolic)
+            if len(failed) == 0:
+                break
+
+            for sheet, problem in failed.items():
+                print('sheet {} is converted for each experiment, as its {}'.format(sheet, problem))
+                del symbolic[sheet]
+
+        # the first copy of each file written, by hash of the file, and the file written for
+        # each distinct set of values a patched file depends on
+        written = {}
+        rendered = {}
+
+        # the digests of the files of each experiment, and the sizes of the first experiment's
+        digests = []
+        sizes = None
+        overlays = None
+        if overlay:
+            overlays = Overlays(bundleDir)
+        with timings.stage('patch') as counts:
+            for exprmnt, (exprmntName, plan, message) in zip(exprmnts, plans):
+                if plan is None:
+                    continue
 
-        for scriptName, sheet in transformations:
-            if sheet in sheetNames:
-                convertSheet(scriptName, sheet, True)
+                status, output = experimentResult(plan, message, graph, results)
+                if status != 'valid':
+                    print('the model of experiment {} is incomplete'.format(exprmntName))
+                    print(output, end='')
+
+                remap = None
+                model = {}
+                files = {}
+                exprmntDir = os.path.join(bundleDir, exprmntName)
+                if overlays is None:
+                    os.makedirs(exprmntDir, exist_ok=True)
+                for sheet in graph:
+                    idx = plan[sheet]
+                    runYamlDir = os.path.join(attemptDir, str(idx), 'yamlDir')
+                    if not os.path.isdir(runYamlDir):
+                        continue
+                    for fileName in sorted(os.listdir(runYamlDir)):
+                        dstPath = os.path.join(exprmntDir, fileName)
+                        filePaths = paths.get(idx, {}).get(fileName)
+                        if overlays is not None:
+                            if filePaths is not None and len(filePaths.slots) > 0:
+                                if remap is None:
+                                    remap = experimentRemap(exprmnt)
+                                model[fileName] = (filePaths, remap)
+                            else:
+                                model[fileName] = os.path.join(runYamlDir, fileName)
+                            continue
+
+                        if filePaths is None or len(filePaths.slots) == 0:
+                            files[fileName] = writeBundleFile(os.path.join(runYamlDir, fileName), dstPath, written)
+                            continue
+
+                        if remap is None:
+                            remap = experimentRemap(exprmnt)
+                        key = (idx, fileName, tuple(remap.get(symbol) for symbol in filePaths.symbols()))
+                        if key in rendered:
+                            files[fileName] = writeBundleFile(rendered[key], dstPath, written)
+                            continue
+                        files[fileName] = writeBundleData(filePaths.render(remap).encode(), dstPath, written)
+                        rendered[key] = dstPath
+                        counts['files'] = counts.get('files', 0) + 1
+
+                if overlays is not None:
+                    counts['entries'] = counts.get('entries', 0) + overlays.write(exprmntName, model)
+                    files = overlays.digests[exprmntName]
+                    exprmntDir = os.path.join(bundleDir, 'base')
+                if sizes is None:
+                    sizes = {fileName: os.path.getsize(os.path.join(exprmntDir, fileName)) for fileName in files}
+                digests.append((exprmntName, files))
+            if overlays is not None:
+                overlays.close()
+
+        with timings.stage('manifest') as counts:
+            writeManifest(bundleDir, digests, sizes or {})
+            counts['experiments'] = len(digests)
+    finally:
+        shutil.rmtree(runDir, ignore_errors=True)
+
+def planProbes(exprmnts, runs, plans, symbolic):
+    """Returns the probe runs of the runs (see planRuns) of sheets with symbols left in
+    place, a run having a probe for each shape (see symbolPaths.valueShapes) the experiments
+    using it give the symbols, made with the values of the first of them to give it.
+    Returns a dictionary mapping the index of each run to a dictionary mapping the shapes
+    to the index of their probe and the probe."""
+    probes = {}
+    count = len(runs)
+    for exprmnt, (exprmntName, plan, message) in zip(exprmnts, plans):
+        if plan is None:
+            continue
+        remap = None
+        for sheet, idx in plan.items():
+            if sheet not in symbolic:
+                continue
+            if remap is None:
+                remap = experimentRemap(exprmnt)
+            shape = symbolPaths.valueShapes(remap, sorted(symbolic[sheet]))
+            runProbes = probes.setdefault(idx, {})
+            if shape in runProbes:
+                continue
+            sheet, runRemap, deps, name = runs[idx]
+            runProbes[shape] = (count, (sheet, remap, deps, exprmntName))
+            count += 1
+    return probes
+
+def recordPaths(runs, probes, results, runDir, symbolic):
+    """Records where the symbols left in place land in the yaml files of each run with 
+    probes, checking the files against each probe's.  Returns a dictionary mapping the
+    index of each such run to a dictionary mapping the names of its yaml files to their 
+    symbolPaths.SymbolPaths, and a dictionary mapping the sheets whose runs fail the
+    check to what is wrong"""
+    paths = {}
+    failed = {}
+    for idx, runProbes in probes.items():
+        sheet = runs[idx][0]
+        if sheet in failed:
+            continue
 
-        # errors that crop up due to individual experiments have been reported, now
-        # do the transformation on the csvs that carry the symbols
+        for result in [results[idx]] + [results[probeIdx] for probeIdx, probe in runProbes.values()]:
+            if result is None or not result[0]:
+                failed[sheet] = 'conversion with the symbols in place did not complete'
+        if sheet in failed:
+            continue
 
-    # copy all the templated files into csvDir for processing
-    template2csv()
+        workspace = os.path.join(runDir, str(idx))
+        descs = readFiles(os.path.join(workspace, 'descDir'))
+        files = readFiles(os.path.join(workspace, 'yamlDir'))
+        filePaths = {}
+        for fileName, data in files.items():
+            filePaths[fileName] = symbolPaths.SymbolPaths(data.decode(), symbolic[sheet])
+
+        for probeIdx, probe in runProbes.values():
+            # the values must not reach the descriptions read by other sheets
+            probeWorkspace = os.path.join(runDir, str(probeIdx))
+            if descs != readFiles(os.path.join(probeWorkspace, 'descDir')):
+                failed[sheet] = 'descriptions for other sheets depend on the values'
+                break
+
+            probeFiles = readFiles(os.path.join(probeWorkspace, 'yamlDir'))
+            if set(files) != set(probeFiles):
+                failed[sheet] = 'yaml files depend on the values'
+                break
+
+            for fileName, data in files.items():
+                if len(filePaths[fileName].slots) == 0:
+                    if data != probeFiles[fileName]:
+                        failed[sheet] = '{} depends on the values'.format(fileName)
+                        break
+                elif not filePaths[fileName].verify(probeFiles[fileName].decode(), probe[1]):
+                    failed[sheet] = '{} {}'.format(fileName, filePaths[fileName].problem)
+                    break
+            if sheet in failed:
+                break
+
+        if sheet not in failed:
+            paths[idx] = filePaths
+
+    return paths, failed
+
+def readFiles(directory):
+    """Returns a dictionary mapping the names of the files in directory to their contents"""
+    files = {}
+    if os.path.isdir(directory):
+        for fileName in os.listdir(directory):
+            with open(os.path.join(directory, fileName), 'rb') as rf:
+                files[fileName] = rf.read()
+    return files
+
+def writeBundleFile(srcPath, dstPath, written):
+    """Puts the file at srcPath at dstPath, as a hard link to a file with the same contents
+    already in written, a dictionary mapping file hashes to paths, if there is one.  Returns
+    the hash of the file."""
+    with open(srcPath, 'rb') as rf:
+        return writeBundleData(rf.read(), dstPath, written)
+
+def writeBundleData(data, dstPath, written):
+    """Writes data to dstPath, or makes dstPath a hard link to a file with the same contents
+    already in written, as writeBundleFile does"""
+    digest = hashlib.sha256(data).hexdigest()
+
+    if os.path.lexists(dstPath):
+        os.remove(dstPath)
+
+    if digest in written:
+        try:
+            os.link(written[digest], dstPath)
+            return digest
+        except OSError:
+            # e.g. a filesystem without hard links
+            pass
+
+    with open(dstPath, 'wb') as wf:
+        wf.write(data)
+    written.setdefault(digest, dstPath)
+    return digest
+
+def orderExperiments(digests, sizes):
+    """Returns the (experiment name, file digests) pairs of digests in the order they are best
+    run in, those with the same heaviest file (the largest, by sizes) next to each other,
+    and among them those with the same next heaviest file, and so on.  Otherwise the order
+    of the experiments is kept, a file's digests being ordered by where they first appear."""
+    heaviest = sorted(sizes, key=lambda fileName: -sizes[fileName])
+    firsts = {fileName: {} for fileName in heaviest}
+    keys = []
+    for pos, (exprmntName, files) in enumerate(digests):
+        key = []
+        for fileName in heaviest:
+            digest = files.get(fileName)
+            key.append(firsts[fileName].setdefault(digest, len(firsts[fileName])))
+        keys.append((tuple(key), pos))
+    return [digests[pos] for key, pos in sorted(keys)]
+
+def writeManifest(bundleDir, digests, sizes):
+    """Writes manifest.json to bundleDir, listing the experiments in the order they are best
+    run in (see orderExperiments) with the digests of their files and the files that differ
+    from those of the experiment before, and grouping them by the digest of each file"""
+    ordered = orderExperiments(digests, sizes)
+
+    order = []
+    before = {}
+    for exprmntName, files in ordered:
+        changed = sorted(fileName for fileName in set(files).union(before) if files.get(fileName) != before.get(fileName))
+        order.append({'experiment': exprmntName, 'files': files, 'changed': changed})
+        before = files
+
+    groups = {}
+    for exprmntName, files in ordered:
+        for fileName, digest in files.items():
+            fileGroups = groups.setdefault(fileName, {})
+            fileGroups.setdefault(digest, []).append(exprmntName)
+
+    manifest = {
+        'files': [{'name': fileName, 'bytes': sizes[fileName]} for fileName in sorted(sizes, key=lambda fileName: -sizes[fileName])],
+        'order': order,
+        'groups': {fileName: [{'digest': digest, 'experiments': names} for digest, names in fileGroups.items()]
+            for fileName, fileGroups in sorted(groups.items())},
+    }
+    with open(os.path.join(bundleDir, 'manifest.json'), 'w') as wf:
+        json.dump(manifest, wf, indent=1)
+
+class Overlays:
+    """Writes the model of each experiment to bundleDir as an overlay of a base model (see
+    modelOverlay), the base being the model of the first experiment written"""
+    def __init__(self, bundleDir):
+        self.bundleDir = bundleDir
+        self.baseName = None
+        self.base = None
+        self.baseDigests = {}
+        self.names = []
+
+        # the digests of the files of each experiment, the hash of the base file for a file
+        # the overlay leaves alone, otherwise the hash of that and the file's entries
+        self.digests = {}
+
+        # the loaded files converted for the experiments, by path
+        self.loaded = {}
+
+        os.makedirs(os.path.join(bundleDir, 'overlays'), exist_ok=True)
+
+    def tree(self, source):
+        """Returns the loaded file from its source, the path of the file converted for the
+        experiment, or the symbolPaths.SymbolPaths of the file and the values to patch it with"""
+        if isinstance(source, str):
+            if source not in self.loaded:
+                self.loaded[source] = modelOverlay.loadFile(source)
+            return self.loaded[source]
+        filePaths, remap = source
+        return filePaths.patched(remap)
+
+    def write(self, exprmntName, model):
+        """Writes the overlay of the experiment, model being a dictionary mapping the names of
+        its files to their sources (see tree).  Returns the number of entries written."""
+        trees = {}
+        for fileName, source in model.items():
+            trees[fileName] = self.tree(source)
+        if self.base is None:
+            self.writeBase(exprmntName, model, trees)
+
+        files = {}
+        digests = {}
+        count = 0
+        for fileName, tree in sorted(trees.items()):
+            if fileName in self.base:
+                entries = modelOverlay.overlayEntries(self.base[fileName], tree)
+            else:
+                entries = [{'path': [], 'value': tree}]
+            digests[fileName] = self.baseDigests.get(fileName, '')
+            if len(entries) > 0:
+                files[fileName] = entries
+                count += len(entries)
+                text = digests[fileName] + json.dumps(entries, sort_keys=True)
+                digests[fileName] = hashlib.sha256(text.encode()).hexdigest()
+        self.digests[exprmntName] = digests
+
+        overlay = {'files': files}
+        removed = sorted(set(self.base) - set(trees))
+        if len(removed) > 0:
+            overlay['removed'] = removed
+
+        with open(os.path.join(self.bundleDir, 'overlays', exprmntName+'.json'), 'w') as wf:
+            json.dump(overlay, wf)
+        self.names.append(exprmntName)
+        return count
+
+    def writeBase(self, exprmntName, model, trees):
+        baseDir = os.path.join(self.bundleDir, 'base')
+        shutil.rmtree(baseDir, ignore_errors=True)
+        os.makedirs(baseDir)
+        for fileName, source in model.items():
+            if isinstance(source, str):
+                with open(source, 'rb') as rf:
+                    data = rf.read()
+            else:
+                filePaths, remap = source
+                data = filePaths.render(remap).encode()
+            with open(os.path.join(baseDir, fileName), 'wb') as wf:
+                wf.write(data)
+            self.baseDigests[fileName] = hashlib.sha256(data).hexdigest()
+
+        self.baseName = exprmntName
+        self.base = trees
+
+    def close(self):
+        """Writes the index of the overlays, naming the base and listing the experiments"""
+        index = {'base': self.baseName, 'files': sorted(self.base or {}), 'experiments': self.names}
+        with open(os.path.join(self.bundleDir, 'overlay.json'), 'w') as wf:
+            json.dump(index, wf, indent=2)
+
+def makeRuns(runs, sheet2symbol, runDir, validate, workers):
+    """Makes the converter runs (see planRuns), each one after the runs it depends on,
+    with a pool of worker processes if workers is more than 1.  A generator, giving the
+    index of each run and its result as the runs finish.  The result is whether the
+    converter completed and what it printed, or None for a run skipped because a run
+    it depends on did not complete."""
+    done = {}
+    if workers == 1:
+        for idx, run in enumerate(runs):
+            result = None
+            if all(done[dep] for dep in run[2]):
+                result = converterRun(idx, run, sheet2symbol, runDir, validate)
+            done[idx] = result is not None and result[0]
+            yield idx, result
+        return
+
+    executor = workerPool(workers)
+    try:
+        running = {}
+        waiting = list(range(len(runs)))
+        while len(waiting) > 0 or len(running) > 0:
+            started = []
+            for idx in waiting:
+                deps = runs[idx][2]
+                if not all(dep in done for dep in deps):
+                    continue
+                started.append(idx)
+                if all(done[dep] for dep in deps):
+                    future = executor.submit(timedJob, converterRun, idx, runs[idx], sheet2symbol, runDir, validate)
+                    running[future] = idx
+                else:
+                    done[idx] = False
+                    yield idx, None
+            waiting = [idx for idx in waiting if idx not in started]
 
-    # transformations w/o experiment sheet
-    transformations = [("convert-exec.py", "exec"), ("convert-topo.py", "topo"), ("convert-cp.py", "cp"),
-        ("convert-map.py", "map"), ("convert-ipmap.py", "ipmap"), ("convert-netparams.py", "netparams"), ("convert-experiments.py", "experiments")]
+            if len(running) == 0:
+                continue
 
-    # do 'em all
-    print("Transform csv files with symbols to yaml files with symbols")
-    for scriptName, sheet in transformations:
-        if sheet in sheetNames:
-            convertSheet(scriptName, sheet, False)
+            finished, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                idx = running.pop(future)
+                result, records = future.result()
+                timings.merge(records)
+                done[idx] = result[0]
+                yield idx, result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def converterRun(idx, run, sheet2symbol, runDir, validate):
+    """Makes run idx in a scratch workspace of its own under runDir, whose descDir
+    starts with the descriptions (e.g. exprmnt.json) and the files in the workspaces
+    of the runs it depends on.  The workspace is left for the runs that depend on 
+    this one.  Returns whether the converter completed and what it printed."""
+    sheet, remap, deps, exprmntName = run
+    workspace = os.path.join(runDir, str(idx))
+    dirs = {}
+    for dirName in ('csvDir', 'yamlDir', 'descDir'):
+        dirs[dirName] = os.path.join(workspace, dirName)
+        os.makedirs(dirs[dirName])
+
+    seedDirs = [descDir] + [os.path.join(runDir, str(dep), 'descDir') for dep in deps]
+    for seedDir in seedDirs:
+        for filePath in glob.glob(os.path.join(seedDir, '*')):
+            if os.path.isfile(filePath):
+                shutil.copyfile(filePath, os.path.join(dirs['descDir'], os.path.basename(filePath)))
+
+    # substitute the experiment's values into the sheet if it uses them
+    csvName = sheet+'-sheet.csv'
+    rows = dict(templateRows)
+    if sheet in sheet2symbol:
+        with timings.stage('substitute', sheet=sheet, experiment=exprmntName) as counts:
+            rows[csvName] = templates[sheet].render(remap)
+            counts['rows'] = len(rows[csvName])
+            counts['cells'] = len(templates[sheet].cells)
+
+    if writeCsv:
+        with timings.stage('write csv', sheet=sheet, experiment=exprmntName) as counts:
+            xlsxReader.writeCsv(rows[csvName], os.path.join(dirs['csvDir'], csvName))
+            counts['rows'] = len(rows[csvName])
+        rows = None
+
+    with timings.labelled(experiment=exprmntName):
+        return convertSheetJob(sheet, validate, dirs, rows)
+
+def experimentResult(plan, message, graph, results):
+    """Returns the status of an experiment, 'valid', 'invalid' or 'unresolved', and its
+    report, from the results of the runs in its plan (see planRuns)"""
+    if plan is None:
+        return 'unresolved', message
+
+    # values that do not meet the constraints of their symbols
+    if message is not None:
+        return 'invalid', message
+
+    output = io.StringIO()
+    done = {}
+    for sheet, deps in graph.items():
+        result = results[plan[sheet]]
+        if result is None:
+            failed = [dep for dep in deps if not done[dep]]
+            print('conversion of sheet {} skipped because conversion of {} failed'.format(sheet, failed), file=output)
+            done[sheet] = False
+            continue
+        done[sheet], runOutput = result
+        output.write(runOutput)
+
+    if not all(done.values()):
+        return 'invalid', output.getvalue()
+
+    return 'valid', output.getvalue()
+
+def reportExperiment(exprmntName, status, output, invalid):
+    """Prints what validation of an experiment produced.  Exits if the experiment left
+    symbols unresolved, otherwise returns False if the experiment failed validation"""
+    print('validating experiment {}'.format(exprmntName))
+    if len(output) > 0:
+        print(output, end='')
+
+    if status == 'unresolved':
+        exit(0)
+
+    if status == 'invalid':
+        invalid.append(exprmntName)
+        return False
+
+    return True
 
 def template2csv():
     directory_path = templateDir
     file_pattern = '*.csv'
     filenames = glob.glob(f'{directory_path}/{file_pattern}')
 
-    for filePath in filenames:
-        basename = os.path.basename(filePath) 
-        input_file = os.path.join(csvDir, basename)
-        shutil.copyfile(filePath, input_file)            
+    with timings.stage('write csv') as counts:
+        for filePath in filenames:
+            basename = os.path.basename(filePath) 
+            input_file = os.path.join(csvDir, basename)
+            shutil.copyfile(filePath, input_file)            
+        counts['files'] = len(filenames)
     
 
-def convertSheet(scriptName, sheet, validate):
-    global convertDir, workingDir 
-    if not script_present[sheet]:
-        return 
-
-    scriptPath = os.path.join(convertDir, scriptName)
-    argsPath = os.path.join(workingDir, "args-"+sheet)
-    argsPathV = os.path.join(workingDir, "args-"+sheet+'-v')
-
-    with open(argsPathV, 'w') as wf:
+def loadConverter(sheet):
+    """Returns a fresh instance of the converter module for sheet, convertDir/convert-sheet.py.
+    The module body is executed anew on every call, so the module-level tables
+    a converter builds up while it runs (cmpPtnInstDict, switchNames, execTimeList, ...)
+    form a per-run context that starts out empty, just as it does when the script
+    is run as its own process.  The script is compiled only the first time."""
+    scriptPath = os.path.join(convertDir, 'convert-'+sheet+'.py')
+    moduleName = 'convert_'+sheet
+
+    spec = importlib.util.spec_from_file_location(moduleName, scriptPath)
+    stamp = scriptStamp(scriptPath)
+    if stamp not in converterCode:
+        converterCode[stamp] = spec.loader.get_code(moduleName)
+
+    module = importlib.util.module_from_spec(spec)
+    exec(converterCode[stamp], module.__dict__)
+    return module
+
+def scriptStamp(scriptPath):
+    """Returns what identifies the version of the script at scriptPath: its absolute path,
+    modification time and size"""
+    try:
+        status = os.stat(scriptPath)
+    except OSError:
+        return (os.path.abspath(scriptPath), None, None)
+    return (os.path.abspath(scriptPath), status.st_mtime_ns, status.st_size)
+
+def converterCmdline(sheet, validate, dirs=None):
+    """Returns the command line for the converter of sheet, from its argument file in workingDir.
+    dirs optionally maps 'csvDir', 'yamlDir' and 'descDir' to directories that
+    replace the ones named in the argument file."""
+    if sheet not in converterArgs:
+        argsPath = os.path.join(workingDir, "args-"+sheet)
+        cmdline = []
         with open(argsPath, 'r') as rf:
             for line in rf:
-                if line.find('-validate') > -1:
-                    if not validate:
-                        continue
-                    wf.write('-validate\n')
-                else:
-                    wf.write(line)
- 
-    argsPath = argsPathV 
-
-    process = subprocess.Popen(["python3", scriptPath, "-is", argsPath], 
-        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    stdout, stderr = process.communicate()
-   
-    if len(stdout) > 0:
-        print(stdout)
-
-    if len(stderr) > 0 :
-        print(stderr)
-
-    #if process.returncode != 0:
-
-    #    print("Error from {}: {}".format(scriptName, stderr))
-    #else:
-    #    if len(stdout) > 0:
-    #        print(stdout)
-
-    #    if len(stderr) > 0 :
-    #        print(stderr)
-
-def boolRep(v):
-    if isinstance(v,int):
-        if v==0 or v==1:
-            return v
-        return 0
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                cmdline.extend(line.split())
+        converterArgs[sheet] = cmdline
+
+    cmdline = [arg for arg in converterArgs[sheet] if arg != '-validate']
+    if validate:
+        cmdline.append('-validate')
+
+    if dirs is not None:
+        for idx in range(len(cmdline)-1):
+            if cmdline[idx].startswith('-') and cmdline[idx][1:] in dirs:
+                cmdline[idx+1] = dirs[cmdline[idx][1:]]
+
+    return cmdline
+
+def converterGraph(sheets):
+    """Builds the dependency graph of the converters for sheets, from the descDir files
+    each one declares it reads (descInputs) and writes (descOutputs).  Returns a dictionary
+    mapping each sheet to the list of sheets whose converters must run before its own,
+    with the sheets in an order the converters can be run in, and a list of the problems
+    found: a csv file the workbook did not produce, a descDir file no converter writes, 
+    a descDir file more than one converter writes, or a cycle."""
+    msgs = []
+    inputs = {}
+    producer = {}
+    for sheet in sheets:
+        converter = loadConverter(sheet)
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                args = converter.parseArgs(converterCmdline(sheet, False))
+        except SystemExit:
+            msgs.append('argument file {} not accepted by convert-{}.py'.format(
+                os.path.join(workingDir, 'args-'+sheet), sheet))
+            continue
 
-    if isinstance(v,str):
-        if v in ('T', 'True', 'TRUE', 't', 'true', 'Y', 'Yes', 'YES', 'yes', '1'):
-            return 1
-        return 0
+        if args.csv_input not in templateRows:
+            msgs.append('convert-{}.py reads csv file {}, which is not created from the workbook'.format(
+                sheet, args.csv_input))
+
+        inputs[sheet] = [getattr(args, name, name) for name in converter.descInputs]
+        for name in converter.descOutputs:
+            descFile = getattr(args, name, name)
+            if descFile in producer:
+                msgs.append('descDir file {} is written by both convert-{}.py and convert-{}.py'.format(
+                    descFile, producer[descFile], sheet))
+            producer[descFile] = sheet
+
+    deps = {}
+    for sheet, descFiles in inputs.items():
+        deps[sheet] = []
+        for descFile in descFiles:
+            if descFile not in producer:
+                msgs.append('convert-{}.py reads descDir file {}, which no converter writes'.format(sheet, descFile))
+            elif producer[descFile] not in deps[sheet]:
+                deps[sheet].append(producer[descFile])
+
+    # order the sheets so that each follows the sheets it depends on
+    graph = {}
+    while len(graph) < len(deps):
+        ready = [sheet for sheet in deps if sheet not in graph and 
+            all(dep in graph for dep in deps[sheet])]
+        if len(ready) == 0:
+            cycle = [sheet for sheet in deps if sheet not in graph]
+            msgs.append('converters for sheets {} depend on each other'.format(cycle))
+            break
+        for sheet in ready:
+            graph[sheet] = deps[sheet]
+
+    return graph, msgs
+
+def runConverters(graph, validate, dirs=None, workers=1, rows=None):
+    """Runs the converters in graph (as built by converterGraph), each one after the
+    converters it depends on.  dirs and rows are passed to convertSheet.  A converter is skipped if one it depends on failed.
+    With more than one worker, converters whose dependencies are done run concurrently
+    in a pool of processes.  Returns True if every converter ran to completion."""
+    done = {}
+
+    # returns the sheets whose converters can be started, marking as done (and failed)
+    # those with a dependency that failed
+    def ready():
+        rtn = []
+        for sheet, deps in graph.items():
+            if sheet in done or not all(dep in done for dep in deps):
+                continue
+            failed = [dep for dep in deps if not done[dep]]
+            if len(failed) > 0:
+                print('conversion of sheet {} skipped because conversion of {} failed'.format(sheet, failed))
+                done[sheet] = False
+                continue
+            rtn.append(sheet)
+        return rtn
+
+    if workers <= 1:
+        # graph is in an order the converters can be run in
+        for sheet in graph:
+            if sheet not in done and sheet in ready():
+                done[sheet] = convertSheet(sheet, validate, dirs, rows)
+        return all(done.values())
+
+    with workerPool(min(workers, len(graph))) as executor:
+        running = {}
+        while len(done) < len(graph):
+            for sheet in ready():
+                if sheet not in running.values():
+                    future = executor.submit(timedJob, convertSheetJob, sheet, validate, dirs, rows)
+                    running[future] = sheet
+
+            if len(running) == 0:
+                continue
 
+            finished, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                sheet = running.pop(future)
+                (completed, output), records = future.result()
+                timings.merge(records)
+                if len(output) > 0:
+                    print(output, end='')
+                done[sheet] = completed
+
+    return all(done.values())
+
+def convertSheetJob(sheet, validate, dirs, rows):
+    """convertSheet for a worker process, returning what the converter printed"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        completed = convertSheet(sheet, validate, dirs, rows)
+    return completed, output.getvalue()
+
+def cacheKey(sheet, converter, args, cmdline):
+    """Returns the build cache key for running converter on the command line cmdline,
+    whose parsed form is args.  The directories on the command line are left out, 
+    so that runs in different workspaces on the same inputs share entries."""
+    scriptPath = os.path.join(convertDir, 'convert-'+sheet+'.py')
+    stamp = scriptStamp(scriptPath)
+    if stamp not in converterVersion:
+        converterVersion[stamp] = cache.fileKey(scriptPath)
+
+    parts = ['convert-'+sheet+'.py', converterVersion[stamp]]
+    for idx, arg in enumerate(cmdline):
+        if idx > 0 and cmdline[idx-1] in ('-csvDir', '-yamlDir', '-descDir'):
+            continue
+        parts.append(arg)
 
+    if converter.csvRows is not None:
+        parts.append(json.dumps(converter.csvRows))
+    else:
+        parts.append(cache.fileKey(os.path.join(args.csvDir, args.csv_input)))
+    for name in converter.descInputs:
+        descFile = getattr(args, name, name)
+        parts.extend([descFile, cache.fileKey(os.path.join(args.descDir, descFile))])
+
+    return cache.key(parts)
+
+def convertSheet(sheet, validate, dirs=None, rows=None):
+    """Runs the converter for sheet, returning False if it reported a problem.
+    dirs is passed to converterCmdline.  rows, if given, maps csv file names to the
+    rows the converter is handed in place of reading its csv input file.  If the build cache has an entry for the
+    converter's inputs, its outputs are restored from there instead."""
+    if not script_present[sheet]:
+        return True
+
+    cmdline = converterCmdline(sheet, validate, dirs)
+
+    # the converters report problems and then call exit(), which here
+    # ends the conversion of this sheet and not the whole run
+    converter = loadConverter(sheet)
+    if timings.enabled:
+        # time the writing of the yaml and json files apart from the rest of the conversion
+        converter.yaml = timings.TimedDumps(converter.yaml, sheet=sheet)
+        converter.json = timings.TimedDumps(converter.json, sheet=sheet)
+    if not emitYaml:
+        converter.yaml = SkippedDumps(converter.yaml)
+
+    completed = False
+    key = None
+    cached = None
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output), \
+            timings.stage('convert', sheet=sheet, validate=validate) as counts:
+        try:
+            args = converter.parseArgs(cmdline)
+            if rows is not None:
+                converter.csvRows = rows[args.csv_input]
+                counts['rows'] = len(converter.csvRows)
+
+            if cache is not None:
+                key = cacheKey(sheet, converter, args, cmdline)
+                cached = cache.restore(key, {'yamlDir': args.yamlDir, 'descDir': args.descDir})
+
+            if cached is None:
+                converter.convert(args)
+            else:
+                print(cached, end='')
+                counts['cached'] = 1
+            completed = True
+        except SystemExit:
+            pass
+        except Exception:
+            traceback.print_exc()
+
+    output = output.getvalue()
+    print(output, end='')
+    sys.stdout.flush()
+
+    # only runs that complete are cached, so that problems are always reported afresh
+    if completed and key is not None and cached is None:
+        files = {'yamlDir': [], 'descDir': []}
+        for name in converter.yamlOutputs:
+            files['yamlDir'].append(os.path.join(args.yamlDir, getattr(args, name, name)))
+        for name in converter.descOutputs:
+            files['descDir'].append(os.path.join(args.descDir, getattr(args, name, name)))
+        cache.store(key, files, output)
+
+    return completed
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,294 @@
+# constraints on the values of experiment symbols, used by runConvert.py.
+#
+# Where a symbol occurs says what values it may take.  The wrapper it is given in says
+# whether it is to be an int, a float or a bool, and the field of the sheet the cell is
+# in may say more, e.g. that a StreamSrc reqrate is a non-negative float, that a topo
+# flow's framesize is an int no smaller than 64, or that a topo network's netscale is
+# one of LAN, WAN, T3, T2 or T1.  The values an experiment gives its symbols are checked
+# against these constraints directly, rather than by substituting them into the sheets
+# and converting them.
+#
+# Some fields only set a value, e.g. a rate or a length, and whatever value they hold,
+# once it meets the field's constraint, the sheet converts the same way.  A symbol whose
+# every occurrence in a sheet is in such a field is a value symbol of the sheet.  Other
+# fields, e.g. names, connections or the enumerations matched against by other sheets,
+# shape the model, and a symbol occurring in one of them (or in a cell with more than
+# the symbol in it, or in a field not known here) has to be converted to be validated.
+#
+import symbolTemplate
+
+# the ways of writing True and False taken for a symbol in a bool() wrapper
+boolReps = ('TRUE', 'True', 'true', 'T', 't', 'Y', 'y', 'YES', 'Yes', 'yes', '1',
+        'FALSE', 'False', 'false', 'F', 'f', 'N', 'n', 'NO', 'No', 'no', '0')
+
+# the ways of writing True and False convert-netparams.py's validateBool accepts
+netparamsBoolReps = ('TRUE', 'True', 'true', 'yes', 'Yes', 'y', 'Y', 'T', 't', '1',
+        'FALSE', 'False', 'false', 'F', 'f', 'no', 'N', 'No', 'n', '0')
+
+class Constraint:
+    """What the text of a field has to be: of kind 'int', 'float', 'bool' or 'str', no smaller
+    than lower and no larger than upper if they are given, one of choices if they are given,
+    and not empty unless empty is True"""
+    def __init__(self, kind, lower=None, upper=None, choices=None, empty=False):
+        self.kind = kind
+        self.lower = lower
+        self.upper = upper
+        self.choices = choices
+        self.empty = empty
+
+    def describe(self):
+        """Returns what the constraint asks for, e.g. 'a non-negative float'"""
+        if self.choices is not None:
+            return 'one of ({})'.format(', '.join(['"{}"'.format(choice) for choice in self.choices]))
+
+        what = {'int': 'an int', 'float': 'a float', 'bool': 'a boolean', 'str': 'a string'}[self.kind]
+        if self.lower == 0 and self.upper is None:
+            what = 'a non-negative ' + what[what.find(' ')+1:]
+        elif self.lower is not None and self.upper is not None:
+            what += ' from {} to {}'.format(self.lower, self.upper)
+        elif self.lower is not None:
+            what += ' no smaller than {}'.format(self.lower)
+        elif self.upper is not None:
+            what += ' no larger than {}'.format(self.upper)
+        return what
+
+    def holds(self, text):
+        """Returns True if text meets the constraint"""
+        if len(text) == 0:
+            return self.empty
+
+        if self.choices is not None:
+            return text in self.choices
+
+        if self.kind == 'bool':
+            return text in boolReps
+
+        if self.kind in ('int', 'float'):
+            try:
+                number = int(text) if self.kind == 'int' else float(text)
+            except ValueError:
+                return False
+            if self.lower is not None and number < self.lower:
+                return False
+            if self.upper is not None and number > self.upper:
+                return False
+
+        return True
+
+class Field:
+    """A field of a sheet, its constraint, and whether it only sets a value"""
+    def __init__(self, name, constraint, value=True):
+        self.name = name
+        self.constraint = constraint
+        self.value = value
+
+# the constraint of each wrapper on the value it is given
+wrapperConstraints = {'int': Constraint('int'), 'float': Constraint('float'), 'bool': Constraint('bool'),
+        'str': Constraint('str', empty=True)}
+
+nonNegative = Constraint('float', lower=0)
+nonNegativeOrEmpty = Constraint('float', lower=0, empty=True)
+
+# convert-cp.py's booleans are tested with its validateBool, but as the tuple it returns
+# is always true none is rejected, and what is not a spelling of True or False is
+# written as it is
+cpBool = Constraint('str', empty=True)
+netparamsBool = Constraint('bool', choices=netparamsBoolReps, empty=True)
+
+# the fields whose constraints are known, by sheet, section and column.  The booleans
+# are not value fields, as the converters write most spellings of True and False as 1
+# and 0 but others (e.g. '1' for convert-netparams.py) as they are.  The sections of
+# a sheet start at rows whose first cell holds one of sectionMarkers, and within the
+# section of classSections the first cell names the class, carrying on to the rows below
+# it left empty, which is the section the rows are in.
+fields = {
+    'cp': {
+        # convert-cp.py's Start compares pcktlen with msglen, so they are not only values
+        'start': {
+            3: Field('pcktlen', Constraint('int', lower=0, upper=1559), value=False),
+            4: Field('msglen', Constraint('int', lower=0, upper=1559), value=False),
+            6: Field('start time', Constraint('float')),
+            7: Field('data', Constraint('str', empty=True)),
+            8: Field('trace', cpBool, value=False),
+        },
+        'streamsrc': {
+            6: Field('pcktstrm', cpBool, value=False),
+            7: Field('reqrate', nonNegative),
+            9: Field('msglen', Constraint('int', lower=0, empty=True)),
+            10: Field('elastic', cpBool, value=False),
+            12: Field('start', nonNegative),
+            13: Field('volume', nonNegative),
+            15: Field('flowmodel', Constraint('str', choices=('const', 'exp', 'exponential', 'expon'), empty=True)),
+            16: Field('pause', nonNegative),
+            17: Field('cycles', Constraint('int', lower=0, empty=True)),
+            18: Field('data', Constraint('str', empty=True)),
+            20: Field('trace', cpBool, value=False),
+        },
+    },
+    'topo': {
+        # the netscale and mediatype are network attributes that netparams is matched against
+        'Networks': {
+            1: Field('netscale', Constraint('str', choices=('LAN', 'WAN', 'T3', 'T2', 'T1')), value=False),
+            2: Field('mediatype', Constraint('str', choices=('wired', 'wireless')), value=False),
+        },
+        # a flow's reqrate and framesize are written as numbers only when str.isnumeric()
+        # holds for them, so e.g. 12.5 converts differently from 12
+        'Flows': {
+            3: Field('mode', Constraint('str', choices=('pckt', 'elastic-flow', 'inelastic-flow')), value=False),
+            4: Field('reqrate', Constraint('float'), value=False),
+            5: Field('framesize', Constraint('int', lower=64), value=False),
+        },
+    },
+    'netparams': {
+        'Network': {
+            5: Field('latency', nonNegativeOrEmpty),
+            6: Field('bandwidth', nonNegativeOrEmpty),
+            7: Field('capacity', nonNegativeOrEmpty),
+            8: Field('trace', netparamsBool, value=False),
+        },
+        'Switch': {5: Field('trace', netparamsBool, value=False)},
+        'Router': {5: Field('trace', netparamsBool, value=False)},
+        'Endpoint': {
+            5: Field('interruptdelay', nonNegative),
+            6: Field('trace', netparamsBool, value=False),
+        },
+        'Interface': {
+            7: Field('latency', nonNegativeOrEmpty),
+            8: Field('bandwidth', nonNegativeOrEmpty),
+            # convert-netparams.py takes only an mtu for which str.isdigit() holds, which
+            # the constraint does not say, e.g. for '+1500'
+            9: Field('mtu', Constraint('int', lower=0, empty=True), value=False),
+            10: Field('trace', netparamsBool, value=False),
+        },
+    },
+}
+
+sectionMarkers = {
+    'cp': ('Patterns', 'Connections', 'Initializations'),
+    'topo': ('Networks', 'Switches', 'Routers', 'Endpoints', 'Wired-Connections', 'Wireless-Connections', 'Flows'),
+    'netparams': ('Network', 'Switch', 'Router', 'Endpoint', 'Interface', 'Flows'),
+}
+
+classSections = {'cp': 'Initializations'}
+
+def rowSections(sheet, rows):
+    """Returns the section of the sheet each of its rows is in, as the converter
+    of the sheet sees it, None for rows outside any section"""
+    markers = sectionMarkers.get(sheet, ())
+    sections = []
+    section = None
+    className = None
+    for row in rows:
+        first = row[0] if len(row) > 0 else ''
+        if first.find('#') > -1:
+            sections.append(None)
+            continue
+
+        marker = None
+        for candidate in markers:
+            if first.find(candidate) > -1:
+                marker = candidate
+        if marker is not None:
+            section = marker
+            className = None
+            sections.append(None)
+            continue
+
+        if section is not None and section == classSections.get(sheet):
+            if len(first.strip()) > 0:
+                className = first.strip()
+            sections.append(className)
+            continue
+        sections.append(section)
+    return sections
+
+class Use:
+    """An occurrence of a symbol, at (row index, column index) of the sheet, in the wrapper,
+    and in the field if the cell holds only the occurrence and the field is known"""
+    def __init__(self, sheet, cell, wrapper, field):
+        self.sheet = sheet
+        self.cell = cell
+        self.wrapper = wrapper
+        self.field = field
+
+    def problem(self, symbol, value):
+        """Returns what is wrong with the value given the symbol, or None if nothing is"""
+        constraint = wrapperConstraints[self.wrapper]
+        if not constraint.holds(value):
+            return '{} value "{}" needs to be {} for {}({}) in sheet {}'.format(symbol, value,
+                constraint.describe(), self.wrapper, symbol, self.sheet)
+
+        if self.field is not None:
+            text = symbolTemplate.wrapValue(self.wrapper, value)
+            if not self.field.constraint.holds(text):
+                return '{} value "{}" needs to be {} for the {} of sheet {}'.format(symbol, value,
+                    self.field.constraint.describe(), self.field.name, self.sheet)
+
+        return None
+
+class SymbolConstraints:
+    """The uses of the symbols in the templates of the sheets they are applied to, and the
+    values found for them to meet their constraints"""
+    def __init__(self, templates, sheets):
+        # the uses of each symbol, in sheet order
+        self.uses = {}
+
+        # the symbols of each sheet that occur in it only in value fields
+        self.valueSymbols = {}
+
+        for sheet in sheets:
+            template = templates[sheet]
+            sections = rowSections(sheet, template.rows)
+            structural = set()
+            for rowIdx, colIdx, pieces in template.cells:
+                whole = len(pieces) == 3 and len(pieces[0].strip()) == 0 and len(pieces[2].strip()) == 0
+                for wrapper, symbol in pieces[1::2]:
+                    field = None
+                    if whole:
+                        field = fields.get(sheet, {}).get(sections[rowIdx], {}).get(colIdx)
+                    self.uses.setdefault(symbol, []).append(Use(sheet, (rowIdx, colIdx), wrapper, field))
+                    if field is None or not field.value:
+                        structural.add(symbol)
+
+            self.valueSymbols[sheet] = set(symbol for wrapper, symbol in template.occurrences) - structural
+
+        # the problems of each symbol's values, as they are found
+        self.checked = {}
+
+        # the first value given each symbol that meets its constraints
+        self.representatives = {}
+
+    def problems(self, remap):
+        """Returns the problems with the values remap gives the symbols, as (sheet,
+        cell, message) tuples"""
+        found = []
+        for symbol, value in remap.items():
+            uses = self.uses.get(symbol)
+            if uses is None:
+                continue
+
+            key = (symbol, value)
+            if key not in self.checked:
+                self.checked[key] = []
+                for use in uses:
+                    msg = use.problem(symbol, value)
+                    if msg is not None:
+                        self.checked[key].append((use.sheet, use.cell, msg))
+                if len(self.checked[key]) == 0:
+                    self.representatives.setdefault(symbol, value)
+            found.extend(self.checked[key])
+        return found
+
+    def representative(self, sheet, remap):
+        """Returns remap with the value symbols of the sheet given the first value found
+        for them that meets their constraints (see problems), with which the sheet
+        converts as it does with the values in remap"""
+        symbols = self.valueSymbols.get(sheet)
+        if not symbols:
+            return remap
+
+        rep = dict(remap)
+        for symbol in symbols:
+            if symbol in rep and symbol in self.representatives:
+                rep[symbol] = self.representatives[symbol]
+        return rep
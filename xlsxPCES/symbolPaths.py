@@ -0,0 +1,256 @@
+# where experiment symbols land in the converted model, used by runConvert.py.
+#
+# A sheet converted with some of its symbols left in place, e.g. 'float($Lambda)',
+# carries them into the .yaml files it writes, as the values of mappings and lists
+# or within them (a cpInit.yaml 'cfg' value is itself a JSON document, and a symbol
+# landing in one is found within the document).  A SymbolPaths records the path of
+# every such value in the loaded .yaml file, so that the file of an experiment is made
+# by setting just those values in the symbolic model and writing it out again, rather
+# than by converting the sheet with the experiment's values substituted into it.
+#
+# That only works if the converter carries the symbols' values through unchanged, which
+# is checked against a probe: the same file converted with the values of one experiment
+# in place.  The probe also gives the type each value is written as.  A converter may
+# write a value with a type that depends on what the value looks like, e.g. convert-topo.py
+# writes a reqrate as a float only when str.isnumeric() holds for it, so the values are
+# told apart by their shape (see valueShape), and there is a probe for each shape the
+# experiments give the symbols, the type of a value being learned for each shape.
+#
+import json
+import yaml
+import symbolTemplate
+
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# the ways a file may have been written, tried in turn until one writes the loaded file
+# back out as it was
+dumpStyles = [(getattr(yaml, 'CDumper', yaml.Dumper), {}), (yaml.Dumper, {}),
+        (getattr(yaml, 'CDumper', yaml.Dumper), {'default_flow_style': True}),
+        (yaml.Dumper, {'default_flow_style': True})]
+
+# the types a value may be written as, by name
+valueTypes = {'str': str, 'int': int, 'float': float}
+
+def valueShape(value):
+    """Returns the shape of a symbol value, what the converters may tell values apart by
+    before writing them: whether str.isnumeric() holds for it, and whether int() and
+    float() take it"""
+    shape = [value.isnumeric()]
+    for valueType in (int, float):
+        try:
+            valueType(value)
+            shape.append(True)
+        except ValueError:
+            shape.append(False)
+    return tuple(shape)
+
+def valueShapes(remap, symbols):
+    """Returns the shapes of the values remap gives symbols, in the order of symbols"""
+    return tuple(valueShape(remap.get(symbol, '')) for symbol in symbols)
+
+class Slot:
+    """A value of the model holding symbols: its path, the text it has in the symbolic model,
+    and, for a JSON document, the slots within the document.  kinds maps the shapes of
+    the symbol values (see valueShapes) to the type the value is written as with values
+    of that shape, learned from the probe of the shape."""
+    def __init__(self, path, text, inner=None):
+        self.path = path
+        self.text = text
+        self.inner = inner
+        self.kinds = {}
+
+        self.pieces = []
+        if inner is None:
+            start = 0
+            for match in symbolTemplate.occurrencePattern.finditer(text):
+                self.pieces.append(text[start:match.start()])
+                self.pieces.append((match.group(1), match.group(2)))
+                start = match.end()
+            self.pieces.append(text[start:])
+
+    def symbols(self):
+        if self.inner is not None:
+            return set().union(*[slot.symbols() for slot in self.inner])
+        return set(piece[1] for piece in self.pieces[1::2])
+
+    def value(self, remap, shape):
+        """Returns the value with the symbol values in remap, whose shape is shape, in place"""
+        if self.inner is not None:
+            return json.dumps(patch(json.loads(self.text), self.inner, remap, shape))
+
+        text = []
+        for idx, piece in enumerate(self.pieces):
+            if idx % 2 == 0:
+                text.append(piece)
+            elif piece[1] in remap:
+                text.append(symbolTemplate.wrapValue(piece[0], remap[piece[1]]))
+            else:
+                text.append(piece[0]+'('+piece[1]+')')
+        text = ''.join(text)
+
+        kind = self.kinds[shape]
+        if kind != 'str':
+            try:
+                return valueTypes[kind](text)
+            except ValueError:
+                # left as text for an experiment whose value does not have the type
+                pass
+        return text
+
+    def learn(self, probe, shape):
+        """Takes the kind of the value for values of shape from its probe, returning False
+        if the probe's value is of a kind the slot cannot give"""
+        if self.inner is not None:
+            if not isinstance(probe, str):
+                return False
+            try:
+                probe = json.loads(probe)
+            except ValueError:
+                return False
+            return all(slot.learn(lookup(probe, slot.path), shape) for slot in self.inner)
+
+        for kind, valueType in valueTypes.items():
+            if type(probe) is valueType:
+                self.kinds[shape] = kind
+                return True
+        return False
+
+class Missing:
+    """What lookup gives for a path the tree does not have"""
+
+def lookup(tree, path):
+    """Returns the value at path in tree, or Missing"""
+    node = tree
+    for key in path:
+        try:
+            node = node[key]
+        except (KeyError, IndexError, TypeError):
+            return Missing
+    return node
+
+def findSlots(tree, symbols, path=()):
+    """Returns the slots of tree whose values hold occurrences of symbols"""
+    slots = []
+    if isinstance(tree, dict):
+        for key, value in tree.items():
+            slots.extend(findSlots(value, symbols, path+(key,)))
+    elif isinstance(tree, list):
+        for idx, value in enumerate(tree):
+            slots.extend(findSlots(value, symbols, path+(idx,)))
+    elif isinstance(tree, str):
+        found = [match.group(2) for match in symbolTemplate.occurrencePattern.finditer(tree)]
+        if not any(symbol in symbols for symbol in found):
+            return slots
+
+        # a JSON document written by json.dumps is looked into
+        inner = None
+        if tree.startswith('{') or tree.startswith('['):
+            try:
+                document = json.loads(tree)
+                if json.dumps(document) == tree:
+                    inner = findSlots(document, symbols)
+            except ValueError:
+                pass
+        slots.append(Slot(path, tree, inner))
+    return slots
+
+def patch(tree, slots, remap, shape):
+    """Returns tree with the values of slots filled in with the symbol values in remap,
+    whose shape is shape.  Only the mappings and lists on the paths to the slots are
+    copied, the rest being shared with tree."""
+    if isinstance(tree, dict):
+        root = dict(tree)
+    else:
+        root = list(tree)
+
+    copied = set()
+    for slot in slots:
+        node = root
+        for depth in range(len(slot.path)-1):
+            key = slot.path[depth]
+            prefix = slot.path[:depth+1]
+            if prefix not in copied:
+                child = node[key]
+                node[key] = dict(child) if isinstance(child, dict) else list(child)
+                copied.add(prefix)
+            node = node[key]
+        node[slot.path[-1]] = slot.value(remap, shape)
+    return root
+
+class SymbolPaths:
+    """The slots of the symbols in a .yaml file of the symbolic model, and how the file
+    is written, or the reason the file cannot be made by patching"""
+    def __init__(self, text, symbols):
+        self.problem = None
+        self.slots = []
+        self.style = None
+
+        # the symbols whose values' shapes select the kinds of the slots
+        self.shapeSymbols = sorted(symbols)
+
+        self.tree = yaml.load(text, Loader=Loader)
+        if not isinstance(self.tree, (dict, list)):
+            self.problem = 'is not a mapping or list'
+            return
+
+        self.slots = findSlots(self.tree, symbols)
+        for dumper, options in dumpStyles:
+            if yaml.dump(self.tree, Dumper=dumper, **options) == text:
+                self.style = (dumper, options)
+                break
+        if self.style is None:
+            self.problem = 'is not written back out as it was'
+
+        # the paths of slots naming keys, rather than values, are not patched
+        for key in self.keys(self.tree):
+            if isinstance(key, str) and any(match.group(2) in symbols
+                    for match in symbolTemplate.occurrencePattern.finditer(key)):
+                self.problem = 'has symbols in its keys'
+
+    def keys(self, tree):
+        if isinstance(tree, dict):
+            for key, value in tree.items():
+                yield key
+                yield from self.keys(value)
+        elif isinstance(tree, list):
+            for value in tree:
+                yield from self.keys(value)
+
+    def symbols(self):
+        """Returns the symbols whose values the file depends on, in order"""
+        if len(self.slots) == 0:
+            return []
+        return sorted(set().union(*[slot.symbols() for slot in self.slots]))
+
+    def shape(self, remap):
+        """Returns the shape of the values remap gives the symbols (see valueShapes)"""
+        return valueShapes(remap, self.shapeSymbols)
+
+    def verify(self, probeText, remap):
+        """Checks the file against a probe, probeText converted with the symbol values in
+        remap, learning the kind of each slot for values of their shape.  Returns True if
+        patching the file with those values writes the probe."""
+        if self.problem is not None:
+            return False
+
+        shape = self.shape(remap)
+        probe = yaml.load(probeText, Loader=Loader)
+        for slot in self.slots:
+            if not slot.learn(lookup(probe, slot.path), shape):
+                self.problem = 'has symbols whose values are not carried through'
+                return False
+
+        if self.render(remap) != probeText:
+            self.problem = 'has symbols whose values are not carried through'
+            return False
+        return True
+
+    def patched(self, remap):
+        """Returns the loaded file with the symbol values in remap in place, their shape
+        being one the file has been verified for"""
+        return patch(self.tree, self.slots, remap, self.shape(remap))
+
+    def render(self, remap):
+        """Returns the text of the file with the symbol values in remap in place"""
+        dumper, options = self.style
+        return yaml.dump(self.patched(remap), Dumper=dumper, **options)
@@ -0,0 +1,116 @@
+# compiled experiment templates, used by runConvert.py.
+#
+# A sheet's cells may hold experiment symbols wrapped by the type they are to be
+# given, e.g. 'float($Lambda)' or 'decrypt-str($crypto)'.  A SheetTemplate scans the
+# rows of the sheet once, recording where each wrapped symbol occurs.  Rendering the
+# sheet for an experiment then only touches the cells holding occurrences, and
+# whether the experiment leaves symbols unresolved is decided from the recorded
+# occurrences rather than by searching the rendered rows.
+#
+import re
+
+# a symbol within one of the type wrappers
+occurrencePattern = re.compile(r'(str|int|bool|float)\(([^()]*)\)')
+
+def boolRep(v):
+    if isinstance(v,int):
+        if v==0 or v==1:
+            return v
+        return 0
+
+    if isinstance(v,str):
+        if v in ('T', 'True', 'TRUE', 't', 'true', 'Y', 'Yes', 'YES', 'yes', '1'):
+            return 1
+        return 0
+
+def hasSymbol(text):
+    """Returns True if text holds something that looks like an experiment symbol"""
+    return text.find('$') > -1 or text.find('@') > -1
+
+def wrapValue(wrapper, value):
+    """Returns the text that replaces wrapper(symbol) for the symbol's value"""
+    if wrapper == 'bool':
+        return str(boolRep(value))
+    return str(value)
+
+class SheetTemplate:
+    def __init__(self, rows):
+        self.rows = rows
+
+        # cells holding occurrences, as (row index, column index, pieces), where pieces
+        # alternates literal text with (wrapper, symbol) tuples
+        self.cells = []
+
+        # the (wrapper, symbol) pairs occurring in the sheet
+        self.occurrences = set()
+
+        # True if the sheet holds a symbol that is not in a type wrapper, which
+        # no experiment can resolve
+        self.stray = False
+
+        for rowIdx, row in enumerate(rows):
+            for colIdx, text in enumerate(row):
+                if not hasSymbol(text) and text.find('(') < 0:
+                    continue
+
+                pieces = []
+                start = 0
+                for match in occurrencePattern.finditer(text):
+                    pieces.append(text[start:match.start()])
+                    pieces.append((match.group(1), match.group(2)))
+                    self.occurrences.add((match.group(1), match.group(2)))
+                    start = match.end()
+                pieces.append(text[start:])
+
+                if any(hasSymbol(piece) for piece in pieces[0::2]):
+                    self.stray = True
+
+                if len(pieces) > 1:
+                    self.cells.append((rowIdx, colIdx, pieces))
+
+    def resolved(self, remap):
+        """Returns True if the sheet rendered with the symbol values in remap holds no symbols"""
+        if self.stray:
+            return False
+
+        for wrapper, symbol in self.occurrences:
+            if symbol in remap:
+                if hasSymbol(wrapValue(wrapper, remap[symbol])):
+                    return False
+            elif hasSymbol(symbol):
+                return False
+
+        return True
+
+    def render(self, remap):
+        """Returns the rows of the sheet with the symbol values in remap filled in.
+        Rows without occurrences are shared with the template."""
+        if len(self.cells) == 0:
+            return self.rows
+
+        rows = list(self.rows)
+        for rowIdx, colIdx, pieces in self.cells:
+            if rows[rowIdx] is self.rows[rowIdx]:
+                rows[rowIdx] = list(self.rows[rowIdx])
+
+            text = []
+            for idx, piece in enumerate(pieces):
+                if idx % 2 == 0:
+                    text.append(piece)
+                else:
+                    text.append(self.slotText(piece[0], piece[1], remap))
+            rows[rowIdx][colIdx] = ''.join(text)
+
+        return rows
+
+    def slotText(self, wrapper, symbol, remap):
+        """Returns the text filling an occurrence of wrapper(symbol), which is left as it
+        is if remap has no value for the symbol"""
+        if symbol in remap:
+            return wrapValue(wrapper, remap[symbol])
+        return wrapper+'('+symbol+')'
+
+    def slotValues(self, remap):
+        """Returns the texts filling the occurrences of each (wrapper, symbol) pair with
+        the values in remap, which together determine the rendered rows"""
+        return tuple(self.slotText(wrapper, symbol, remap) for wrapper, symbol in sorted(self.occurrences))
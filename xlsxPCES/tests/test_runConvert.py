@@ -0,0 +1,58 @@
+# checks conversions of workbooks the examples do not cover, run with python -m pytest
+# from the xlsxPCES directory
+import json
+import os
+import sys
+import openpyxl
+import pytest
+
+scriptDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, scriptDir)
+
+import runConvert
+
+def test_workbook_without_experiments(tmp_path):
+    workbook = openpyxl.load_workbook(os.path.join(scriptDir, 'examples', 'flows.xlsx'))
+    sheet = workbook['experiments']
+    # leave the heading of the experiments, but none of them
+    sheet.delete_rows(4, sheet.max_row)
+    xlsxPath = str(tmp_path / 'flows.xlsx')
+    workbook.save(xlsxPath)
+
+    dirs = {}
+    for name in ('working', 'csvDir', 'yamlDir', 'templateDir', 'descDir', 'bundles'):
+        dirs[name] = str(tmp_path / name)
+        os.makedirs(dirs[name])
+
+    status = runConvert.main(['-name', 'flows', '-xlsx', xlsxPath, '-workingDir', dirs['working'],
+        '-csvDir', dirs['csvDir'], '-yamlDir', dirs['yamlDir'], '-templateDir', dirs['templateDir'],
+        '-descDir', dirs['descDir'], '-bundleDir', dirs['bundles'], '-noCache', '-workers', '1'])
+
+    assert status == 'ok'
+    assert os.path.isfile(os.path.join(dirs['yamlDir'], 'topo.yaml'))
+    assert os.listdir(dirs['bundles']) == ['manifest.json']
+
+def test_check_locates_rejected_value(tmp_path):
+    workbook = openpyxl.load_workbook(os.path.join(scriptDir, 'examples', 'queueing.xlsx'), data_only=True)
+    workbook['netParams']['K18'] = 'YES'
+    xlsxPath = str(tmp_path / 'queueing.xlsx')
+    workbook.save(xlsxPath)
+
+    dirs = {}
+    for name in ('working', 'csvDir', 'yamlDir', 'templateDir', 'descDir'):
+        dirs[name] = str(tmp_path / name)
+        os.makedirs(dirs[name])
+
+    with pytest.raises(SystemExit):
+        runConvert.main(['-name', 'queueing', '-xlsx', xlsxPath, '-workingDir', dirs['working'],
+            '-csvDir', dirs['csvDir'], '-yamlDir', dirs['yamlDir'], '-templateDir', dirs['templateDir'],
+            '-descDir', dirs['descDir'], '-check'])
+
+    with open(os.path.join(dirs['working'], runConvert.checkFile), 'r') as rf:
+        problems = json.load(rf)['problems']
+    assert [(problem['sheet'], problem['row'], problem['column']) for problem in problems] == [('netParams', 18, 'K')]
+
+def test_message_in_several_rows_at_sheet():
+    rows = [['### name', 'value'], ['Network', ''], ['a', '1'], ['b', '1']]
+    assert runConvert.locateMessage('value "1" out of range', 'netparams', rows) is None
+    assert runConvert.locateMessage('value "1" of "b" out of range', 'netparams', rows) == (3, 1)
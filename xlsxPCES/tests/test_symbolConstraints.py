@@ -0,0 +1,61 @@
+# checks that the values of experiments are judged by the constraints of their symbols as
+# converting them would judge them, run with python -m pytest from the xlsxPCES directory
+import os
+import sys
+import yaml
+import openpyxl
+
+scriptDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, scriptDir)
+
+import symbolConstraints
+import runConvert
+
+def test_bool_fields_as_their_converters():
+    interfaceTrace = symbolConstraints.fields['netparams']['Interface'][10]
+    for text in ('', 'true', 'yes', 'Y', '1', 'No', '0'):
+        assert interfaceTrace.constraint.holds(text)
+    for text in ('YES', 'NO', 'maybe'):
+        assert not interfaceTrace.constraint.holds(text)
+
+    # convert-cp.py rejects no boolean
+    cpTrace = symbolConstraints.fields['cp']['start'][8]
+    assert cpTrace.constraint.holds('YES') and cpTrace.constraint.holds('maybe')
+
+    # the converters write some spellings as 1 or 0 and others as they are
+    for sections in symbolConstraints.fields.values():
+        for columns in sections.values():
+            for field in columns.values():
+                if field.name in ('trace', 'pcktstrm', 'elastic'):
+                    assert not field.value
+
+def test_bool_symbol_in_netparams(tmp_path):
+    workbook = openpyxl.load_workbook(os.path.join(scriptDir, 'examples', 'queueing.xlsx'), data_only=True)
+    workbook['netParams']['K18'] = 'str($tr)'
+    sheet = workbook['experiments']
+    sheet['E3'] = '$tr,netParams'
+    # convert-experiments.py writes YES as 1, but leaves true, false and maybe as they are
+    values = {'exp-1': 'true', 'exp-2': 'YES', 'exp-3': 'maybe', 'exp-4': 'false'}
+    for rowIdx in range(4, sheet.max_row+1):
+        sheet.cell(row=rowIdx, column=5, value=values.get(sheet.cell(row=rowIdx, column=1).value, 'True'))
+    xlsxPath = str(tmp_path / 'queueing.xlsx')
+    workbook.save(xlsxPath)
+
+    dirs = {}
+    for name in ('working', 'csvDir', 'yamlDir', 'templateDir', 'descDir', 'bundles'):
+        dirs[name] = str(tmp_path / name)
+        os.makedirs(dirs[name])
+
+    status = runConvert.main(['-name', 'queueing', '-xlsx', xlsxPath, '-workingDir', dirs['working'],
+        '-csvDir', dirs['csvDir'], '-yamlDir', dirs['yamlDir'], '-templateDir', dirs['templateDir'],
+        '-descDir', dirs['descDir'], '-bundleDir', dirs['bundles'], '-noCache', '-workers', '1'])
+    assert status == 'invalid'
+    assert runConvert.invalidExperiments == ['exp-3']
+
+    # convert-netparams.py writes true and false as 1 and 0, and 1 as it is
+    for exprmntName, trace in (('exp-1', 1), ('exp-2', '1'), ('exp-4', 0), ('exp-5', '1')):
+        with open(os.path.join(dirs['bundles'], exprmntName, 'exp.yaml'), 'r') as rf:
+            params = yaml.safe_load(rf)
+        traces = [param['value'] for param in params['parameters']
+            if param['paramObj'] == 'Interface' and param['param'] == 'trace']
+        assert traces == [trace]
@@ -0,0 +1,51 @@
+# checks that experiment bundles made by patching the symbolic model come out as converting
+# each experiment does, run with python -m pytest from the xlsxPCES directory
+import os
+import sys
+import yaml
+import openpyxl
+
+scriptDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, scriptDir)
+
+import symbolPaths
+import runConvert
+
+def convertFlow(reqrate):
+    """Writes a flow as convert-topo.py does, reqrate becoming a float only when it is numeric"""
+    if reqrate.isnumeric():
+        reqrate = float(reqrate)
+    return yaml.dump({'flows': [{'name': 'f1', 'reqrate': reqrate}]})
+
+def test_kind_learned_for_each_shape():
+    filePaths = symbolPaths.SymbolPaths(convertFlow('float($Lambda)'), {'$Lambda'})
+    assert len(filePaths.slots) == 1
+
+    for value in ('10', '12.5'):
+        assert filePaths.verify(convertFlow(value), {'$Lambda': value})
+
+    for value in ('20', '7.25'):
+        assert filePaths.render({'$Lambda': value}) == convertFlow(value)
+
+def test_bundle_with_non_integer_value(tmp_path):
+    workbook = openpyxl.load_workbook(os.path.join(scriptDir, 'examples', 'flows.xlsx'))
+    for row in workbook['experiments'].iter_rows():
+        if row[0].value in ('exp-2', 'exp-3'):
+            row[1].value = 12.5
+    xlsxPath = str(tmp_path / 'flows.xlsx')
+    workbook.save(xlsxPath)
+
+    dirs = {}
+    for name in ('working', 'csvDir', 'yamlDir', 'templateDir', 'descDir', 'bundles'):
+        dirs[name] = str(tmp_path / name)
+        os.makedirs(dirs[name])
+
+    runConvert.main(['-name', 'flows', '-xlsx', xlsxPath, '-workingDir', dirs['working'],
+        '-csvDir', dirs['csvDir'], '-yamlDir', dirs['yamlDir'], '-templateDir', dirs['templateDir'],
+        '-descDir', dirs['descDir'], '-bundleDir', dirs['bundles'], '-noCache', '-workers', '1'])
+
+    for exprmntName, reqrate in (('exp-1', 10.0), ('exp-2', '12.5'), ('exp-3', '12.5'), ('exp-4', 30.0)):
+        with open(os.path.join(dirs['bundles'], exprmntName, 'topo.yaml'), 'r') as rf:
+            topo = yaml.safe_load(rf)
+        for flow in topo['flows']:
+            assert flow['reqrate'] == reqrate and type(flow['reqrate']) is type(reqrate)
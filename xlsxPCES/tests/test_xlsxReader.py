@@ -0,0 +1,84 @@
+# checks that xlsxReader gives the rows pandas.read_excel and DataFrame.to_csv give, run
+# with python -m pytest from the xlsxPCES directory
+import datetime
+import csv
+import io
+import os
+import sys
+import openpyxl
+import pytest
+
+scriptDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, scriptDir)
+
+import xlsxReader
+
+def writeWorkbook(path, sheets):
+    """Writes a workbook with a sheet for each list of rows, None leaving a cell empty"""
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for name, rows in sheets.items():
+        sheet = workbook.create_sheet(name)
+        for rowIdx, row in enumerate(rows):
+            for colIdx, value in enumerate(row):
+                if value is not None:
+                    sheet.cell(row=rowIdx+1, column=colIdx+1, value=value)
+    workbook.save(path)
+
+def pandasRows(path):
+    pd = pytest.importorskip('pandas')
+    xls = pd.ExcelFile(path)
+    return [(name, list(csv.reader(io.StringIO(pd.read_excel(xls, sheet_name=name).to_csv(index=False)))))
+        for name in xls.sheet_names]
+
+sheets = {
+    'datetimes': [
+        ['dates', 'times', 'fractions', 'mixed', 'missing', 'clock'],
+        [datetime.datetime(2024, 1, 2), datetime.datetime(2024, 1, 2, 3, 4, 5),
+            datetime.datetime(2024, 1, 2, 3, 4, 5, 123000), datetime.datetime(2024, 1, 2), None,
+            datetime.time(13, 14, 15)],
+        [datetime.date(2024, 1, 3), datetime.datetime(2024, 1, 3),
+            datetime.datetime(2024, 1, 3), 'later', 'NA', datetime.time(1, 2, 3, 500000)],
+        [None, None, None, 5, datetime.datetime(2024, 1, 4), None],
+    ],
+    'headers': [
+        ['a', 'a', 'a.1', None, 'Unnamed: 3', 1, '1', True, 1],
+        [1, 2, 3, 4, 5, 6, 7, 8, 9],
+    ],
+    'numberHeaders': [
+        [2, 1.5, 1],
+        ['x', 'y', 'z'],
+    ],
+    'dateHeaders': [
+        [datetime.datetime(2024, 1, 2), datetime.datetime(2024, 1, 3)],
+        [1, 2],
+    ],
+    'empty': [],
+    'headerOnly': [
+        ['name', None, 'value'],
+    ],
+}
+
+def test_rows_as_pandas(tmp_path):
+    path = str(tmp_path / 'cells.xlsx')
+    writeWorkbook(path, sheets)
+    assert xlsxReader.readWorkbook(path) == pandasRows(path)
+
+def test_datetimes(tmp_path):
+    path = str(tmp_path / 'cells.xlsx')
+    writeWorkbook(path, {'datetimes': sheets['datetimes']})
+    rows = dict(xlsxReader.readWorkbook(path))['datetimes']
+    assert rows[1] == ['2024-01-02', '2024-01-02 03:04:05', '2024-01-02 03:04:05.123',
+        '2024-01-02 00:00:00', '', '13:14:15']
+    assert rows[3] == ['', '', '', '5', '2024-01-04', '']
+
+def test_empty_sheet(tmp_path):
+    path = str(tmp_path / 'cells.xlsx')
+    writeWorkbook(path, {'empty': []})
+    assert xlsxReader.readWorkbook(path) == [('empty', [[]])]
+
+def test_big_integer_with_bool(tmp_path):
+    # the one difference from pandas known, which writes the True cell as empty
+    path = str(tmp_path / 'cells.xlsx')
+    writeWorkbook(path, {'big': [['h'], [1e20], [True]]})
+    assert xlsxReader.readWorkbook(path) == [('big', [['h'], ['100000000000000000000'], ['1']])]
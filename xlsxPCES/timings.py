@@ -0,0 +1,134 @@
+# per-stage timing of runConvert.py, kept when it is given -timings.
+#
+# A stage is timed by
+#     with timings.stage('convert', sheet='cp') as counts:
+#         ...
+#         counts['rows'] = len(rows)
+# which records the wall clock and CPU time the stage took, its labels, and the counts
+# put in counts.  Stages may nest, and the labels given to labelled() are added to those
+# of every stage timed within it.  Records made in a worker process are sent back with
+# the worker's results and merged in.  The records are summarized by stage, and written
+# out in full as JSON.
+#
+import contextlib
+import json
+import time
+import os
+
+enabled = False
+
+# the records of the stages timed in this process
+records = []
+
+# labels added to those of each stage, see labelled()
+context = {}
+
+def cpuTime():
+    """Returns the CPU time used by this process and the child processes it has waited for"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+@contextlib.contextmanager
+def labelled(**labels):
+    saved = dict(context)
+    context.update(labels)
+    try:
+        yield
+    finally:
+        context.clear()
+        context.update(saved)
+
+@contextlib.contextmanager
+def stage(name, **labels):
+    counts = {}
+    if not enabled:
+        yield counts
+        return
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield counts
+    finally:
+        records.append({'stage': name, 'labels': dict(context, **labels), 'counts': counts, 'pid': os.getpid(),
+            'wall': time.perf_counter()-wall, 'cpu': time.process_time()-cpu})
+
+def drain():
+    """Returns the records made in this process, and forgets them"""
+    rtn = list(records)
+    records.clear()
+    return rtn
+
+def merge(more):
+    records.extend(more)
+
+def objectCount(data):
+    """Returns the number of dictionaries, lists and scalars making up data"""
+    count = 0
+    pending = [data]
+    while pending:
+        item = pending.pop()
+        count += 1
+        if isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            pending.extend(item)
+    return count
+
+class TimedDumps:
+    """Stands in for a module such as yaml or json, timing the writing of files with its
+    dump function as 'emit' stages"""
+    def __init__(self, module, **labels):
+        self.module = module
+        self.labels = labels
+
+    def __getattr__(self, name):
+        attr = getattr(self.module, name)
+        if name not in ('dump', 'safe_dump'):
+            return attr
+
+        def timed(data, stream=None, *args, **kwargs):
+            with stage('emit', format=self.module.__name__, **self.labels) as counts:
+                rtn = attr(data, stream, *args, **kwargs)
+                if hasattr(stream, 'tell'):
+                    counts['bytes'] = stream.tell()
+
+            # counted once the stage is timed, the record holding counts
+            counts['objects'] = objectCount(data)
+            return rtn
+        return timed
+
+def summary():
+    """Returns the records totalled by stage, and for stages labelled with a sheet, by
+    stage and sheet, as a list of dictionaries in the order the stages were first seen"""
+    totals = {}
+    for record in records:
+        key = record['stage']
+        if 'sheet' in record['labels']:
+            key += ' ' + record['labels']['sheet']
+        if key not in totals:
+            totals[key] = {'stage': key, 'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'maxWall': 0.0, 'counts': {}}
+        total = totals[key]
+        total['calls'] += 1
+        total['wall'] += record['wall']
+        total['cpu'] += record['cpu']
+        total['maxWall'] = max(total['maxWall'], record['wall'])
+        for name, count in record['counts'].items():
+            total['counts'][name] = total['counts'].get(name, 0) + count
+    return list(totals.values())
+
+def report(path, wall, cpu):
+    """Prints the summary, and writes it with all the records as JSON to path"""
+    totals = summary()
+    width = max([len(total['stage']) for total in totals] + [5])
+    print('{:<{}} {:>7} {:>10} {:>10} {:>10}  {}'.format('stage', width, 'calls', 'wall s', 'cpu s', 'max wall s', 'counts'))
+    for total in totals:
+        counts = ', '.join('{} {}'.format(name, count) for name, count in total['counts'].items())
+        print('{:<{}} {:>7} {:>10.3f} {:>10.3f} {:>10.3f}  {}'.format(total['stage'], width, total['calls'],
+            total['wall'], total['cpu'], total['maxWall'], counts))
+    print('total wall time {:.3f} s, cpu time {:.3f} s (stages timed in worker processes overlap)'.format(wall, cpu))
+
+    with open(path, 'w') as wf:
+        json.dump({'wall': wall, 'cpu': cpu, 'stages': totals, 'records': records}, wf, indent=1)
+    print('timings written to {}'.format(path))
@@ -0,0 +1,318 @@
+# pandas-free reading of the sheets of an xlsx workbook, used by runConvert.py.
+#
+# The workbook is streamed with openpyxl in read-only mode.  Each sheet becomes a
+# list of rows, each row a list of strings, with exactly the text that
+# pandas.read_excel followed by DataFrame.to_csv(index=False) produced for it,
+# because the converters were written against those csv files.  In particular
+#   - the first row is the header, an empty header cell becomes 'Unnamed: <column>'
+#     and repeated names get '.1', '.2', ... appended, skipping names the header
+#     already has.  Header cells that compare equal (1 and True, say) are repeats,
+#     a number and its text ('1') are not.  If every name is a number and one is
+#     not integral, they are all written as floats, and if every name is a date and
+#     time they are written as a column of them is
+#   - a sheet with no cells at all is a single empty line
+#   - a number stored in a cell is an integer if it has an integral value
+#   - a column whose every non-empty cell is numeric is written as all integers or,
+#     if a cell is empty or any value is not integral, all floats ('5.0')
+#   - a column whose every non-empty cell is one of True/False (in any of the
+#     spellings pandas accepts) is written as 'True'/'False'
+#   - the strings pandas reads as missing values ('NA', 'null', ...) become empty
+#   - a column whose every non-empty cell is a date and time is written as dates
+#     ('2024-01-02') if none has a time of day, else as dates and times with as many
+#     digits of the seconds' fraction as the cells need (none, 3 or 6).  Dates and
+#     times in any other column are written as python writes them
+# The one difference known is a column holding an integer too large for 64 bits and
+# a True or False cell, which pandas writes as empty and readSheet as 1 or 0.
+#
+# sheetDigests() fingerprints each sheet from the raw parts of the workbook's zip
+# archive, without decoding the cells, so that sheets unchanged since they were last
+# read need not be read again.
+#
+import xml.etree.ElementTree as ET
+import concurrent.futures
+import posixpath
+import zipfile
+import hashlib
+import datetime
+import csv
+import math
+import re
+
+# strings pandas treats as missing values by default
+naValues = frozenset(('', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'))
+
+trueValues = frozenset(('True', 'TRUE', 'true'))
+falseValues = frozenset(('False', 'FALSE', 'false'))
+
+# the index of a shared string a cell holds, and the shared string entries
+sharedCellPattern = re.compile(rb'<(?:\w+:)?c\b[^>]*\bt=["\']s["\'][^>]*>\s*<(?:\w+:)?v>(\d+)</(?:\w+:)?v>')
+sharedStringPattern = re.compile(rb'<(?:\w+:)?si\b.*?</(?:\w+:)?si>', re.DOTALL)
+
+# the cell data of a sheet part, without the view settings Excel rewrites on every save
+sheetDataPattern = re.compile(rb'<(?:\w+:)?sheetData\b.*?(?:</(?:\w+:)?sheetData>|/>)', re.DOTALL)
+
+# the version of the text readSheet makes of the cells, part of every sheet digest so
+# that rows kept from a reading by an earlier version are not taken for current ones
+readerVersion = b'2'
+
+relsNamespace = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+mainNamespace = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+docRelsNamespace = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+def sheetDigests(xlsx_file):
+    """Returns a list of (sheet name, digest) for the sheets of the workbook, in workbook
+    order.  A sheet's digest covers its cells, the shared strings they hold, and the
+    workbook's styles (which decide whether a number is read as a date), and readerVersion,
+    so it changes whenever what readSheet returns for the sheet could.  Returns None if the archive
+    is not laid out as expected."""
+    try:
+        with zipfile.ZipFile(xlsx_file) as archive:
+            workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+            rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+            targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(relsNamespace+'Relationship')}
+
+            names = archive.namelist()
+            shared = []
+            if 'xl/sharedStrings.xml' in names:
+                shared = sharedStringPattern.findall(archive.read('xl/sharedStrings.xml'))
+            styles = b''
+            if 'xl/styles.xml' in names:
+                styles = archive.read('xl/styles.xml')
+            stylesDigest = hashlib.sha256(styles).digest()
+
+            digests = []
+            for sheet in workbook.iter(mainNamespace+'sheet'):
+                target = targets[sheet.get(docRelsNamespace+'id')]
+                if target.startswith('/'):
+                    partName = target[1:]
+                else:
+                    partName = posixpath.normpath(posixpath.join('xl', target))
+                part = archive.read(partName)
+                match = sheetDataPattern.search(part)
+                if match is not None:
+                    part = match.group(0)
+
+                # each shared string index is hashed as the string it refers to, so
+                # that renumbering the shared strings does not change the digest
+                h = hashlib.sha256(readerVersion + stylesDigest)
+                start = 0
+                for match in sharedCellPattern.finditer(part):
+                    idx = int(match.group(1))
+                    entry = shared[idx] if idx < len(shared) else b''
+                    h.update(part[start:match.start(1)])
+                    h.update(len(entry).to_bytes(8, 'little'))
+                    h.update(entry)
+                    start = match.end(1)
+                h.update(part[start:])
+                digests.append((sheet.get('name'), h.hexdigest()))
+            return digests
+    except (OSError, KeyError, zipfile.BadZipFile, ET.ParseError):
+        return None
+
+def openWorkbook(xlsx_file):
+    import openpyxl
+    return openpyxl.load_workbook(xlsx_file, read_only=True, data_only=True, keep_links=False)
+
+def sheetNames(xlsx_file):
+    """Returns the names of the sheets of the workbook, in workbook order"""
+    wb = openWorkbook(xlsx_file)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+def cellValue(cell):
+    """Returns the value of an openpyxl cell as pandas' openpyxl reader does"""
+    value = cell.value
+    if value is None:
+        return ''
+    if cell.data_type == 'e':
+        return math.nan
+    if cell.data_type == 'n':
+        intValue = int(value)
+        if intValue == value:
+            return intValue
+        return float(value)
+    return value
+
+def sheetData(ws):
+    """Returns the cell values of a worksheet, trailing empty cells and rows dropped
+    and the rows padded to a common width"""
+    data = []
+    lastRow = -1
+    for row in ws.iter_rows():
+        values = [cellValue(cell) for cell in row]
+        while values and values[-1] == '':
+            values.pop()
+        if values:
+            lastRow = len(data)
+        data.append(values)
+
+    data = data[:lastRow+1]
+    width = max((len(values) for values in data), default=0)
+    for values in data:
+        values.extend([''] * (width - len(values)))
+    return data
+
+def isMissing(value):
+    if isinstance(value, str):
+        return value in naValues
+    return isinstance(value, float) and math.isnan(value)
+
+def numericValue(value):
+    """Returns value as an int or float if pandas would read it as a number, else None"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    if not isinstance(value, str) or '_' in value:
+        return None
+    text = value.strip()
+    try:
+        if not any(c in text for c in '.eEnN'):
+            return int(text)
+        return float(text)
+    except ValueError:
+        return None
+
+def boolValue(value):
+    """Returns value as a bool if pandas would read it as one, else None"""
+    if isinstance(value, bool):
+        return value
+    if value in trueValues:
+        return True
+    if value in falseValues:
+        return False
+    return None
+
+def formatDatetimes(values, missing):
+    """Returns the strings to_csv writes for a column of datetimes, as pandas reads a
+    column whose every value is one"""
+    present = [value for value, isNA in zip(values, missing) if not isNA]
+    if all(value.time() == datetime.time() for value in present):
+        return ['' if isNA else value.strftime('%Y-%m-%d') for value, isNA in zip(values, missing)]
+
+    digits = 0
+    if any(value.microsecond % 1000 != 0 for value in present):
+        digits = 6
+    elif any(value.microsecond != 0 for value in present):
+        digits = 3
+
+    strings = []
+    for value, isNA in zip(values, missing):
+        if isNA:
+            strings.append('')
+        elif digits == 0:
+            strings.append(value.strftime('%Y-%m-%d %H:%M:%S'))
+        else:
+            strings.append(value.strftime('%Y-%m-%d %H:%M:%S.%f')[:digits-6 or None])
+    return strings
+
+def formatColumn(values):
+    """Returns the strings to_csv writes for a column of cell values"""
+    missing = [isMissing(value) for value in values]
+    present = [value for value, isNA in zip(values, missing) if not isNA]
+    hasMissing = len(present) < len(values)
+
+    if present and all(isinstance(value, datetime.datetime) for value in present):
+        return formatDatetimes(values, missing)
+
+    # a column of numbers (True and False counting as 1 and 0) is all integers, or
+    # all floats if a value is missing or not integral.  A column of nothing but
+    # True and False cells stays boolean
+    numbers = [numericValue(value) for value in present]
+    if None not in numbers:
+        if not hasMissing and present and all(isinstance(value, bool) for value in present):
+            return [str(value) for value in present]
+        if not hasMissing and all(isinstance(number, int) for number in numbers):
+            return [str(number) for number in numbers]
+        numbers.reverse()
+        return ['' if isNA else repr(float(numbers.pop())) for isNA in missing]
+
+    # otherwise values that compare equal (1 and True, 0 and False) all become
+    # whichever of them comes first in the column
+    first = {}
+    values = [None if isNA else first.setdefault(value, value) for value, isNA in zip(values, missing)]
+
+    # and if every value is True or False they are written as such, though pandas
+    # only looks for these when the first value is not a number
+    bools = [boolValue(value) for value in values if value is not None]
+    if None not in bools and (values[0] is None or not isinstance(values[0], int)):
+        bools.reverse()
+        return ['' if isNA else str(bools.pop()) for isNA in missing]
+
+    return ['' if value is None else str(value) for value in values]
+
+def headerNames(header):
+    """Returns the column names pandas makes from the header row.  The names of the
+    cells are given their suffixes before those of the empty cells, and the cells keep
+    their values (not their text) until then, as pandas' python parser does"""
+    names = [value if value != '' else 'Unnamed: {}'.format(idx) for idx, value in enumerate(header)]
+    unnamed = [idx for idx, value in enumerate(header) if value == '']
+    named = [idx for idx, value in enumerate(header) if value != '']
+
+    counts = {}
+    for idx in named + unnamed:
+        name = names[idx]
+        count = counts.get(name, 0)
+        if count > 0:
+            while count > 0:
+                counts[names[idx]] = count + 1
+                name = '{}.{}'.format(names[idx], count)
+                if name in names:
+                    count += 1
+                else:
+                    count = counts.get(name, 0)
+        names[idx] = name
+        counts[name] = count + 1
+
+    # names that are all numbers are an index of numbers, of floats if one is, and
+    # names that are all datetimes an index of datetimes
+    numbers = [name for name in names if isinstance(name, (int, float)) and not isinstance(name, bool)]
+    if len(numbers) == len(names) and any(isinstance(name, float) for name in names):
+        return [repr(float(name)) for name in names]
+    if names and all(isinstance(name, datetime.datetime) for name in names):
+        return formatDatetimes(names, [False]*len(names))
+    return [str(name) for name in names]
+
+def formatSheet(data):
+    """Returns the rows of strings for the cell values of a sheet, header first"""
+    if not data:
+        return [[]]
+    header = headerNames(data[0])
+    columns = [formatColumn([values[idx] for values in data[1:]]) for idx in range(len(header))]
+    return [header] + [list(row) for row in zip(*columns)]
+
+def readSheet(xlsx_file, sheet_name):
+    """Returns the rows of strings for one sheet of the workbook"""
+    wb = openWorkbook(xlsx_file)
+    try:
+        return formatSheet(sheetData(wb[sheet_name]))
+    finally:
+        wb.close()
+
+def readWorkbook(xlsx_file, workers=1, only=None):
+    """Returns a list of (sheet name, rows) for the sheets of the workbook, in workbook
+    order, or only for those named in only if it is given.  With more than one worker
+    the sheets are read in separate processes."""
+    if workers < 2:
+        wb = openWorkbook(xlsx_file)
+        try:
+            return [(name, formatSheet(sheetData(wb[name]))) for name in wb.sheetnames
+                if only is None or name in only]
+        finally:
+            wb.close()
+
+    names = [name for name in sheetNames(xlsx_file) if only is None or name in only]
+    if len(names) == 0:
+        return []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(names) or 1)) as pool:
+        futures = [pool.submit(readSheet, xlsx_file, name) for name in names]
+        return [(name, future.result()) for name, future in zip(names, futures)]
+
+def writeCsv(rows, csv_file):
+    """Writes rows of strings as a csv file, quoting as to_csv does"""
+    with open(csv_file, 'w', newline='') as wf:
+        writer = csv.writer(wf, lineterminator='\n')
+        writer.writerows(rows)